@@ -25,12 +25,97 @@ class Settings(BaseSettings):
     # Services
     ML_SERVICE_URL: str = "http://localhost:8001"
     CHROMA_URL: str = "http://localhost:8002"
+    CHROMA_HOST: str = "localhost"
+    CHROMA_PORT: int = 8002
+    CHROMA_COLLECTION: str = "advision_documents"  # Shared collection, and the prefix for per-org ones
+    CHROMA_PER_ORG_COLLECTIONS: bool = False  # Run app.jobs.repartition_vectors, then enable (and run it once more)
+    VECTOR_STORE_BACKEND: str = "chroma"  # "chroma" (HTTP) or "local" (in-process, mmap-backed)
+    VECTOR_STORE_PATH: str = "/tmp/advision-vectors"  # Local backend only; share it with the workers
+    VECTOR_STORE_INDEX: str = "exact"  # Local backend: "exact" or "hnsw" (needs hnswlib)
+    VECTOR_STORE_MAX_WORKERS: int = 8  # Threads for blocking vector-store calls from request handlers
+    VECTOR_STORE_COMPACT_RATIO: float = 0.3  # Local backend: compact a partition once this share of rows is dead
+    VECTOR_STORE_COMPACT_MIN_ROWS: int = 1024  # ...and at least this many
+    ML_TIMEOUT_SECONDS: float = 10.0  # Default; see ENDPOINT_TIMEOUTS in ml_client.py
+    ML_CONNECT_TIMEOUT_SECONDS: float = 2.0
+    ML_MAX_CONNECTIONS: int = 100
+    ML_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    ML_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    ML_HTTP2: bool = False  # Needs the h2 package and a TLS endpoint that speaks HTTP/2
+    ML_MAX_RETRIES: int = 2  # Idempotent calls only
+    ML_RETRY_BACKOFF_SECONDS: float = 0.2
+    ML_BREAKER_FAILURE_THRESHOLD: int = 5
+    ML_BREAKER_RESET_SECONDS: float = 30.0
+    ML_BATCH_SIZE: int = 500  # Campaigns per /predict/engagement/batch call
+    RESCORE_CONCURRENCY: int = 4  # Concurrent ML batch calls per rescoring job
+    RESCORE_COMMIT_EVERY: int = 5000  # Prediction rows per bulk insert + commit
+    
+    # Analytics response cache
+    ANALYTICS_CACHE_BACKEND: str = "memory"  # "memory" (per-process LRU) or "redis"
+    ANALYTICS_CACHE_TTL_SECONDS: float = 30.0
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 10000
+    REDIS_URL: str = "redis://localhost:6379/0"
+    
+    # Creative analysis (app.jobs.analysis_worker)
+    ANALYSIS_MAX_ATTEMPTS: int = 4
+    ANALYSIS_RETRY_BACKOFF_SECONDS: float = 15.0  # Doubles with each attempt
+    ANALYSIS_LOCK_TIMEOUT_SECONDS: float = 300.0  # Running jobs older than this are reclaimed
+    ANALYSIS_POLL_SECONDS: float = 2.0
+    ANALYSIS_CONCURRENCY: int = 4  # Jobs in flight per worker
+    
+    # Document ingestion
+    INGEST_CHUNK_TOKENS: int = 400  # Whitespace tokens per chunk
+    INGEST_CHUNK_OVERLAP: int = 50  # Tokens shared with the previous chunk
+    INGEST_BATCH_SIZE: int = 64  # Chunks per Chroma add (one embedding batch)
+    INGEST_SPOOL_DIR: str = "/tmp/advision-ingest"  # Must be shared by the API and the workers
+    INGEST_MAX_ATTEMPTS: int = 3
+    INGEST_RETRY_BACKOFF_SECONDS: float = 30.0  # Doubles with each attempt
+    INGEST_LOCK_TIMEOUT_SECONDS: float = 900.0  # Running jobs not renewed for this long are reclaimed
+    INGEST_LEASE_RENEW_SECONDS: float = 60.0  # How often a worker renews the lock on its running job
+    INGEST_POLL_SECONDS: float = 2.0
+    EMBEDDING_MODEL_ID: str = "chroma-default/all-MiniLM-L6-v2"  # Part of the cache key; change with the model
+    EMBEDDING_CACHE_PATH: str = "/tmp/advision-embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000  # ~1.5KB per 384-dim vector
+    
+    # Chat retrieval (hybrid BM25 + vector)
+    BM25_INDEX_PATH: str = "/tmp/advision-vectors/bm25.sqlite3"  # Share it with the ingestion workers
+    RETRIEVAL_TOP_K: int = 5  # Chunks passed to the LLM
+    RETRIEVAL_CANDIDATES: int = 20  # Per-search candidates fused and reranked
+    RETRIEVAL_RRF_K: int = 60
+    RETRIEVAL_RERANKER: str = "lexical"  # "none", "lexical" or "cross-encoder" (needs sentence-transformers)
+    RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RETRIEVAL_BUDGET_MS: float = 300.0  # Searches or reranking still running after this are dropped
+    
+    # Chat LLM (any OpenAI-compatible chat completions endpoint)
+    GROQ_API_KEY: str = ""
+    LLM_API_URL: str = "https://api.groq.com/openai/v1/chat/completions"
+    LLM_MODEL: str = "llama-3.1-70b-versatile"
+    LLM_TIMEOUT_SECONDS: float = 30.0  # Between bytes when streaming, not for the whole answer
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    CHAT_CONTEXT_MAX_TOKENS: int = 3000  # Whole prompt: system, retrieved chunks, history and message
+    CHAT_HISTORY_MAX_TOKENS: int = 800  # Most recent turns that fit; chunks get the rest
+    CHAT_TOKENIZER: str = "cl100k_base"  # tiktoken encoding; without tiktoken tokens are estimated
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_BACKEND: str = "memory"  # "memory" (per-process LRU) or "redis"
+    LLM_CACHE_TTL_SECONDS: float = 3600.0
+    LLM_CACHE_MAX_ENTRIES: int = 5000
+    LLM_SEMANTIC_CACHE: bool = False  # Also reuse answers to similar questions (embeds every cache miss)
+    LLM_SEMANTIC_THRESHOLD: float = 0.95  # Cosine similarity of the user messages
+    LLM_SEMANTIC_MAX_ENTRIES: int = 2000
     
     # Storage
     R2_ACCOUNT_ID: str = ""
     R2_ACCESS_KEY_ID: str = ""
     R2_SECRET_ACCESS_KEY: str = ""
     R2_BUCKET_NAME: str = "advision-creatives"
+    STORAGE_ENDPOINT_URL: str = ""  # Defaults to the R2 account endpoint; set for MinIO/S3
+    STORAGE_PUBLIC_URL: str = ""  # Defaults to https://{bucket}.{account}.r2.dev
+    STORAGE_REGION: str = "auto"
+    STORAGE_PART_SIZE_MB: int = 8  # Multipart chunk size (S3 minimum is 5)
+    STORAGE_PART_CONCURRENCY: int = 4  # Parts in flight per upload
+    STORAGE_MAX_TRANSFERS: int = 4  # Uploads running at once per API process
+    STORAGE_PRESIGN_EXPIRES_SECONDS: int = 900
     
     # Monitoring
     SENTRY_DSN: str = ""
@@ -0,0 +1,92 @@
+"""Creative analysis worker.
+
+Polls the ``creative_analysis_jobs`` table and runs quality scoring,
+AI-image detection and trust scoring for uploaded creatives. Each worker
+runs ``--concurrency`` jobs at once; run as many workers as needed, since
+jobs are claimed with FOR UPDATE SKIP LOCKED.
+
+Usage:
+    python -m app.jobs.analysis_worker [--once] [--poll-interval SECONDS] [--concurrency N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from ..config import settings
+from ..database import SessionLocal
+from ..services.creative_analysis import claim_next_job, run_job
+from ..services.ml_client import MLClient
+
+logger = logging.getLogger(__name__)
+
+
+async def _process(worker_id: str, client: MLClient, poll_interval: float, once: bool, stopping: asyncio.Event) -> int:
+    processed = 0
+    while not stopping.is_set():
+        job = None
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker_id)
+            if job is not None:
+                logger.info("Claimed analysis job %s (attempt %d)", job.id, job.attempts)
+                await run_job(db, job, client)
+                processed += 1
+        except Exception:
+            # e.g. the database went away; keep this loop (and its siblings) alive and retry after a pause
+            logger.exception("Analysis worker loop failed")
+            job = None
+        finally:
+            db.close()
+        
+        if job is None:
+            if once:
+                break
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+    
+    return processed
+
+
+async def run_worker(worker_id: str, poll_interval: float, concurrency: int = 4, once: bool = False) -> int:
+    """Process jobs until stopped (or until the queue is empty with ``once``)"""
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    
+    def stop(signum):
+        logger.info("Received signal %d, stopping after the current jobs", signum)
+        stopping.set()
+    
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop, signum)
+    
+    client = MLClient()
+    try:
+        counts = await asyncio.gather(*[
+            _process(worker_id, client, poll_interval, once, stopping) for _ in range(concurrency)
+        ])
+    finally:
+        await client.close()
+    return sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the creative analysis worker")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+    parser.add_argument("--poll-interval", type=float, default=settings.ANALYSIS_POLL_SECONDS)
+    parser.add_argument("--concurrency", type=int, default=settings.ANALYSIS_CONCURRENCY)
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    processed = asyncio.run(run_worker(args.worker_id, args.poll_interval, args.concurrency, once=args.once))
+    logger.info("Worker %s processed %d jobs", args.worker_id, processed)
+
+
+if __name__ == "__main__":
+    main()
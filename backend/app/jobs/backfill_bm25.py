@@ -0,0 +1,95 @@
+"""Index already ingested documents in the BM25 keyword index.
+
+The keyword index is only written at ingest, so documents processed before
+it existed are invisible to keyword search. Their chunks are read back from
+the vector store (nothing is re-extracted or re-embedded) and indexed under
+the same ids. Safe to re-run: documents already in the index are skipped
+unless ``--reindex`` is given, and re-indexing replaces chunks by id.
+
+Usage:
+    python -m app.jobs.backfill_bm25 [--org ORG_ID] [--batch-size 500] [--reindex] [--dry-run]
+"""
+import argparse
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal
+from ..models.document import Document
+from ..services.bm25 import BM25Index, get_bm25_index
+from ..services.vector_store import VectorStore, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(
+    db: Session,
+    store: VectorStore,
+    index: BM25Index,
+    org_id: Optional[str] = None,
+    batch_size: int = 500,
+    reindex: bool = False,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Index each processed document's chunks from the vector store; returns counts"""
+    query = db.query(Document.id, Document.organization_id, Document.chroma_namespace).filter(
+        Document.is_processed.is_(True)
+    )
+    if org_id:
+        query = query.filter(Document.organization_id == org_id)
+    
+    totals = {"documents": 0, "chunks": 0, "skipped": 0}
+    for document_id, document_org, namespace in query.all():
+        if not reindex and index.has_document(document_org, document_id):
+            totals["skipped"] += 1
+            continue
+        
+        chunks = store.document_chunks(document_org, document_id, namespace=namespace)
+        if not chunks:
+            logger.warning("Document %s has no chunks in the vector store; re-upload it to index it", document_id)
+            continue
+        
+        if not dry_run:
+            for start in range(0, len(chunks), batch_size):
+                batch = chunks[start:start + batch_size]
+                index.add_chunks(
+                    document_org,
+                    [chunk["id"] for chunk in batch],
+                    [chunk["document"] for chunk in batch],
+                    [chunk["metadata"] for chunk in batch]
+                )
+        
+        logger.info("Document %s: %d chunks indexed%s", document_id, len(chunks), " (dry run)" if dry_run else "")
+        totals["documents"] += 1
+        totals["chunks"] += len(chunks)
+    
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index ingested documents in the BM25 keyword index")
+    parser.add_argument("--org", help="Only this organization (default: all)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Chunks per index write")
+    parser.add_argument("--reindex", action="store_true", help="Also re-index documents already in the index")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    db = SessionLocal()
+    try:
+        totals = backfill(
+            db, get_vector_store(), get_bm25_index(), org_id=args.org,
+            batch_size=args.batch_size, reindex=args.reindex, dry_run=args.dry_run
+        )
+        logger.info(
+            "Indexed %d chunks for %d documents (%d already indexed)",
+            totals["chunks"], totals["documents"], totals["skipped"]
+        )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Delete stored blobs that no creative references any more.
+
+Deleting a creative collects its blob right away when it held the last
+reference; this sweeps up the ones whose collection failed or was skipped
+(e.g. because an upload held the row at the time). Safe to run alongside
+the API: each blob is deleted under its row lock.
+
+Usage:
+    python -m app.jobs.collect_blobs [--limit N]
+"""
+import argparse
+import asyncio
+import logging
+
+from ..database import SessionLocal
+from ..services.blobs import collect_blob, unreferenced_blobs
+from ..services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+
+async def collect(limit: int) -> int:
+    db = SessionLocal()
+    storage = get_storage()
+    collected = 0
+    try:
+        for org_id, content_hash in unreferenced_blobs(db, limit):
+            try:
+                if await collect_blob(db, storage, org_id, content_hash):
+                    collected += 1
+            except Exception:
+                logger.exception("Failed to collect blob %s/%s", org_id, content_hash)
+    finally:
+        db.close()
+        storage.shutdown()
+    return collected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete unreferenced stored blobs")
+    parser.add_argument("--limit", type=int, default=1000, help="Most blobs to collect in one run")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    collected = asyncio.run(collect(args.limit))
+    logger.info("Collected %d unreferenced blobs", collected)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Document ingestion worker.
+
+Polls the ``ingestion_jobs`` table and extracts, chunks and embeds uploaded
+documents. Run as many workers as needed; jobs are claimed with
+FOR UPDATE SKIP LOCKED so each one is processed by a single worker.
+
+Usage:
+    python -m app.jobs.ingestion_worker [--once] [--poll-interval SECONDS]
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import time
+
+from ..config import settings
+from ..database import SessionLocal
+from ..services.ingestion_queue import claim_next_job, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def run_worker(worker_id: str, poll_interval: float, once: bool = False) -> int:
+    """Process jobs until stopped (or until the queue is empty with ``once``)"""
+    stopping = False
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        logger.info("Received signal %d, stopping after the current job", signum)
+        stopping = True
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    
+    processed = 0
+    while not stopping:
+        db = SessionLocal()
+        try:
+            job = claim_next_job(db, worker_id)
+            if job is not None:
+                logger.info("Claimed ingestion job %s (attempt %d)", job.id, job.attempts)
+                run_job(db, job)
+                processed += 1
+        finally:
+            db.close()
+        
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+    
+    return processed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the document ingestion worker")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+    parser.add_argument("--poll-interval", type=float, default=settings.INGEST_POLL_SECONDS)
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    processed = run_worker(args.worker_id, args.poll_interval, once=args.once)
+    logger.info("Worker %s processed %d jobs", args.worker_id, processed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Rebuild dashboard rollups from the campaigns table.
+
+Reconciles the incrementally maintained ``dashboard_rollups`` rows with the
+source of truth, and marks each org as backfilled. Run once at deploy (so
+dashboards never have to backfill lazily), after bulk imports, or if the two
+are suspected to have drifted.
+
+Usage:
+    python -m app.jobs.rebuild_rollups [org_id ...]
+"""
+import argparse
+import logging
+
+from ..database import SessionLocal
+from ..services.rollups import rebuild_org_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild dashboard rollups")
+    parser.add_argument("org_ids", nargs="*", help="Organizations to rebuild (default: all)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    db = SessionLocal()
+    try:
+        for org_id in args.org_ids or [None]:
+            rows = rebuild_org_rollups(db, org_id)
+            db.commit()
+            logger.info("Rebuilt %d rollup rows for %s", rows, org_id or "all organizations")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Move document vectors from the shared Chroma collection into per-org collections.
+
+Documents whose ``chroma_namespace`` is unset or names the shared collection
+are copied, chunk embeddings included (nothing is re-embedded), into their
+organization's collection. ``chroma_namespace`` is then updated and the source
+chunks are deleted. Safe to re-run: finished documents are skipped and copies
+are upserts.
+
+To switch a deployment over: run this, set CHROMA_PER_ORG_COLLECTIONS=true,
+then run it once more for documents ingested into the shared collection in
+between. Until then queries keep using the shared collection.
+
+Usage:
+    python -m app.jobs.repartition_vectors [--org ORG_ID] [--batch-size 1000] [--keep-source] [--dry-run]
+"""
+import argparse
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.document import Document
+from ..services.vector_store import ChromaVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def repartition(
+    db: Session,
+    store: ChromaVectorStore,
+    org_id: Optional[str] = None,
+    batch_size: int = 1000,
+    keep_source: bool = False,
+    dry_run: bool = False
+) -> Dict[str, int]:
+    """Copy each pending document's chunks to its org collection; returns counts"""
+    source = store.get_collection(store.collection_name, create=False)
+    totals = {"documents": 0, "chunks": 0}
+    if source is None:
+        logger.info("Shared collection %s does not exist, nothing to move", store.collection_name)
+        return totals
+    
+    query = db.query(Document.id, Document.organization_id).filter(
+        or_(Document.chroma_namespace.is_(None), Document.chroma_namespace == store.collection_name)
+    )
+    if org_id:
+        query = query.filter(Document.organization_id == org_id)
+    pending = query.all()
+    
+    for document_id, document_org in pending:
+        target_name = store.namespace(document_org)
+        where = {"document_id": str(document_id)}
+        moved = 0
+        
+        # Page by offset on the source; it isn't modified until the copy completes
+        while True:
+            page = source.get(
+                where=where, limit=batch_size, offset=moved,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            if not page["ids"]:
+                break
+            if not dry_run:
+                store.get_collection(target_name).upsert(
+                    ids=page["ids"],
+                    embeddings=page["embeddings"],
+                    documents=page["documents"],
+                    metadatas=page["metadatas"]
+                )
+            moved += len(page["ids"])
+        
+        logger.info("Document %s: %d chunks -> %s%s", document_id, moved, target_name, " (dry run)" if dry_run else "")
+        totals["documents"] += 1
+        totals["chunks"] += moved
+        if dry_run:
+            continue
+        
+        db.query(Document).filter(Document.id == document_id).update(
+            {Document.chroma_namespace: target_name}, synchronize_session=False
+        )
+        db.commit()
+        if not keep_source and moved:
+            source.delete(where=where)
+    
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-partition document vectors into per-org collections")
+    parser.add_argument("--org", help="Only this organization (default: all)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks per get/upsert")
+    parser.add_argument("--keep-source", action="store_true", help="Don't delete chunks from the shared collection")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    if settings.VECTOR_STORE_BACKEND != "chroma":
+        parser.error("Only the chroma backend uses a shared collection")
+    
+    store = ChromaVectorStore(settings.CHROMA_HOST, settings.CHROMA_PORT, settings.CHROMA_COLLECTION, per_org=True)
+    db = SessionLocal()
+    try:
+        totals = repartition(
+            db, store, org_id=args.org, batch_size=args.batch_size,
+            keep_source=args.keep_source, dry_run=args.dry_run
+        )
+        logger.info("Moved %d chunks for %d documents", totals["chunks"], totals["documents"])
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
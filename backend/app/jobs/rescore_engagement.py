@@ -0,0 +1,238 @@
+"""Re-score engagement predictions for every campaign in an organization.
+
+Campaigns are streamed with a server-side cursor, scored by the ML service
+in bounded concurrent batches and written back as bulk ``Prediction``
+inserts committed in chunks.
+
+Usage:
+    python -m app.jobs.rescore_engagement <org_id> [--batch-size N] [--concurrency N]
+"""
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models import Campaign, Prediction
+from ..services.ml_client import ml_client
+
+logger = logging.getLogger(__name__)
+
+# Progress of jobs started from the API, keyed by job id
+rescore_jobs: Dict[str, Dict[str, Any]] = {}
+
+CAMPAIGN_COLUMNS = (
+    Campaign.id,
+    Campaign.platform,
+    Campaign.country,
+    Campaign.product_category,
+    Campaign.spend,
+    Campaign.impressions,
+    Campaign.reach,
+)
+
+
+def campaign_payload(row) -> Dict[str, Any]:
+    """Build the ML service request body for a campaign row"""
+    return {
+        "platform": row.platform,
+        "country": row.country,
+        "product_category": row.product_category,
+        "spend": float(row.spend or 0),
+        "impressions": row.impressions or 0,
+        "reach": row.reach or 0
+    }
+
+
+def iter_campaign_batches(db: Session, org_id: str, batch_size: int) -> Iterator[List[Any]]:
+    """Stream campaign rows for an org in batches using a server-side cursor"""
+    query = (
+        db.query(*CAMPAIGN_COLUMNS)
+        .filter(Campaign.organization_id == org_id)
+        .yield_per(batch_size)
+    )
+    
+    batch = []
+    for row in query:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _update_rate(progress: Dict[str, Any]) -> None:
+    elapsed = time.monotonic() - progress["_started"]
+    progress["elapsed_seconds"] = round(elapsed, 2)
+    progress["campaigns_per_second"] = round(progress["scored"] / elapsed, 1) if elapsed > 0 else 0.0
+    if progress.get("total"):
+        done = progress["scored"] + progress["failed"]
+        progress["percent_complete"] = round(done / progress["total"] * 100, 1)
+
+
+async def rescore_organization(
+    org_id: str,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    commit_every: Optional[int] = None,
+    progress: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Re-score all campaigns of an organization and store new predictions.
+    
+    ``progress`` is updated in place as the job runs, so callers can poll it.
+    """
+    batch_size = batch_size or settings.ML_BATCH_SIZE
+    concurrency = concurrency or settings.RESCORE_CONCURRENCY
+    commit_every = commit_every or settings.RESCORE_COMMIT_EVERY
+    
+    if progress is None:
+        progress = {}
+    progress.update({
+        "org_id": str(org_id),
+        "status": "running",
+        "total": None,
+        "scored": 0,
+        "failed": 0,
+        "committed": 0,
+        "_started": time.monotonic(),
+    })
+    
+    # The read session keeps its cursor open, so writes commit on their own session
+    read_db = SessionLocal()
+    write_db = SessionLocal()
+    pending_rows: List[Dict[str, Any]] = []
+    
+    async def score(batch):
+        try:
+            predictions = await ml_client.predict_engagement_batch(
+                [campaign_payload(row) for row in batch],
+                chunk_size=batch_size
+            )
+            if len(predictions) != len(batch):
+                # Results are matched to campaigns by position, so a short or long list can't be trusted
+                raise ValueError(f"ML service returned {len(predictions)} predictions for {len(batch)} campaigns")
+            return batch, predictions, None
+        except Exception as e:
+            return batch, None, e
+    
+    def flush():
+        if not pending_rows:
+            return
+        write_db.execute(insert(Prediction), pending_rows)
+        write_db.commit()
+        progress["committed"] += len(pending_rows)
+        pending_rows.clear()
+    
+    async def collect(done):
+        for task in done:
+            batch, predictions, error = task.result()
+            if error is not None:
+                # A failed batch is counted and skipped; the rest of the job continues
+                progress["failed"] += len(batch)
+                logger.warning("Rescoring batch of %d campaigns failed: %s", len(batch), error)
+                continue
+            
+            for row, result in zip(batch, predictions):
+                pending_rows.append({
+                    "organization_id": org_id,
+                    "campaign_id": row.id,
+                    "prediction_type": "engagement",
+                    "model_version": result.get("model_version", "baseline-v1"),
+                    "predictions": result
+                })
+            progress["scored"] += len(batch)
+        
+        if len(pending_rows) >= commit_every:
+            await asyncio.to_thread(flush)
+        
+        _update_rate(progress)
+        logger.info(
+            "Rescored %d/%s campaigns for org %s (%.1f campaigns/s)",
+            progress["scored"], progress["total"], org_id, progress["campaigns_per_second"]
+        )
+    
+    try:
+        progress["total"] = read_db.query(func.count(Campaign.id)).filter(
+            Campaign.organization_id == org_id
+        ).scalar()
+        
+        batches = iter_campaign_batches(read_db, org_id, batch_size)
+        in_flight = set()
+        
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            
+            in_flight.add(asyncio.create_task(score(batch)))
+            
+            # Bound the number of concurrent ML calls
+            if len(in_flight) >= concurrency:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                await collect(done)
+        
+        if in_flight:
+            done, _ = await asyncio.wait(in_flight)
+            await collect(done)
+        
+        await asyncio.to_thread(flush)
+        progress["status"] = "completed" if not progress["failed"] else "completed_with_errors"
+    except Exception as e:
+        write_db.rollback()
+        progress["status"] = "failed"
+        progress["error"] = str(e)
+        logger.exception("Rescoring org %s failed", org_id)
+    finally:
+        _update_rate(progress)
+        read_db.close()
+        write_db.close()
+    
+    return progress
+
+
+def start_rescore_job(org_id: str) -> str:
+    """Register a new job and return its id; run it with ``rescore_organization``"""
+    job_id = str(uuid.uuid4())
+    rescore_jobs[job_id] = {"job_id": job_id, "org_id": str(org_id), "status": "queued"}
+    return job_id
+
+
+def public_progress(progress: Dict[str, Any]) -> Dict[str, Any]:
+    """Strip internal bookkeeping keys from a progress dict"""
+    return {k: v for k, v in progress.items() if not k.startswith("_")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score engagement predictions for an organization")
+    parser.add_argument("org_id")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--commit-every", type=int, default=None)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    
+    async def run():
+        try:
+            return await rescore_organization(
+                args.org_id,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                commit_every=args.commit_every
+            )
+        finally:
+            await ml_client.close()
+    
+    result = asyncio.run(run())
+    print(public_progress(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,10 @@ import uuid
 
 from .config import settings
 from .database import engine, Base
+from .services.llm_client import llm_client
+from .services.ml_client import ml_client
+from .services.storage import get_storage
+from .services.vector_store import get_async_vector_store
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -29,6 +33,15 @@ app.add_middleware(
 )
 
 
+# Lifecycle
+@app.on_event("shutdown")
+async def close_clients():
+    await ml_client.close()
+    await llm_client.close()
+    get_async_vector_store().shutdown()
+    get_storage().shutdown()
+
+
 # Request ID middleware
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
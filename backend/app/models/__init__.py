@@ -2,6 +2,7 @@ from .organization import Organization
 from .user import User
 from .campaign import Campaign
 from .creative import Creative
+from .creative_blob import CreativeBlob
 from .prediction import Prediction
 from .trust_score import TrustScore
 from .document import Document
@@ -9,12 +10,18 @@ from .attribution import AttributionTouchpoint
 from .bot_analysis import BotAnalysis
 from .bias_audit import BiasAudit
 from .model_registry import ModelRegistry
+from .dashboard_rollup import DashboardRollup
+from .org_rollup_state import OrgRollupState
+from .ingestion_job import IngestionJob
+from .stored_blob import StoredBlob
+from .creative_analysis_job import CreativeAnalysisJob
 
 __all__ = [
     "Organization",
     "User",
     "Campaign",
     "Creative",
+    "CreativeBlob",
     "Prediction",
     "TrustScore",
     "Document",
@@ -22,4 +29,9 @@ __all__ = [
     "BotAnalysis",
     "BiasAudit",
     "ModelRegistry",
+    "DashboardRollup",
+    "OrgRollupState",
+    "IngestionJob",
+    "StoredBlob",
+    "CreativeAnalysisJob",
 ]
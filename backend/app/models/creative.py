@@ -44,3 +44,4 @@ class Creative(Base):
     # Relationships
     campaign = relationship("Campaign", back_populates="creatives")
     predictions = relationship("Prediction", back_populates="creative", cascade="all, delete-orphan")
+    blob_ref = relationship("CreativeBlob", back_populates="creative", uselist=False, cascade="all, delete-orphan")
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+
+from ..database import Base
+from .ingestion_job import JobStatus
+
+
+class CreativeAnalysisJob(Base):
+    """Durable queue entry for analyzing an uploaded creative (quality, AI image detection, trust)"""
+    __tablename__ = "creative_analysis_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    creative_id = Column(UUID(as_uuid=True), ForeignKey("creatives.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # State
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=4)
+    last_error = Column(Text)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Retry backoff
+    
+    # Lease (a worker that dies mid-job leaves a stale lock that is reclaimed)
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime(timezone=True))
+    
+    # Results by analysis ("quality", "ai_image", "trust"); retries only rerun the missing ones
+    results = Column(JSONB, nullable=False, default=dict)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Workers poll by (status, run_after)
+    __table_args__ = (
+        Index('ix_creative_analysis_jobs_status_run_after', 'status', 'run_after'),
+    )
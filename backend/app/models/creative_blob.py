@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+
+from ..database import Base
+
+
+class CreativeBlob(Base):
+    """The StoredBlob behind a creative's image_url (absent for legacy uploads with their own object)"""
+    __tablename__ = "creative_blobs"
+    
+    creative_id = Column(UUID(as_uuid=True), ForeignKey("creatives.id", ondelete="CASCADE"), primary_key=True)
+    organization_id = Column(UUID(as_uuid=True), nullable=False)
+    content_hash = Column(String(64), nullable=False)
+    
+    # Relationships
+    creative = relationship("Creative", back_populates="blob_ref")
+    
+    # Creatives sharing a blob
+    __table_args__ = (
+        Index('ix_creative_blobs_org_hash', 'organization_id', 'content_hash'),
+    )
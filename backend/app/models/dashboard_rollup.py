@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey, DECIMAL, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+
+from ..database import Base
+
+
+class DashboardRollup(Base):
+    """Running per-organization, per-platform campaign totals for the dashboard"""
+    __tablename__ = "dashboard_rollups"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    platform = Column(String(50), nullable=False)
+    
+    # Totals (org-wide totals are the sum over platforms)
+    campaign_count = Column(Integer, nullable=False, default=0)
+    spend = Column(DECIMAL(16, 2), nullable=False, default=0)
+    revenue = Column(DECIMAL(16, 2), nullable=False, default=0)
+    impressions = Column(BigInteger, nullable=False, default=0)
+    clicks = Column(BigInteger, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Unique constraint
+    __table_args__ = (
+        UniqueConstraint('organization_id', 'platform', name='uq_rollup_org_platform'),
+    )
@@ -34,7 +34,7 @@ class Document(Base):
     chunk_count = Column(Integer, default=0)
     
     # Metadata
-    metadata = Column(JSONB)  # Additional metadata (author, date, etc.)
+    metadata_ = Column("metadata", JSONB)  # Additional metadata (author, date, etc.)
     
     # Vector DB
     chroma_namespace = Column(String(100))  # Unique namespace in Chroma
@@ -0,0 +1,51 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import uuid
+import enum
+
+from ..database import Base
+
+
+class JobStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class IngestionJob(Base):
+    """Durable queue entry for extracting, chunking and embedding a document"""
+    __tablename__ = "ingestion_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), nullable=False, index=True)
+    document_id = Column(UUID(as_uuid=True), ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    # Input
+    spool_path = Column(String(500), nullable=False)  # Uploaded file on the shared spool volume
+    
+    # State
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text)
+    run_after = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Retry backoff
+    
+    # Lease (a worker that dies mid-job leaves a stale lock that is reclaimed)
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime(timezone=True))
+    
+    # Results
+    chunk_count = Column(Integer)
+    embedding_cache_hits = Column(Integer)
+    embedding_cache_misses = Column(Integer)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+    
+    # Workers poll by (status, run_after)
+    __table_args__ = (
+        Index('ix_ingestion_jobs_status_run_after', 'status', 'run_after'),
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..database import Base
+
+
+class OrgRollupState(Base):
+    """Marks an organization whose dashboard_rollups hold a full backfill of its campaigns"""
+    __tablename__ = "org_rollup_state"
+
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    built_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from ..database import Base
+
+
+class StoredBlob(Base):
+    """One object in storage per distinct file per organization, shared by its creatives with the same bytes.
+    
+    Scoped to the organization so that neither the object nor the fact that
+    it exists is ever shared across tenants.
+    """
+    __tablename__ = "stored_blobs"
+    
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id", ondelete="CASCADE"), primary_key=True)
+    content_hash = Column(String(64), primary_key=True)  # sha256 hex of the bytes
+    key = Column(String(500), nullable=False)  # Object key, derived from the hash
+    content_type = Column(String(100))
+    size = Column(BigInteger)
+    
+    # Creatives referencing this blob; the object is deleted when it drops to zero
+    ref_count = Column(Integer, nullable=False, default=0)
+    
+    # ML analyses of the bytes alone ({"quality": ..., "ai_image": ...}), reused by every creative sharing them
+    analysis_results = Column(JSONB)
+    analyzed_at = Column(DateTime(timezone=True))
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
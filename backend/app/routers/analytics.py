@@ -5,6 +5,7 @@ from uuid import UUID
 from ..database import get_db
 from ..models import Campaign
 from ..services.analytics import AnalyticsService
+from ..services.cache import analytics_cache
 from .auth import oauth2_scheme
 from ..utils.security import decode_access_token
 
@@ -29,7 +30,12 @@ async def get_dashboard(
 ):
     """Get dashboard statistics"""
     
-    stats = AnalyticsService.calculate_dashboard_stats(db, current_user["org_id"])
+    stats = analytics_cache.get_or_compute(
+        current_user["org_id"],
+        "dashboard",
+        None,
+        lambda: AnalyticsService.calculate_dashboard_stats(db, current_user["org_id"])
+    )
     return stats
 
 
@@ -41,21 +47,37 @@ async def get_campaign_roi(
 ):
     """Get ROI metrics for a specific campaign"""
     
-    campaign = db.query(Campaign).filter(
-        Campaign.id == campaign_id,
-        Campaign.organization_id == current_user["org_id"]
-    ).first()
-    
-    if not campaign:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Campaign not found"
-        )
+    def compute():
+        campaign = db.query(Campaign).filter(
+            Campaign.id == campaign_id,
+            Campaign.organization_id == current_user["org_id"]
+        ).first()
+        
+        if not campaign:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Campaign not found"
+            )
+        
+        return AnalyticsService.calculate_roi_metrics(campaign)
     
-    roi_metrics = AnalyticsService.calculate_roi_metrics(campaign)
+    roi_metrics = analytics_cache.get_or_compute(
+        current_user["org_id"],
+        "campaign_roi",
+        {"campaign_id": str(campaign_id)},
+        compute
+    )
     return roi_metrics
 
 
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Hit/miss counters for the analytics response cache"""
+    return analytics_cache.stats()
+
+
 @router.post("/simulate-budget")
 async def simulate_budget(
     campaign_id: UUID,
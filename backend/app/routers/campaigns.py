@@ -6,6 +6,7 @@ from uuid import UUID
 from ..database import get_db
 from ..models import Campaign
 from ..schemas.campaign import CampaignCreate, CampaignOut
+from ..services.rollups import record_campaign_created, record_campaign_deleted
 from .auth import oauth2_scheme
 from ..utils.security import decode_access_token
 
@@ -37,6 +38,7 @@ async def create_campaign(
     )
     
     db.add(campaign)
+    record_campaign_created(db, campaign)
     db.commit()
     db.refresh(campaign)
     
@@ -100,6 +102,7 @@ async def delete_campaign(
             detail="Campaign not found"
         )
     
+    record_campaign_deleted(db, campaign)
     db.delete(campaign)
     db.commit()
     
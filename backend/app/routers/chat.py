@@ -1,19 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from uuid import UUID
 import httpx
-import os
+import json
+import logging
 from datetime import datetime
 
 from app.database import get_db
-from app.models.user import User
-from app.utils.security import get_current_user
-from app.routers.documents import query_documents
+from app.config import settings
+from app.routers.auth import oauth2_scheme
+from app.services.context_builder import get_context_builder
+from app.services.embeddings import embed_query
+from app.services.llm_cache import llm_cache
+from app.services.llm_client import llm_client
+from app.services.retrieval import get_retriever
+from app.utils.security import decode_access_token
 
-router = APIRouter(prefix="/chat", tags=["chat"])
+router = APIRouter()
+logger = logging.getLogger(__name__)
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+LLM_TEMPERATURE = 0.7
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def get_current_user_data(token: str = Depends(oauth2_scheme)):
+    """Extract user data from token"""
+    payload = decode_access_token(token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    return payload
 
 
 @router.post("/message")
@@ -21,33 +45,42 @@ async def chat_message(
     message: str,
     use_rag: bool = True,
     conversation_history: Optional[List[dict]] = None,
+    stream: bool = False,
+    use_cache: bool = True,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
-    """Send a message to the AI chatbot with optional RAG context"""
+    """Send a message to the AI chatbot with optional RAG context.
+    
+    With ``stream=true`` the answer is sent as Server-Sent Events: one
+    ``sources`` event, ``delta`` events as tokens arrive, then ``done`` (or
+    ``error``). Answers are cached (see services/llm_cache.py) unless
+    ``use_cache=false``; ``cached`` in the response says which layer hit.
+    """
     
     # Initialize conversation history
     if conversation_history is None:
         conversation_history = []
     
-    # Build context from RAG if enabled
-    context = ""
+    # Retrieve knowledge base chunks if enabled
     relevant_docs = []
+    retrieval = None
     
     if use_rag:
-        # Query documents for relevant context
-        rag_results = await query_documents(
-            query=message,
-            n_results=3,
-            current_user=current_user
-        )
-        
-        if rag_results["results"]:
-            relevant_docs = rag_results["results"]
-            context = "\n\n".join([
-                f"[Document {i+1}]: {doc['content'][:500]}..."
-                for i, doc in enumerate(relevant_docs)
-            ])
+        # Hybrid keyword + vector retrieval
+        retrieval = await get_retriever().retrieve(current_user["org_id"], message, k=settings.RETRIEVAL_TOP_K)
+        # The builder packs by relevance_score, so it must follow the reranker's order when one ran
+        relevant_docs = [
+            {
+                "content": hit["document"],
+                "metadata": hit["metadata"],
+                "relevance_score": hit.get("rerank_score", hit["score"]),
+                "retrieval_score": hit["score"],
+                "document_id": hit["metadata"].get("document_id"),
+                "chunk_index": hit["metadata"].get("chunk_index")
+            }
+            for hit in retrieval.pop("results")
+        ]
     
     # Build system prompt
     system_prompt = """You are AdVision AI Assistant, an expert in marketing analytics and campaign optimization.
@@ -55,69 +88,116 @@ You help users understand their marketing data, provide insights, and answer que
 
 Be concise, helpful, and data-driven in your responses. If you use information from documents, cite them."""
     
-    if context:
-        system_prompt += f"\n\nRelevant context from knowledge base:\n{context}"
-    
-    # Build messages for Groq
-    messages = [
-        {"role": "system", "content": system_prompt}
-    ]
+    # Pack chunks and recent history into the prompt's token budget
+    context = get_context_builder().build(system_prompt, message, relevant_docs, conversation_history)
+    messages = context["messages"]
+    relevant_docs = context["sources"]
+    prompt_usage = {"tokens": context["tokens"], "dropped": context["dropped"]}
     
-    # Add conversation history
-    for msg in conversation_history[-5:]:  # Last 5 messages for context
-        messages.append(msg)
-    
-    # Add current message
-    messages.append({"role": "user", "content": message})
-    
-    # Call Groq API
-    if not GROQ_API_KEY:
+    # Call the LLM
+    if not llm_client.configured:
         # Fallback response if no API key
         return {
             "response": "I'm AdVision AI Assistant. I can help you with marketing analytics, but I need a Groq API key to be configured. Please set GROQ_API_KEY environment variable.",
             "sources": relevant_docs,
+            "retrieval": retrieval,
+            "prompt": prompt_usage,
             "timestamp": datetime.utcnow().isoformat()
         }
     
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                GROQ_API_URL,
-                headers={
-                    "Authorization": f"Bearer {GROQ_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "llama-3.1-70b-versatile",  # Fast and capable
-                    "messages": messages,
-                    "temperature": 0.7,
-                    "max_tokens": 1000
-                },
-                timeout=30.0
-            )
-            response.raise_for_status()
-            result = response.json()
-            
-            ai_response = result["choices"][0]["message"]["content"]
-            
-            return {
-                "response": ai_response,
+    # Response cache: exact prompt first, then (opt-in) a similar question in the same context
+    cached = None
+    cache_layer = None
+    embedding = None
+    if use_cache and settings.LLM_CACHE_ENABLED:
+        cached = llm_cache.get(llm_client.model, messages, LLM_TEMPERATURE)
+        cache_layer = "exact" if cached is not None else None
+        if cached is None and llm_cache.semantic:
+            embedding = await run_in_threadpool(embed_query, message)
+            cached = llm_cache.get_similar(current_user["org_id"], messages, embedding)
+            cache_layer = "semantic" if cached is not None else None
+        if cached is None:
+            llm_cache.record_miss()
+    
+    def remember(content: str, model: str):
+        if not use_cache or not settings.LLM_CACHE_ENABLED:
+            return
+        value = {"content": content, "model": model}
+        llm_cache.set(llm_client.model, messages, LLM_TEMPERATURE, value)
+        if embedding is not None:
+            llm_cache.set_similar(current_user["org_id"], messages, embedding, value)
+    
+    if stream:
+        async def events():
+            # Sources first so the UI can render citations while the answer streams
+            yield sse_event("sources", {
                 "sources": relevant_docs,
-                "timestamp": datetime.utcnow().isoformat(),
-                "model": "llama-3.1-70b-versatile"
-            }
+                "retrieval": retrieval,
+                "prompt": prompt_usage,
+                "model": llm_client.model,
+                "cached": cache_layer
+            })
+            if cached is not None:
+                yield sse_event("delta", {"content": cached["content"]})
+            else:
+                parts = []
+                try:
+                    async for delta in llm_client.stream(messages, temperature=LLM_TEMPERATURE):
+                        parts.append(delta)
+                        yield sse_event("delta", {"content": delta})
+                except httpx.HTTPError as e:
+                    yield sse_event("error", {"detail": f"LLM API error: {str(e)}"})
+                    return
+                except Exception as e:
+                    # Headers are already sent, so report it in-band rather than cutting the stream
+                    logger.exception("Chat stream failed")
+                    yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+                    return
+                remember("".join(parts), llm_client.model)
+            yield sse_event("done", {"timestamp": datetime.utcnow().isoformat()})
+        
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    try:
+        if cached is not None:
+            completion = cached
+        else:
+            completion = await llm_client.complete(messages, temperature=LLM_TEMPERATURE)
+            remember(completion["content"], completion["model"])
+        
+        return {
+            "response": completion["content"],
+            "sources": relevant_docs,
+            "retrieval": retrieval,
+            "prompt": prompt_usage,
+            "timestamp": datetime.utcnow().isoformat(),
+            "model": completion["model"],
+            "cached": cache_layer
+        }
     
     except httpx.HTTPError as e:
-        raise HTTPException(status_code=500, detail=f"Groq API error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"LLM API error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
 
 
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Hit/miss counters for the chat response cache"""
+    return llm_cache.stats()
+
+
 @router.post("/quick-insights")
 async def quick_insights(
-    campaign_id: Optional[int] = None,
+    campaign_id: Optional[UUID] = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
     """Get quick AI insights about campaigns"""
     
@@ -127,7 +207,7 @@ async def quick_insights(
     if campaign_id:
         campaign = db.query(Campaign).filter(
             Campaign.id == campaign_id,
-            Campaign.organization_id == current_user.organization_id
+            Campaign.organization_id == current_user["org_id"]
         ).first()
         
         if not campaign:
@@ -137,7 +217,6 @@ async def quick_insights(
         
 Campaign: {campaign.name}
 Platform: {campaign.platform}
-Budget: ₹{campaign.budget}
 Spend: ₹{campaign.spend}
 Revenue: ₹{campaign.revenue}
 Impressions: {campaign.impressions}
@@ -149,11 +228,11 @@ Provide 3 actionable insights in bullet points."""
     else:
         # Get all campaigns
         campaigns = db.query(Campaign).filter(
-            Campaign.organization_id == current_user.organization_id
+            Campaign.organization_id == current_user["org_id"]
         ).all()
         
-        total_spend = sum(c.spend for c in campaigns)
-        total_revenue = sum(c.revenue for c in campaigns)
+        total_spend = sum(c.spend or 0 for c in campaigns)
+        total_revenue = sum(c.revenue or 0 for c in campaigns)
         avg_roi = ((total_revenue - total_spend) / total_spend * 100) if total_spend > 0 else 0
         
         prompt = f"""Analyze this marketing portfolio and provide 3 quick insights:
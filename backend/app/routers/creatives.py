@@ -1,12 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
+from datetime import datetime
+import base64
 
+from ..config import settings
 from ..database import get_db
-from ..models import Creative
-from ..services.storage import upload_file, delete_file
-from ..services.ml_client import ml_client
+from ..models import Creative, CreativeBlob, Prediction, StoredBlob
+from ..models.ingestion_job import JobStatus
+from ..services.creative_analysis import enqueue_analysis, latest_job
+from ..services.blobs import (
+    SHA256_RE, acquire_blob, collect_blob, content_key, get_blob, hash_fileobj, hash_from_key, release_blob
+)
+from ..services.storage import get_storage, delete_file
 from .auth import oauth2_scheme
 from ..utils.security import decode_access_token
 
@@ -24,83 +32,181 @@ def get_current_user_data(token: str = Depends(oauth2_scheme)):
     return payload
 
 
-@router.post("/upload", status_code=status.HTTP_201_CREATED)
-async def upload_creative(
-    campaign_id: UUID,
-    file: UploadFile = File(...),
-    ad_text: str = None,
-    db: Session = Depends(get_db),
-    current_user: dict = Depends(get_current_user_data)
-):
-    """Upload a creative (image) for a campaign"""
-    
-    # Validate file type
-    allowed_types = ["image/jpeg", "image/png", "image/gif"]
-    if file.content_type not in allowed_types:
+ALLOWED_CONTENT_TYPES = ["image/jpeg", "image/png", "image/gif"]
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 10MB
+
+
+def validate_image(content_type: str, file_size: int):
+    if content_type not in ALLOWED_CONTENT_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"File type {file.content_type} not allowed. Use JPEG, PNG, or GIF."
+            detail=f"File type {content_type} not allowed. Use JPEG, PNG, or GIF."
         )
-    
-    # Validate file size (10MB max)
-    file.file.seek(0, 2)  # Seek to end
-    file_size = file.file.tell()
-    file.file.seek(0)  # Reset to start
-    
-    if file_size > 10 * 1024 * 1024:  # 10MB
+    if file_size > MAX_UPLOAD_BYTES:
         raise HTTPException(
             status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
             detail="File size exceeds 10MB limit"
         )
-    
-    # Upload to R2
-    try:
-        image_url = await upload_file(file.file, file.filename, file.content_type)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to upload file: {str(e)}"
-        )
-    
-    # Create creative record
+
+
+def create_creative(db: Session, current_user: dict, campaign_id: UUID, ad_text: str, blob: StoredBlob):
+    """Save the creative record (committing its blob reference) and queue its analysis"""
+    image_url = get_storage().public_url(blob.key)
     creative = Creative(
         organization_id=current_user["org_id"],
         campaign_id=campaign_id,
         ad_text=ad_text,
         image_url=image_url,
+        blob_ref=CreativeBlob(organization_id=current_user["org_id"], content_hash=blob.content_hash),
         creative_type="image",
         format="square"  # Default, can be detected
     )
     
     db.add(creative)
+    db.flush()
+    
+    # Analyzed by app.jobs.analysis_worker; poll GET /creatives/{id}/analysis
+    job = enqueue_analysis(db, creative)
     db.commit()
     db.refresh(creative)
     
-    # Analyze creative quality (async, don't wait)
-    try:
-        quality_result = await ml_client.analyze_creative_quality(image_url)
-        # Store quality prediction
-        from ..models import Prediction
-        prediction = Prediction(
-            organization_id=current_user["org_id"],
-            campaign_id=campaign_id,
-            creative_id=creative.id,
-            prediction_type="quality",
-            model_version="vit-v1",
-            predictions=quality_result
-        )
-        db.add(prediction)
-        db.commit()
-    except Exception:
-        pass  # Don't fail if ML service is down
-    
     return {
         "id": str(creative.id),
         "image_url": image_url,
+        "content_hash": blob.content_hash,
+        "analysis": {"job_id": str(job.id), "status": job.status.value},
         "message": "Creative uploaded successfully"
     }
 
 
+@router.post("/upload", status_code=status.HTTP_201_CREATED)
+async def upload_creative(
+    campaign_id: UUID,
+    file: UploadFile = File(...),
+    ad_text: str = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Upload a creative (image) for a campaign through the API.
+    
+    Prefer /upload-url + /confirm-upload, which keep image bytes out of the
+    API process.
+    """
+    
+    # The multipart parser already counted the bytes it spooled
+    file_size = file.size
+    if file_size is None:
+        file.file.seek(0, 2)
+        file_size = file.file.tell()
+        file.file.seek(0)
+    validate_image(file.content_type, file_size)
+    
+    # Content-addressed key: the org's identical bytes are stored once
+    org_id = current_user["org_id"]
+    content_hash = await run_in_threadpool(hash_fileobj, file.file)
+    key = content_key(org_id, content_hash, file.content_type)
+    storage = get_storage()
+    
+    # Reference the blob before checking the object: once the row is held,
+    # collect_blob can't delete the object out from under this creative
+    blob, _ = acquire_blob(db, org_id, content_hash, key, file.content_type, file_size)
+    
+    # Upload to R2 (in parts, off the event loop) unless the object already exists
+    try:
+        if await storage.head(key) is None:
+            await storage.upload(file.file, key, file.content_type)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload file: {str(e)}"
+        )
+    
+    return create_creative(db, current_user, campaign_id, ad_text, blob)
+
+
+@router.post("/upload-url")
+async def create_upload_url(
+    campaign_id: UUID,
+    content_type: str,
+    file_size: int,
+    sha256: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Presigned URL for uploading a creative straight to storage.
+    
+    ``sha256`` is the hex digest of the file. If the organization already
+    stores those bytes, ``exists`` is true and there is nothing to upload; otherwise PUT
+    the file to ``upload_url`` with the returned headers (storage rejects
+    bytes that don't match the digest). Then call /confirm-upload with the
+    ``key``.
+    """
+    validate_image(content_type, file_size)
+    sha256 = sha256.lower()
+    if not SHA256_RE.match(sha256):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="sha256 must be a hex digest")
+    
+    org_id = current_user["org_id"]
+    key = content_key(org_id, sha256, content_type)
+    blob = get_blob(db, org_id, sha256)
+    if blob is not None and blob.ref_count > 0:  # Unreferenced blobs may be collected before confirm-upload
+        return {"exists": True, "upload_url": None, "key": key, "campaign_id": str(campaign_id)}
+    
+    storage = get_storage()
+    checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+    return {
+        "exists": False,
+        "upload_url": storage.presigned_put_url(
+            key, content_type, expires_in=settings.STORAGE_PRESIGN_EXPIRES_SECONDS, checksum_sha256=checksum
+        ),
+        "method": "PUT",
+        "headers": {"Content-Type": content_type, "x-amz-checksum-sha256": checksum},
+        "key": key,
+        "campaign_id": str(campaign_id),
+        "expires_in": settings.STORAGE_PRESIGN_EXPIRES_SECONDS
+    }
+
+
+@router.post("/confirm-upload", status_code=status.HTTP_201_CREATED)
+async def confirm_upload(
+    campaign_id: UUID,
+    key: str,
+    ad_text: str = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Register a creative uploaded through a presigned URL (or already stored)"""
+    
+    # Keys are issued under the org's prefix; never adopt another org's object
+    org_id = current_user["org_id"]
+    if not key.startswith(f"{org_id}/"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Upload key does not belong to this organization")
+    content_hash = hash_from_key(key, org_id)
+    if content_hash is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Not an upload key")
+    
+    storage = get_storage()
+    stored = await storage.head(key)
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found; PUT the file first")
+    
+    # The presigned URL can't enforce these, so check what actually arrived
+    try:
+        validate_image(stored["content_type"], stored["size"])
+    except HTTPException:
+        if get_blob(db, org_id, content_hash) is None:
+            await storage.delete(key)
+        raise
+    
+    blob, created = acquire_blob(db, org_id, content_hash, key, stored["content_type"], stored["size"])
+    if created and await storage.head(key) is None:
+        # Collected between the HEAD above and acquiring the row
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found; PUT the file first")
+    return create_creative(db, current_user, campaign_id, ad_text, blob)
+
+
 @router.get("/campaign/{campaign_id}")
 async def list_campaign_creatives(
     campaign_id: UUID,
@@ -127,6 +233,47 @@ async def list_campaign_creatives(
     ]
 
 
+@router.get("/{creative_id}/analysis")
+async def get_creative_analysis(
+    creative_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Status of a creative's background analysis and the predictions it produced"""
+    
+    creative = db.query(Creative).filter(
+        Creative.id == creative_id,
+        Creative.organization_id == current_user["org_id"]
+    ).first()
+    
+    if not creative:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Creative not found"
+        )
+    
+    job = latest_job(db, creative.id)
+    predictions = db.query(Prediction).filter(Prediction.creative_id == creative.id).all()
+    
+    return {
+        "creative_id": str(creative.id),
+        "status": job.status.value if job else None,
+        "attempts": job.attempts if job else 0,
+        "max_attempts": job.max_attempts if job else 0,
+        "last_error": job.last_error if job else None,
+        "next_attempt_at": job.run_after.isoformat() if job and job.status == JobStatus.QUEUED else None,
+        "finished_at": job.finished_at.isoformat() if job and job.finished_at else None,
+        "predictions": {
+            p.prediction_type: {
+                "model_version": p.model_version,
+                "result": p.predictions,
+                "created_at": p.created_at.isoformat() if p.created_at else None
+            }
+            for p in sorted(predictions, key=lambda p: p.created_at or datetime.min)
+        }
+    }
+
+
 @router.delete("/{creative_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_creative(
     creative_id: UUID,
@@ -146,11 +293,25 @@ async def delete_creative(
             detail="Creative not found"
         )
     
-    # Delete from R2
-    if creative.image_url:
-        await delete_file(creative.image_url)
+    if creative.blob_ref is None:
+        # Legacy upload with its own object
+        if creative.image_url:
+            await delete_file(creative.image_url)
+        db.delete(creative)
+        db.commit()
+        return None
     
+    # Shared blob: only delete the object once no creative references it
+    org_id = creative.organization_id
+    content_hash = creative.blob_ref.content_hash
+    unreferenced = release_blob(db, org_id, content_hash)
     db.delete(creative)
     db.commit()
     
+    if unreferenced:
+        try:
+            await collect_blob(db, get_storage(), org_id, content_hash)
+        except Exception:
+            pass  # Left at zero references for app.jobs.collect_blobs
+    
     return None
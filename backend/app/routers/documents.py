@@ -1,79 +1,88 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List
-import chromadb
-from chromadb.config import Settings
-import os
-from datetime import datetime
+from uuid import UUID
 
-from app.database import get_db
-from app.models.document import Document
-from app.models.user import User
-from app.utils.security import get_current_user
-from app.schemas.document import DocumentCreate, DocumentResponse
+from ..database import get_db
+from ..models.document import Document
+from ..models.ingestion_job import IngestionJob
+from ..schemas.document import DocumentResponse, IngestionJobResponse
+from ..services.ingestion import detect_document_type, delete_document_chunks
+from ..services.ingestion_queue import spool_upload, remove_spool_file, enqueue_ingestion
+from ..services.vector_store import get_async_vector_store
+from .auth import oauth2_scheme
+from ..utils.security import decode_access_token
 
-router = APIRouter(prefix="/documents", tags=["documents"])
+router = APIRouter()
 
-# Initialize Chroma client
-CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
-CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8002"))
 
-chroma_client = chromadb.HttpClient(
-    host=CHROMA_HOST,
-    port=CHROMA_PORT,
-    settings=Settings(anonymized_telemetry=False)
-)
+def get_current_user_data(token: str = Depends(oauth2_scheme)):
+    """Extract user data from token"""
+    payload = decode_access_token(token)
+    if not payload:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials"
+        )
+    return payload
 
-# Get or create collection
-collection = chroma_client.get_or_create_collection(
-    name="advision_documents",
-    metadata={"description": "Marketing documents and knowledge base"}
-)
 
-
-@router.post("/upload", response_model=DocumentResponse)
+@router.post("/upload", response_model=IngestionJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
-    """Upload a document for RAG pipeline"""
+    """Upload a document for RAG pipeline; indexing runs in the ingestion worker"""
     
     # Validate file type
-    allowed_types = ["text/plain", "application/pdf", "text/markdown"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type. Allowed: txt, pdf, md")
+    try:
+        document_type = detect_document_type(file.filename, file.content_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Read file content
-    content = await file.read()
-    text_content = content.decode("utf-8") if file.content_type == "text/plain" else str(content)
+    # Copy the upload to the shared spool directory for the worker
+    spool_path, file_size = await run_in_threadpool(spool_upload, file.file)
     
-    # Create document in database
+    # Create document and its queued job in one transaction
     document = Document(
-        organization_id=current_user.organization_id,
-        title=file.filename,
-        content=text_content,
-        document_type="knowledge_base",
-        source_url=None,
-        metadata_={"uploaded_by": current_user.email}
+        organization_id=current_user["org_id"],
+        name=file.filename,
+        document_type=document_type,
+        file_size=file_size,
+        metadata_={"uploaded_by": current_user["user_id"], "content_type": file.content_type}
     )
-    db.add(document)
-    db.commit()
-    db.refresh(document)
+    try:
+        db.add(document)
+        db.flush()
+        job = enqueue_ingestion(db, document, spool_path)
+        db.commit()
+    except Exception:
+        db.rollback()
+        remove_spool_file(spool_path)
+        raise
+    db.refresh(job)
     
-    # Add to Chroma vector DB
-    collection.add(
-        documents=[text_content],
-        metadatas=[{
-            "document_id": str(document.id),
-            "organization_id": str(current_user.organization_id),
-            "title": file.filename,
-            "uploaded_at": datetime.utcnow().isoformat()
-        }],
-        ids=[f"doc_{document.id}"]
-    )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+def get_ingestion_job(
+    job_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Get the status of a document ingestion job"""
+    job = db.query(IngestionJob).filter(
+        IngestionJob.id == job_id,
+        IngestionJob.organization_id == current_user["org_id"]
+    ).first()
     
-    return document
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return job
 
 
 @router.get("/", response_model=List[DocumentResponse])
@@ -81,35 +90,39 @@ def list_documents(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
     """List all documents for the organization"""
     documents = db.query(Document).filter(
-        Document.organization_id == current_user.organization_id
+        Document.organization_id == current_user["org_id"]
     ).offset(skip).limit(limit).all()
     return documents
 
 
 @router.delete("/{document_id}")
 def delete_document(
-    document_id: int,
+    document_id: UUID,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
     """Delete a document"""
     document = db.query(Document).filter(
         Document.id == document_id,
-        Document.organization_id == current_user.organization_id
+        Document.organization_id == current_user["org_id"]
     ).first()
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete from Chroma
+    # Jobs cascade with the document; drop uploads they will never process
+    for job in db.query(IngestionJob).filter(IngestionJob.document_id == document.id):
+        remove_spool_file(job.spool_path)
+    
+    # Delete all of its chunks from the vector store
     try:
-        collection.delete(ids=[f"doc_{document_id}"])
+        delete_document_chunks(document)
     except Exception as e:
-        print(f"Error deleting from Chroma: {e}")
+        print(f"Error deleting from vector store: {e}")
     
     # Delete from database
     db.delete(document)
@@ -122,30 +135,24 @@ def delete_document(
 async def query_documents(
     query: str,
     n_results: int = 5,
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user_data)
 ):
     """Query documents using RAG (Retrieval-Augmented Generation)"""
     
-    # Search in Chroma
-    results = collection.query(
-        query_texts=[query],
-        n_results=n_results,
-        where={"organization_id": str(current_user.organization_id)}
-    )
+    # Embed the query and search the organization's chunks
+    hits = await get_async_vector_store().query_text(current_user["org_id"], query, n_results)
     
     # Format results
     documents = []
-    if results["documents"] and len(results["documents"]) > 0:
-        for i, doc in enumerate(results["documents"][0]):
-            metadata = results["metadatas"][0][i] if results["metadatas"] else {}
-            distance = results["distances"][0][i] if results["distances"] else 0
-            
-            documents.append({
-                "content": doc,
-                "metadata": metadata,
-                "relevance_score": 1 - distance,  # Convert distance to similarity
-                "document_id": metadata.get("document_id")
-            })
+    for hit in hits:
+        metadata = hit["metadata"] or {}
+        documents.append({
+            "content": hit["document"],
+            "metadata": metadata,
+            "relevance_score": 1 - hit["distance"],  # Convert distance to similarity
+            "document_id": metadata.get("document_id"),
+            "chunk_index": metadata.get("chunk_index")
+        })
     
     return {
         "query": query,
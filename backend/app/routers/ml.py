@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import Optional
@@ -6,6 +6,12 @@ from typing import Optional
 from ..database import get_db
 from ..models import Campaign, Creative, Prediction, TrustScore
 from ..services.ml_client import ml_client
+from ..jobs.rescore_engagement import (
+    rescore_jobs,
+    rescore_organization,
+    start_rescore_job,
+    public_progress,
+)
 from .auth import oauth2_scheme
 from ..utils.security import decode_access_token
 
@@ -75,6 +81,48 @@ async def predict_engagement(
         )
 
 
+@router.get("/client-stats")
+async def get_ml_client_stats(
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Latency histograms, retries and circuit breaker state of the ML client"""
+    return ml_client.stats()
+
+
+@router.post("/rescore-engagement", status_code=status.HTTP_202_ACCEPTED)
+async def rescore_engagement(
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Re-score engagement for every campaign in the organization"""
+    
+    job_id = start_rescore_job(current_user["org_id"])
+    background_tasks.add_task(
+        rescore_organization,
+        current_user["org_id"],
+        progress=rescore_jobs[job_id]
+    )
+    
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/rescore-engagement/{job_id}")
+async def get_rescore_progress(
+    job_id: str,
+    current_user: dict = Depends(get_current_user_data)
+):
+    """Get progress and throughput of a rescoring job"""
+    
+    progress = rescore_jobs.get(job_id)
+    if not progress or progress["org_id"] != str(current_user["org_id"]):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Rescoring job not found"
+        )
+    
+    return public_progress(progress)
+
+
 @router.post("/trust-score/{campaign_id}")
 async def calculate_trust_score(
     campaign_id: UUID,
@@ -1,26 +1,37 @@
 from pydantic import BaseModel
+from uuid import UUID
 from datetime import datetime
 from typing import Optional, Dict, Any
 
 
-class DocumentCreate(BaseModel):
-    title: str
-    content: str
-    document_type: str = "knowledge_base"
-    source_url: Optional[str] = None
+class DocumentResponse(BaseModel):
+    id: UUID
+    organization_id: UUID
+    name: str
+    document_type: str
+    file_size: Optional[int] = None
+    is_processed: bool
+    chunk_count: int
     metadata_: Optional[Dict[str, Any]] = None
+    uploaded_at: datetime
+    processed_at: Optional[datetime] = None
 
+    class Config:
+        from_attributes = True
 
-class DocumentResponse(BaseModel):
-    id: int
-    organization_id: int
-    title: str
-    content: str
-    document_type: str
-    source_url: Optional[str]
-    metadata_: Optional[Dict[str, Any]]
+
+class IngestionJobResponse(BaseModel):
+    id: UUID
+    document_id: UUID
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    chunk_count: Optional[int] = None
+    embedding_cache_hits: Optional[int] = None
+    embedding_cache_misses: Optional[int] = None
     created_at: datetime
-    updated_at: datetime
+    finished_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
@@ -2,19 +2,38 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import Dict, Any, List
 from decimal import Decimal
-from ..models import Campaign, Prediction, TrustScore
+from ..models import Campaign, Prediction, TrustScore, DashboardRollup
+from .rollups import ensure_org_rollups
 
 
 class AnalyticsService:
     """Service for analytics calculations"""
     
     @staticmethod
-    def calculate_dashboard_stats(db: Session, org_id: str) -> Dict[str, Any]:
-        """Calculate dashboard statistics"""
-        
-        campaigns = db.query(Campaign).filter(Campaign.organization_id == org_id).all()
+    def calculate_dashboard_stats(db: Session, org_id: str, top_n: int = 5) -> Dict[str, Any]:
+        """Calculate dashboard statistics.
+        
+        Totals and the platform breakdown are read from the per-platform
+        rollup rows (see services/rollups.py); rankings are computed by
+        aggregate queries, so no Campaign objects are loaded into the process.
+        """
+        
+        ensure_org_rollups(db, org_id)
+        
+        # Platform breakdown (one rollup row per platform)
+        platform_rows = db.query(
+            DashboardRollup.platform,
+            DashboardRollup.campaign_count.label("count"),
+            DashboardRollup.spend,
+            DashboardRollup.revenue,
+            DashboardRollup.impressions,
+            DashboardRollup.clicks,
+        ).filter(
+            DashboardRollup.organization_id == org_id,
+            DashboardRollup.campaign_count > 0
+        ).all()
         
-        if not campaigns:
+        if not platform_rows:
             return {
                 "total_campaigns": 0,
                 "total_spend": 0.0,
@@ -26,73 +45,85 @@ class AnalyticsService:
                 "top_campaigns": []
             }
         
-        # Calculate totals
-        total_spend = sum(float(c.spend or 0) for c in campaigns)
-        total_revenue = sum(float(c.revenue or 0) for c in campaigns)
-        total_impressions = sum(c.impressions or 0 for c in campaigns)
-        total_clicks = sum(c.clicks or 0 for c in campaigns)
+        platform_breakdown = {
+            row.platform: AnalyticsService._platform_stats(row)
+            for row in platform_rows
+        }
+        
+        # Org totals are the sum of the (few) platform groups
+        total_campaigns = sum(data["count"] for data in platform_breakdown.values())
+        total_spend = sum(data["spend"] for data in platform_breakdown.values())
+        total_revenue = sum(data["revenue"] for data in platform_breakdown.values())
+        total_impressions = sum(data["impressions"] for data in platform_breakdown.values())
+        total_clicks = sum(data["clicks"] for data in platform_breakdown.values())
         
         # Calculate averages
         avg_ctr = (total_clicks / total_impressions * 100) if total_impressions > 0 else 0
         avg_roi = ((total_revenue - total_spend) / total_spend * 100) if total_spend > 0 else 0
         
-        # Platform breakdown
-        platform_breakdown = {}
-        for campaign in campaigns:
-            platform = campaign.platform
-            if platform not in platform_breakdown:
-                platform_breakdown[platform] = {
-                    "count": 0,
-                    "spend": 0.0,
-                    "revenue": 0.0,
-                    "impressions": 0,
-                    "clicks": 0
-                }
-            
-            platform_breakdown[platform]["count"] += 1
-            platform_breakdown[platform]["spend"] += float(campaign.spend or 0)
-            platform_breakdown[platform]["revenue"] += float(campaign.revenue or 0)
-            platform_breakdown[platform]["impressions"] += campaign.impressions or 0
-            platform_breakdown[platform]["clicks"] += campaign.clicks or 0
-        
-        # Calculate platform CTR and ROI
-        for platform, data in platform_breakdown.items():
-            data["ctr"] = (data["clicks"] / data["impressions"] * 100) if data["impressions"] > 0 else 0
-            data["roi"] = ((data["revenue"] - data["spend"]) / data["spend"] * 100) if data["spend"] > 0 else 0
-        
-        # Get trust scores
-        trust_scores = db.query(TrustScore).join(Campaign).filter(
-            Campaign.organization_id == org_id
-        ).all()
-        
-        avg_trust_score = sum(float(ts.trust_score) for ts in trust_scores) / len(trust_scores) if trust_scores else 0
-        
-        # Top campaigns by ROI
-        campaigns_with_roi = [
-            {
-                "id": str(c.id),
-                "name": c.name,
-                "platform": c.platform,
-                "roi": ((float(c.revenue or 0) - float(c.spend or 0)) / float(c.spend or 1)) * 100,
-                "spend": float(c.spend or 0),
-                "revenue": float(c.revenue or 0)
-            }
-            for c in campaigns if c.spend and c.revenue
-        ]
-        campaigns_with_roi.sort(key=lambda x: x["roi"], reverse=True)
-        top_campaigns = campaigns_with_roi[:5]
-        
         return {
-            "total_campaigns": len(campaigns),
+            "total_campaigns": total_campaigns,
             "total_spend": round(total_spend, 2),
             "total_revenue": round(total_revenue, 2),
             "avg_ctr": round(avg_ctr, 2),
             "avg_roi": round(avg_roi, 2),
-            "avg_trust_score": round(avg_trust_score, 2),
+            "avg_trust_score": round(AnalyticsService.average_trust_score(db, org_id), 2),
             "platform_breakdown": platform_breakdown,
-            "top_campaigns": top_campaigns
+            "top_campaigns": AnalyticsService.top_campaigns_by_roi(db, org_id, top_n)
         }
     
+    @staticmethod
+    def _platform_stats(row) -> Dict[str, Any]:
+        """Turn an aggregate row into a platform breakdown entry"""
+        data = {
+            "count": int(row.count),
+            "spend": float(row.spend),
+            "revenue": float(row.revenue),
+            "impressions": int(row.impressions),
+            "clicks": int(row.clicks)
+        }
+        data["ctr"] = (data["clicks"] / data["impressions"] * 100) if data["impressions"] > 0 else 0
+        data["roi"] = ((data["revenue"] - data["spend"]) / data["spend"] * 100) if data["spend"] > 0 else 0
+        return data
+    
+    @staticmethod
+    def average_trust_score(db: Session, org_id: str) -> float:
+        """Average trust score across the organization's campaigns"""
+        avg = db.query(func.avg(TrustScore.trust_score)).join(Campaign).filter(
+            Campaign.organization_id == org_id
+        ).scalar()
+        return float(avg or 0)
+    
+    @staticmethod
+    def top_campaigns_by_roi(db: Session, org_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Top campaigns by ROI, ranked and limited in the database"""
+        roi = ((Campaign.revenue - Campaign.spend) / Campaign.spend * 100).label("roi")
+        
+        rows = db.query(
+            Campaign.id,
+            Campaign.name,
+            Campaign.platform,
+            Campaign.spend,
+            Campaign.revenue,
+            roi,
+        ).filter(
+            Campaign.organization_id == org_id,
+            Campaign.spend != 0,
+            Campaign.revenue != 0,
+        ).order_by(roi.desc()).limit(limit).all()
+        
+        return [
+            {
+                "id": str(row.id),
+                "name": row.name,
+                "platform": row.platform,
+                "roi": float(row.roi),
+                "spend": float(row.spend),
+                "revenue": float(row.revenue)
+            }
+            for row in rows
+        ]
+    
     @staticmethod
     def calculate_roi_metrics(campaign: Campaign) -> Dict[str, Any]:
         """Calculate ROI metrics for a campaign"""
@@ -0,0 +1,144 @@
+"""
+Content-addressed creative storage.
+
+Objects are keyed by the organization and the sha256 of their bytes, so an
+org's identical uploads share one object (and one ML analysis). Nothing is
+shared across organizations: keys live under the org's prefix, and lookups
+never reveal whether another org stores the same bytes. StoredBlob rows
+reference-count the objects: each creative holds a reference. Releasing
+the last one leaves the row at zero; the object is deleted later by
+``collect_blob``, under the row's lock, so an upload that acquires the
+row either keeps the object alive or finds it gone and uploads it again.
+"""
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from typing import Any, BinaryIO, List, Optional, Tuple
+import hashlib
+import re
+
+from ..models.stored_blob import StoredBlob
+
+HASH_BLOCK_SIZE = 1024 * 1024
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+}
+
+
+def hash_fileobj(fileobj: BinaryIO) -> str:
+    """sha256 hex of ``fileobj``, read in blocks; leaves it rewound"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+def content_key(org_id, content_hash: str, content_type: str) -> str:
+    # Two-character fan-out keeps listings of any one prefix small
+    return f"{org_id}/blobs/{content_hash[:2]}/{content_hash}.{EXTENSIONS.get(content_type, 'bin')}"
+
+
+def hash_from_key(key: str, org_id) -> Optional[str]:
+    """Content hash of one of ``org_id``'s blob keys; None for any other key"""
+    content_hash = key.rsplit("/", 1)[-1].split(".", 1)[0]
+    if key.startswith(f"{org_id}/blobs/") and SHA256_RE.match(content_hash):
+        return content_hash
+    return None
+
+
+def get_blob(db: Session, org_id, content_hash: str) -> Optional[StoredBlob]:
+    return db.query(StoredBlob).filter(
+        StoredBlob.organization_id == org_id,
+        StoredBlob.content_hash == content_hash
+    ).first()
+
+
+def acquire_blob(
+    db: Session,
+    org_id,
+    content_hash: str,
+    key: str,
+    content_type: str,
+    size: int
+) -> Tuple[StoredBlob, bool]:
+    """Add a reference to the org's blob, creating its row if needed.
+    
+    Returns (blob, created). The caller commits, together with the creative
+    holding the reference.
+    """
+    # Atomic increment, so concurrent uploads of the same bytes don't lose references
+    updated = db.execute(
+        update(StoredBlob)
+        .where(StoredBlob.organization_id == org_id, StoredBlob.content_hash == content_hash)
+        .values(ref_count=StoredBlob.ref_count + 1)
+    ).rowcount
+    if updated:
+        return get_blob(db, org_id, content_hash), False
+    
+    blob = StoredBlob(
+        organization_id=org_id,
+        content_hash=content_hash,
+        key=key,
+        content_type=content_type,
+        size=size,
+        ref_count=1
+    )
+    try:
+        with db.begin_nested():
+            db.add(blob)
+    except IntegrityError:
+        # Another upload created it first
+        return acquire_blob(db, org_id, content_hash, key, content_type, size)
+    return blob, True
+
+
+def release_blob(db: Session, org_id, content_hash: str) -> bool:
+    """Drop a reference (caller commits); True if the blob is now unreferenced and can be collected"""
+    updated = db.execute(
+        update(StoredBlob)
+        .where(StoredBlob.organization_id == org_id, StoredBlob.content_hash == content_hash)
+        .values(ref_count=StoredBlob.ref_count - 1)
+        .returning(StoredBlob.ref_count)
+    ).scalar_one_or_none()
+    return updated is not None and updated <= 0
+
+
+async def collect_blob(db: Session, storage, org_id, content_hash: str) -> bool:
+    """Delete an unreferenced blob's object and row; False if it was re-acquired meanwhile.
+    
+    The row stays locked until the object is gone, so a concurrent
+    acquire_blob waits and then creates a fresh row, which makes its caller
+    check for (and re-upload) the object.
+    """
+    blob = db.query(StoredBlob).filter(
+        StoredBlob.organization_id == org_id,
+        StoredBlob.content_hash == content_hash,
+        StoredBlob.ref_count <= 0
+    ).with_for_update(skip_locked=True).first()
+    if blob is None:
+        db.rollback()
+        return False
+    try:
+        await storage.delete(blob.key)
+        db.delete(blob)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return True
+
+
+def unreferenced_blobs(db: Session, limit: int = 100) -> List[Tuple[Any, str]]:
+    """(org, hash) of blobs left at zero references, e.g. when a delete's collection failed"""
+    return [
+        (row.organization_id, row.content_hash)
+        for row in db.query(StoredBlob.organization_id, StoredBlob.content_hash)
+        .filter(StoredBlob.ref_count <= 0)
+        .limit(limit)
+    ]
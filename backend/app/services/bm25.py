@@ -0,0 +1,195 @@
+"""
+Incremental BM25 keyword index over document chunks.
+
+Kept in SQLite next to the vector store and updated by the ingestion
+pipeline as chunks are written or deleted, so keyword search never has to
+rescan the corpus. Scores are partitioned by organization: term statistics
+(document frequency, average length) only count that organization's chunks.
+Documents ingested before the index existed are added by app.jobs.backfill_bm25.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+from collections import Counter
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+
+from ..config import settings
+
+# Keeps SKUs, versions and hyphenated campaign names ("SKU-1042", "q3-promo", "v2.1") whole
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[\-_.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """SQLite-backed inverted index with Okapi BM25 scoring"""
+    
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode; writes take an explicit BEGIN IMMEDIATE so processes serialize
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "  org_id TEXT NOT NULL, chunk_id TEXT NOT NULL, document_id TEXT, length INTEGER NOT NULL,"
+            "  document TEXT, metadata TEXT, PRIMARY KEY (org_id, chunk_id));"
+            "CREATE INDEX IF NOT EXISTS ix_chunks_document ON chunks (org_id, document_id);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            "  org_id TEXT NOT NULL, term TEXT NOT NULL, chunk_id TEXT NOT NULL, tf INTEGER NOT NULL,"
+            "  PRIMARY KEY (org_id, term, chunk_id)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS ix_postings_chunk ON postings (org_id, chunk_id);"
+            "CREATE TABLE IF NOT EXISTS corpus ("
+            "  org_id TEXT PRIMARY KEY, chunk_count INTEGER NOT NULL, total_length INTEGER NOT NULL);"
+        )
+    
+    def add_chunks(
+        self,
+        org_id: str,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]]
+    ) -> None:
+        """Index chunks, replacing any already indexed under the same ids"""
+        org_id = str(org_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._remove(org_id, list(ids))
+                total_length = 0
+                for chunk_id, document, metadata in zip(ids, documents, metadatas):
+                    terms = Counter(tokenize(document))
+                    length = sum(terms.values())
+                    total_length += length
+                    self._conn.execute(
+                        "INSERT INTO chunks (org_id, chunk_id, document_id, length, document, metadata) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (org_id, chunk_id, metadata.get("document_id"), length, document, json.dumps(metadata))
+                    )
+                    self._conn.executemany(
+                        "INSERT INTO postings (org_id, term, chunk_id, tf) VALUES (?, ?, ?, ?)",
+                        [(org_id, term, chunk_id, tf) for term, tf in terms.items()]
+                    )
+                self._update_corpus(org_id, len(ids), total_length)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def delete_document(self, org_id: str, document_id: str) -> None:
+        org_id = str(org_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                chunk_ids = [row[0] for row in self._conn.execute(
+                    "SELECT chunk_id FROM chunks WHERE org_id = ? AND document_id = ?",
+                    (org_id, str(document_id))
+                )]
+                self._remove(org_id, chunk_ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+    
+    def has_document(self, org_id: str, document_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM chunks WHERE org_id = ? AND document_id = ? LIMIT 1", (str(org_id), str(document_id))
+            ).fetchone() is not None
+    
+    def _remove(self, org_id: str, chunk_ids: List[str]) -> None:
+        removed = 0
+        removed_length = 0
+        for chunk_id in chunk_ids:
+            row = self._conn.execute(
+                "SELECT length FROM chunks WHERE org_id = ? AND chunk_id = ?", (org_id, chunk_id)
+            ).fetchone()
+            if row is None:
+                continue
+            removed += 1
+            removed_length += row[0]
+            self._conn.execute("DELETE FROM chunks WHERE org_id = ? AND chunk_id = ?", (org_id, chunk_id))
+            self._conn.execute("DELETE FROM postings WHERE org_id = ? AND chunk_id = ?", (org_id, chunk_id))
+        if removed:
+            self._update_corpus(org_id, -removed, -removed_length)
+    
+    def _update_corpus(self, org_id: str, chunks: int, length: int) -> None:
+        self._conn.execute(
+            "INSERT INTO corpus (org_id, chunk_count, total_length) VALUES (?, ?, ?) "
+            "ON CONFLICT(org_id) DO UPDATE SET chunk_count = chunk_count + excluded.chunk_count, "
+            "total_length = total_length + excluded.total_length",
+            (org_id, chunks, length)
+        )
+    
+    def search(self, org_id: str, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k chunks for ``query`` as dicts with id, document, metadata and score"""
+        org_id = str(org_id)
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        
+        with self._lock:
+            corpus = self._conn.execute(
+                "SELECT chunk_count, total_length FROM corpus WHERE org_id = ?", (org_id,)
+            ).fetchone()
+            if not corpus or corpus[0] <= 0:
+                return []
+            chunk_count, total_length = corpus
+            avg_length = total_length / chunk_count
+            
+            scores: Dict[str, float] = {}
+            for term in terms:
+                postings = self._conn.execute(
+                    "SELECT p.chunk_id, p.tf, c.length FROM postings p "
+                    "JOIN chunks c ON c.org_id = p.org_id AND c.chunk_id = p.chunk_id "
+                    "WHERE p.org_id = ? AND p.term = ?",
+                    (org_id, term)
+                ).fetchall()
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))
+                for chunk_id, tf, length in postings:
+                    norm = tf + self.k1 * (1 - self.b + self.b * length / avg_length)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+            
+            top = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            rows = self._fetch(org_id, [chunk_id for chunk_id, _ in top])
+        
+        return [
+            {"id": chunk_id, "document": rows[chunk_id][0], "metadata": rows[chunk_id][1], "score": score}
+            for chunk_id, score in top
+            if chunk_id in rows
+        ]
+    
+    def _fetch(self, org_id: str, chunk_ids: List[str]) -> Dict[str, tuple]:
+        if not chunk_ids:
+            return {}
+        placeholders = ",".join("?" * len(chunk_ids))
+        return {
+            chunk_id: (document, json.loads(metadata) if metadata else {})
+            for chunk_id, document, metadata in self._conn.execute(
+                f"SELECT chunk_id, document, metadata FROM chunks WHERE org_id = ? AND chunk_id IN ({placeholders})",
+                [org_id, *chunk_ids]
+            )
+        }
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@lru_cache()
+def get_bm25_index() -> BM25Index:
+    return BM25Index(settings.BM25_INDEX_PATH)
@@ -0,0 +1,205 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+import hashlib
+import json
+import threading
+import time
+
+from ..config import settings
+from ..models import Campaign, Creative, TrustScore
+
+
+class CacheBackend:
+    """Storage interface for ResponseCache.
+    
+    Values must be JSON-serializable. Counters never expire or get evicted,
+    because they carry the per-org invalidation generation.
+    """
+    
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+    
+    def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+    
+    def incr(self, key: str) -> int:
+        raise NotImplementedError
+    
+    def size(self) -> int:
+        raise NotImplementedError
+
+
+class LRUCacheBackend(CacheBackend):
+    """In-process LRU cache with per-entry expiry"""
+    
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+    
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+    
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Shared cache backed by Redis, for deployments running several workers"""
+    
+    def __init__(self, url: str):
+        import redis  # Optional dependency, only needed for this backend
+        self.client = redis.Redis.from_url(url)
+    
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(key)
+        return json.loads(raw) if raw is not None else None
+    
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self.client.set(key, json.dumps(value), px=int(ttl * 1000))
+    
+    def get_counter(self, key: str) -> int:
+        raw = self.client.get(key)
+        return int(raw) if raw is not None else 0
+    
+    def incr(self, key: str) -> int:
+        return int(self.client.incr(key))
+    
+    def size(self) -> int:
+        return int(self.client.dbsize())
+
+
+class ResponseCache:
+    """TTL response cache keyed by organization, endpoint and parameters.
+    
+    Each org has a generation counter that is part of every key; bumping it
+    invalidates all of the org's entries at once without scanning the cache.
+    """
+    
+    def __init__(self, backend: CacheBackend, ttl: float, namespace: str = "analytics"):
+        self.backend = backend
+        self.ttl = ttl
+        self.namespace = namespace
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self.invalidations = 0
+    
+    def _generation_key(self, org_id: str) -> str:
+        return f"{self.namespace}:gen:{org_id}"
+    
+    def make_key(self, org_id: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> str:
+        generation = self.backend.get_counter(self._generation_key(org_id))
+        params_hash = hashlib.sha1(
+            json.dumps(params or {}, sort_keys=True, default=str).encode()
+        ).hexdigest()
+        return f"{self.namespace}:{org_id}:{generation}:{endpoint}:{params_hash}"
+    
+    def get_or_compute(
+        self,
+        org_id: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        compute: Callable[[], Any]
+    ) -> Any:
+        """Return the cached response, or compute, store and return it.
+        
+        Exceptions raised by ``compute`` (e.g. 404s) are not cached.
+        """
+        key = self.make_key(str(org_id), endpoint, params)
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+            return value
+        
+        self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+        value = compute()
+        self.backend.set(key, value, self.ttl)
+        return value
+    
+    def invalidate_org(self, org_id: str) -> None:
+        self.backend.incr(self._generation_key(str(org_id)))
+        self.invalidations += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "invalidations": self.invalidations,
+            "entries": self.backend.size(),
+            "ttl_seconds": self.ttl,
+            "by_endpoint": {
+                endpoint: {"hits": self.hits.get(endpoint, 0), "misses": self.misses.get(endpoint, 0)}
+                for endpoint in sorted(set(self.hits) | set(self.misses))
+            }
+        }
+
+
+def _create_analytics_cache() -> ResponseCache:
+    if settings.ANALYTICS_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL)
+    else:
+        backend = LRUCacheBackend(max_entries=settings.ANALYTICS_CACHE_MAX_ENTRIES)
+    return ResponseCache(backend, ttl=settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+# Global analytics cache instance
+analytics_cache = _create_analytics_cache()
+
+
+# Invalidation: any committed change to these tables drops the org's cached responses
+INVALIDATING_MODELS = (Campaign, Creative, TrustScore)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_orgs(session, flush_context):
+    changed = session.info.setdefault("analytics_changed_orgs", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, INVALIDATING_MODELS) and obj.organization_id is not None:
+            changed.add(str(obj.organization_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_orgs(session):
+    for org_id in session.info.pop("analytics_changed_orgs", ()):
+        analytics_cache.invalidate_org(org_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_orgs(session):
+    session.info.pop("analytics_changed_orgs", None)
@@ -0,0 +1,169 @@
+"""
+Token-budgeted prompt assembly for chat.
+
+Tokens are counted with tiktoken when it is installed (a close proxy for
+the provider's tokenizer), otherwise estimated from word and punctuation
+counts plus a margin, since subword tokenizers split long or rare words
+and the estimate must not undercount the budget. The system prompt and
+the new message always go in; the most recent history turns fill up to
+their own cap, and the highest-scoring retrieved chunks fill whatever
+remains. Chunks are only ever included whole, minus text already present
+in an included chunk (ingestion overlaps neighbouring chunks), so facts
+aren't cut mid-sentence.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import math
+import re
+
+from ..config import settings
+
+# Per-message framing the chat format adds (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Shortest run of shared words treated as chunk overlap rather than coincidence
+MIN_OVERLAP_WORDS = 8
+
+FALLBACK_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# English prose runs ~1.3 BPE tokens per word; overestimating only leaves budget unused
+FALLBACK_TOKEN_MARGIN = 1.3
+
+
+@lru_cache()
+def _get_encoding(name: str):
+    try:
+        import tiktoken  # Optional dependency; the regex estimate is used without it
+    except ImportError:
+        return None
+    return tiktoken.get_encoding(name)
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding(settings.CHAT_TOKENIZER)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(FALLBACK_TOKEN_RE.findall(text)) * FALLBACK_TOKEN_MARGIN)
+
+
+def _overlap(left: List[str], right: List[str]) -> int:
+    """Length of the longest suffix of ``left`` that is a prefix of ``right``"""
+    for size in range(min(len(left), len(right)), MIN_OVERLAP_WORDS - 1, -1):
+        if left[-size:] == right[:size]:
+            return size
+    return 0
+
+
+def _strip_overlap(content: str, included: Sequence[List[str]]) -> Optional[str]:
+    """``content`` without text already in ``included`` chunks; None if nothing new is left"""
+    words = content.split()
+    original = len(words)
+    for other in included:
+        # Padded so only whole words match ("w1 w2" isn't in "w11 w2")
+        if len(words) <= len(other) and f" {' '.join(words)} " in f" {' '.join(other)} ":
+            return None
+        head = _overlap(other, words)
+        if head:
+            words = words[head:]
+        tail = _overlap(words, other)
+        if tail:
+            words = words[:-tail]
+        if not words:
+            return None
+    # Keep the original formatting unless something was cut
+    return content if len(words) == original else " ".join(words)
+
+
+class ContextBuilder:
+    """Packs system prompt, retrieved chunks, history and the new message into a token budget"""
+    
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        history_max_tokens: int = 800,
+        counter: Callable[[str], int] = count_tokens
+    ):
+        self.max_tokens = max_tokens
+        self.history_max_tokens = history_max_tokens
+        self.counter = counter
+    
+    def _message_tokens(self, content: str) -> int:
+        return self.counter(content) + MESSAGE_OVERHEAD_TOKENS
+    
+    def build(
+        self,
+        system_prompt: str,
+        message: str,
+        chunks: Sequence[Dict[str, Any]],
+        history: Sequence[Dict[str, str]] = ()
+    ) -> Dict[str, Any]:
+        """Assemble chat messages.
+        
+        ``chunks`` are retrieved hits with at least ``content`` and
+        ``relevance_score``, the retriever's final ranking score (the
+        reranker's, when one ran). Returns the messages, the chunks actually used
+        (as sources), tokens per section and what had to be left out.
+        """
+        tokens = {
+            "system": self._message_tokens(system_prompt),
+            "message": self._message_tokens(message),
+            "history": 0,
+            "context": 0
+        }
+        remaining = self.max_tokens - tokens["system"] - tokens["message"]
+        
+        # Most recent turns first, stopping at the first that doesn't fit so history stays contiguous
+        kept_history: List[Dict[str, str]] = []
+        history_budget = min(self.history_max_tokens, max(remaining, 0))
+        for turn in reversed(history):
+            cost = self._message_tokens(turn.get("content", ""))
+            if tokens["history"] + cost > history_budget:
+                break
+            kept_history.insert(0, turn)
+            tokens["history"] += cost
+        remaining -= tokens["history"]
+        
+        # Highest-scoring chunks first; skip (don't truncate) any that no longer fit
+        header = "\n\nRelevant context from knowledge base:"
+        header_tokens = self.counter(header)
+        sources: List[Dict[str, Any]] = []
+        included: List[List[str]] = []
+        parts: List[str] = []
+        duplicates = 0
+        over_budget = 0
+        for chunk in sorted(chunks, key=lambda c: c.get("relevance_score", 0.0), reverse=True):
+            content = _strip_overlap(chunk["content"], included)
+            if content is None:
+                duplicates += 1
+                continue
+            part = ("\n\n" if parts else "\n") + f"[Document {len(parts) + 1}]: {content}"
+            cost = self.counter(part) + (0 if parts else header_tokens)
+            if cost > remaining:
+                over_budget += 1
+                continue
+            parts.append(part)
+            included.append(content.split())
+            sources.append({**chunk, "content": content})
+            tokens["context"] += cost
+            remaining -= cost
+        
+        system_content = system_prompt + (header + "".join(parts) if parts else "")
+        messages = [{"role": "system", "content": system_content}, *kept_history, {"role": "user", "content": message}]
+        tokens["total"] = sum(tokens.values())
+        
+        return {
+            "messages": messages,
+            "sources": sources,
+            "tokens": tokens,
+            "dropped": {
+                "history_turns": len(history) - len(kept_history),
+                "duplicate_chunks": duplicates,
+                "over_budget_chunks": over_budget
+            }
+        }
+
+
+@lru_cache()
+def get_context_builder() -> ContextBuilder:
+    return ContextBuilder(
+        max_tokens=settings.CHAT_CONTEXT_MAX_TOKENS,
+        history_max_tokens=settings.CHAT_HISTORY_MAX_TOKENS
+    )
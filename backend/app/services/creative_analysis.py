@@ -0,0 +1,222 @@
+"""
+Background analysis of uploaded creatives.
+
+Uploads insert a CreativeAnalysisJob and return immediately; workers
+(app.jobs.analysis_worker) claim jobs with SELECT ... FOR UPDATE SKIP LOCKED,
+run quality scoring, AI-image detection and trust scoring concurrently, and
+write a Prediction row for each as it succeeds. Failed analyses are retried
+with exponential backoff; results already obtained are kept, so a retry only
+reruns what failed.
+"""
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models import Creative, Prediction, StoredBlob
+from ..models.creative_analysis_job import CreativeAnalysisJob
+from ..models.ingestion_job import JobStatus
+from .ingestion_queue import utcnow
+from .ml_client import MLClient
+
+logger = logging.getLogger(__name__)
+
+# Analyses that depend only on the image bytes, so their results are shared through the org's StoredBlob
+BLOB_ANALYSES = ("quality", "ai_image")
+
+DEFAULT_MODEL_VERSIONS = {
+    "quality": "vit-v1",
+    "ai_image": "ai-image-v1",
+    "trust": "trust-v1",
+}
+
+
+def enqueue_analysis(db: Session, creative: Creative) -> CreativeAnalysisJob:
+    """Add a queued analysis job for ``creative`` to the session (caller commits)"""
+    job = CreativeAnalysisJob(
+        organization_id=creative.organization_id,
+        creative_id=creative.id,
+        status=JobStatus.QUEUED,
+        max_attempts=settings.ANALYSIS_MAX_ATTEMPTS,
+        run_after=utcnow(),
+        results={}
+    )
+    db.add(job)
+    return job
+
+
+def latest_job(db: Session, creative_id) -> Optional[CreativeAnalysisJob]:
+    return db.query(CreativeAnalysisJob).filter(
+        CreativeAnalysisJob.creative_id == creative_id
+    ).order_by(CreativeAnalysisJob.created_at.desc()).first()
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[CreativeAnalysisJob]:
+    """Lock and mark running the next due job, or return None if the queue is idle"""
+    while True:
+        now = utcnow()
+        stale_before = now - timedelta(seconds=settings.ANALYSIS_LOCK_TIMEOUT_SECONDS)
+        
+        # Due queued jobs, plus running jobs locked so long their worker is presumed dead
+        job = db.execute(
+            select(CreativeAnalysisJob)
+            .where(or_(
+                and_(CreativeAnalysisJob.status == JobStatus.QUEUED, CreativeAnalysisJob.run_after <= now),
+                and_(CreativeAnalysisJob.status == JobStatus.RUNNING, CreativeAnalysisJob.locked_at < stale_before),
+            ))
+            .order_by(CreativeAnalysisJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        
+        if job is None:
+            db.rollback()
+            return None
+        
+        if job.status == JobStatus.RUNNING:
+            logger.warning("Reclaiming stale analysis job %s from %s", job.id, job.locked_by)
+            if job.attempts >= job.max_attempts:
+                finish_job(db, job, job.locked_by, JobStatus.FAILED, "Worker lost during final attempt")
+                continue
+        
+        job.status = JobStatus.RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+        db.commit()
+        return job
+
+
+def _release(db: Session, job: CreativeAnalysisJob, worker_id: str, **values) -> bool:
+    """Commit the job's new state, with everything else pending in the session, if ``worker_id`` still holds it.
+    
+    A job reclaimed after ANALYSIS_LOCK_TIMEOUT_SECONDS is rolled back instead,
+    so its results and predictions are only ever recorded by its current owner.
+    """
+    job_id = job.id
+    released = db.execute(
+        update(CreativeAnalysisJob)
+        .where(CreativeAnalysisJob.id == job_id, CreativeAnalysisJob.locked_by == worker_id)
+        .values(locked_by=None, locked_at=None, **values)
+    ).rowcount
+    if not released:
+        db.rollback()
+        logger.warning("Analysis job %s was reclaimed from %s; discarding its outcome", job_id, worker_id)
+        return False
+    db.commit()
+    return True
+
+
+def finish_job(
+    db: Session,
+    job: CreativeAnalysisJob,
+    worker_id: str,
+    status: JobStatus,
+    error: Optional[str] = None
+) -> bool:
+    return _release(db, job, worker_id, status=status, last_error=error, finished_at=utcnow())
+
+
+def fail_job(db: Session, job: CreativeAnalysisJob, worker_id: str, error: str) -> bool:
+    """Requeue with exponential backoff, or mark failed once attempts run out"""
+    if job.attempts >= job.max_attempts:
+        return finish_job(db, job, worker_id, JobStatus.FAILED, error)
+    
+    delay = settings.ANALYSIS_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+    return _release(
+        db, job, worker_id,
+        status=JobStatus.QUEUED,
+        last_error=error,
+        run_after=utcnow() + timedelta(seconds=delay)
+    )
+
+
+def _analysis_calls(client: MLClient, creative: Creative) -> Dict[str, Any]:
+    return {
+        "quality": lambda: client.analyze_creative_quality(creative.image_url),
+        "ai_image": lambda: client.detect_ai_image(creative.image_url),
+        "trust": lambda: client.calculate_trust_score(
+            str(creative.campaign_id), text=creative.ad_text, image_url=creative.image_url
+        ),
+    }
+
+
+async def run_job(db: Session, job: CreativeAnalysisJob, client: MLClient) -> None:
+    """Run the job's outstanding analyses concurrently and record the outcome"""
+    # Ours as of the claim; a reload after a later commit would show whoever reclaimed it
+    worker_id = job.locked_by
+    try:
+        await _run_analyses(db, job, worker_id, client)
+    except Exception as e:
+        # Database errors and the like: requeue rather than leave the job RUNNING until its lock expires
+        db.rollback()
+        logger.exception("Analysis job %s failed (attempt %d/%d)", job.id, job.attempts, job.max_attempts)
+        fail_job(db, job, worker_id, f"{type(e).__name__}: {e}")
+
+
+async def _run_analyses(db: Session, job: CreativeAnalysisJob, worker_id: str, client: MLClient) -> None:
+    creative = db.get(Creative, job.creative_id)
+    if creative is None or not creative.image_url:
+        # Creative deleted while queued, or nothing to analyze
+        finish_job(db, job, worker_id, JobStatus.SUCCEEDED)
+        return
+    
+    ref = creative.blob_ref
+    blob = db.get(StoredBlob, (ref.organization_id, ref.content_hash)) if ref is not None else None
+    results = dict(job.results or {})
+    shared = dict(blob.analysis_results or {}) if blob is not None else {}
+    
+    # Reuse analyses of identical bytes; call the ML service for the rest, all at once
+    pending = {}
+    for name, call in _analysis_calls(client, creative).items():
+        if name in results:
+            continue
+        if name in BLOB_ANALYSES and name in shared:
+            results[name] = shared[name]
+            _add_prediction(db, creative, name, shared[name])
+        else:
+            pending[name] = call()
+    
+    outcomes = await asyncio.gather(*pending.values(), return_exceptions=True)
+    errors = []
+    for name, outcome in zip(pending, outcomes):
+        # BaseException: a cancelled call comes back as CancelledError, which isn't an Exception
+        if isinstance(outcome, BaseException):
+            errors.append(f"{name}: {type(outcome).__name__}: {outcome}")
+            continue
+        if not isinstance(outcome, dict):
+            errors.append(f"{name}: unexpected response {type(outcome).__name__}")
+            continue
+        results[name] = outcome
+        _add_prediction(db, creative, name, outcome)
+        if name in BLOB_ANALYSES and blob is not None:
+            shared[name] = outcome
+    
+    # Committed together with the job's new state, and only while it is still ours
+    job.results = results
+    if blob is not None and shared != (blob.analysis_results or {}):
+        blob.analysis_results = shared
+        blob.analyzed_at = utcnow()
+    
+    if errors:
+        logger.warning("Analysis job %s failed (attempt %d/%d): %s", job.id, job.attempts, job.max_attempts, errors)
+        fail_job(db, job, worker_id, "; ".join(errors))
+        return
+    
+    if finish_job(db, job, worker_id, JobStatus.SUCCEEDED):
+        logger.info("Analyzed creative %s (%s)", creative.id, ", ".join(sorted(results)))
+
+
+def _add_prediction(db: Session, creative: Creative, name: str, result: Dict[str, Any]) -> None:
+    db.add(Prediction(
+        organization_id=creative.organization_id,
+        campaign_id=creative.campaign_id,
+        creative_id=creative.id,
+        prediction_type=name,
+        model_version=str(result.get("model_version") or DEFAULT_MODEL_VERSIONS[name]),
+        predictions=result
+    ))
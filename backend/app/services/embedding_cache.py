@@ -0,0 +1,139 @@
+from typing import Callable, List, Optional, Sequence, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def normalize_chunk(text: str) -> str:
+    """Collapse whitespace so re-flowed but otherwise identical chunks share a key"""
+    return " ".join(text.split())
+
+
+class EmbeddingCache:
+    """Persistent SQLite cache of chunk embeddings.
+    
+    Keys are sha256(model id + normalized chunk text), so switching embedding
+    models never returns stale vectors. Vectors are stored as float32 blobs.
+    When the table grows past ``max_entries`` the least recently used rows
+    are evicted.
+    """
+    
+    def __init__(self, path: str, model_id: str, max_entries: int = 100000):
+        self.path = path
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Several ingestion workers may share the file; WAL lets readers proceed during writes
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+    
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_id}\0{normalize_chunk(text)}".encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: Sequence[str]) -> List[Optional[List[float]]]:
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return [
+            np.frombuffer(found[key], dtype=np.float32).tolist() if key in found else None
+            for key in keys
+        ]
+    
+    def set_many(self, items: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in items]
+            )
+            self._evict()
+            self._conn.commit()
+    
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if count > self.max_entries:
+            # Evict down to 90% so we don't pay for a delete on every insert
+            excess = count - int(self.max_entries * 0.9)
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+    
+    def embed(
+        self,
+        texts: Sequence[str],
+        compute: Callable[[List[str]], Sequence[Sequence[float]]]
+    ) -> Tuple[List[List[float]], int, int]:
+        """Embed ``texts``, calling ``compute`` only for cache misses.
+        
+        Returns (vectors, hits, misses); vectors follow the input order.
+        """
+        keys = [self.make_key(text) for text in texts]
+        vectors = self.get_many(keys)
+        
+        # Identical chunks within one call are computed once
+        missing = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[i], []).append(i)
+        
+        if missing:
+            miss_keys = list(missing)
+            computed = compute([texts[missing[key][0]] for key in miss_keys])
+            computed = [np.asarray(v, dtype=np.float32).tolist() for v in computed]
+            self.set_many(list(zip(miss_keys, computed)))
+            for key, vector in zip(miss_keys, computed):
+                for i in missing[key]:
+                    vectors[i] = vector
+        
+        misses = sum(len(positions) for positions in missing.values())
+        hits = len(texts) - misses
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+        return vectors, hits, misses
+    
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return {
+                "model_id": self.model_id,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": size,
+                "max_entries": self.max_entries,
+            }
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
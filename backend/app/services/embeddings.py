@@ -0,0 +1,33 @@
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from ..config import settings
+from .embedding_cache import EmbeddingCache
+
+
+@lru_cache()
+def get_embedding_function():
+    """Chroma's default ONNX MiniLM embedder (the model the collection queries with)"""
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    
+    return DefaultEmbeddingFunction()
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        settings.EMBEDDING_CACHE_PATH,
+        model_id=settings.EMBEDDING_MODEL_ID,
+        max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES
+    )
+
+
+def embed_chunks(chunks: Sequence[str]) -> Tuple[List[List[float]], int, int]:
+    """Embed chunks through the cache; returns (vectors, cache hits, cache misses)"""
+    embed = get_embedding_function()
+    return get_embedding_cache().embed(chunks, lambda texts: embed(texts))
+
+
+def embed_query(text: str) -> List[float]:
+    """Embed a search query (not cached; queries rarely repeat verbatim)"""
+    return list(get_embedding_function()([text])[0])
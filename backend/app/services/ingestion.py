@@ -0,0 +1,190 @@
+"""
+Document ingestion for the RAG pipeline: stream the upload, extract text
+incrementally, split it into overlapping token-bounded chunks and add them
+to the vector store and the BM25 keyword index in batches.
+"""
+import codecs
+import re
+from datetime import datetime
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from ..config import settings
+from ..models.document import Document, DocumentType
+from .bm25 import get_bm25_index
+from .embeddings import embed_chunks
+from .vector_store import get_vector_store
+
+READ_BLOCK_SIZE = 64 * 1024
+
+# Whitespace-delimited tokens keep their trailing whitespace so chunks re-join verbatim
+TOKEN_RE = re.compile(r"\S+\s*")
+
+
+class IngestionAborted(Exception):
+    """Raised when ``should_abort`` stops an ingestion; its chunks are left to whoever retries it"""
+
+
+def detect_document_type(filename: str, content_type: str) -> DocumentType:
+    """Map an upload to a supported DocumentType, or raise ValueError"""
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if content_type == "application/pdf" or extension == "pdf":
+        return DocumentType.PDF
+    if extension == "docx" or content_type == (
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    ):
+        return DocumentType.DOCX
+    if content_type in ("text/plain", "text/markdown") or extension in ("txt", "md"):
+        return DocumentType.TXT
+    raise ValueError("Invalid file type. Allowed: txt, md, pdf, docx")
+
+
+# Text extraction (each yields text pieces without loading the whole file)
+def iter_text_file(fileobj: BinaryIO) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while True:
+        block = fileobj.read(READ_BLOCK_SIZE)
+        if not block:
+            break
+        text = decoder.decode(block)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_pdf(fileobj: BinaryIO) -> Iterator[str]:
+    from PyPDF2 import PdfReader
+    
+    # PdfReader parses pages lazily from the (spooled) file
+    for page in PdfReader(fileobj).pages:
+        text = page.extract_text() or ""
+        if text.strip():
+            yield text + "\n\n"
+
+
+def iter_docx(fileobj: BinaryIO) -> Iterator[str]:
+    import docx
+    
+    for paragraph in docx.Document(fileobj).paragraphs:
+        if paragraph.text.strip():
+            yield paragraph.text + "\n\n"
+
+
+EXTRACTORS = {
+    DocumentType.TXT: iter_text_file,
+    DocumentType.PDF: iter_pdf,
+    DocumentType.DOCX: iter_docx,
+}
+
+
+def chunk_text(
+    pieces: Iterable[str],
+    chunk_tokens: int = 400,
+    overlap_tokens: int = 50
+) -> Iterator[str]:
+    """Split streamed text into chunks of ``chunk_tokens`` sharing ``overlap_tokens``"""
+    if not 0 <= overlap_tokens < chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+    
+    window: List[str] = []
+    carry = ""
+    emitted = 0  # Tokens of the window already emitted in a previous chunk
+    
+    for piece in pieces:
+        tokens = TOKEN_RE.findall(carry + piece)
+        # A piece may end mid-word; hold the last token until the next piece
+        carry = tokens.pop() if tokens and not tokens[-1][-1].isspace() else ""
+        for token in tokens:
+            window.append(token)
+            if len(window) == chunk_tokens:
+                yield "".join(window).strip()
+                window = window[chunk_tokens - overlap_tokens:]
+                emitted = len(window)
+    
+    if carry:
+        window.append(carry)
+    if len(window) > emitted:
+        yield "".join(window).strip()
+
+
+def ingest_document(
+    db: Session,
+    document: Document,
+    fileobj: BinaryIO,
+    should_abort: Optional[Callable[[], bool]] = None
+) -> Dict[str, int]:
+    """Extract, chunk and index ``document`` from ``fileobj``.
+    
+    ``should_abort`` is checked before each batch and before the document is
+    marked processed. Returns the chunk count and embedding cache hits/misses.
+    """
+    store = get_vector_store()
+    document_id = str(document.id)
+    base_metadata = {
+        "document_id": document_id,
+        "organization_id": str(document.organization_id),
+        "title": document.name,
+        "uploaded_at": datetime.utcnow().isoformat()
+    }
+    
+    pieces = EXTRACTORS[document.document_type](fileobj)
+    chunks = chunk_text(pieces, settings.INGEST_CHUNK_TOKENS, settings.INGEST_CHUNK_OVERLAP)
+    
+    count = 0
+    stats = {"chunks": 0, "embedding_cache_hits": 0, "embedding_cache_misses": 0}
+    batch: List[str] = []
+    
+    def check_abort():
+        if should_abort is not None and should_abort():
+            raise IngestionAborted(f"Ingestion of document {document_id} aborted")
+    
+    def flush():
+        check_abort()
+        
+        # Only chunks not seen before (same text, same model) are embedded
+        embeddings, hits, misses = embed_chunks(batch)
+        stats["embedding_cache_hits"] += hits
+        stats["embedding_cache_misses"] += misses
+        
+        # Upserts keep retried jobs idempotent
+        ids = [f"doc_{document_id}_chunk_{count - len(batch) + i}" for i in range(len(batch))]
+        metadatas = [{**base_metadata, "chunk_index": count - len(batch) + i} for i in range(len(batch))]
+        store.upsert(document.organization_id, ids=ids, documents=batch, embeddings=embeddings, metadatas=metadatas)
+        get_bm25_index().add_chunks(document.organization_id, ids, batch, metadatas)
+        batch.clear()
+    
+    try:
+        for chunk in chunks:
+            batch.append(chunk)
+            count += 1
+            if len(batch) >= settings.INGEST_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    except IngestionAborted:
+        # Deleting would race whoever now owns the job and upserts the same chunk ids
+        raise
+    except Exception:
+        # Don't leave a half-indexed document behind
+        delete_document_chunks(document)
+        raise
+    store.flush()
+    check_abort()
+    
+    document.chunk_count = stats["chunks"] = count
+    document.chroma_namespace = store.namespace(document.organization_id)
+    document.is_processed = True
+    document.processed_at = func.now()
+    db.commit()
+    db.refresh(document)
+    
+    return stats
+
+
+def delete_document_chunks(document: Document) -> None:
+    get_vector_store().delete_document(document.organization_id, document.id, namespace=document.chroma_namespace)
+    get_bm25_index().delete_document(document.organization_id, document.id)
@@ -0,0 +1,230 @@
+"""
+Postgres-backed queue for document ingestion jobs.
+
+The API spools the upload to INGEST_SPOOL_DIR and inserts an IngestionJob;
+workers (app.jobs.ingestion_worker) claim jobs with SELECT ... FOR UPDATE
+SKIP LOCKED, so any number of them can poll the same table without a broker.
+"""
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Optional, Tuple
+
+from sqlalchemy import select, update, and_, or_
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.document import Document
+from ..models.ingestion_job import IngestionJob, JobStatus
+from .ingestion import READ_BLOCK_SIZE, IngestionAborted, ingest_document
+
+logger = logging.getLogger(__name__)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def spool_upload(fileobj: BinaryIO) -> Tuple[str, int]:
+    """Copy an upload to the spool directory in blocks; returns (path, size)"""
+    os.makedirs(settings.INGEST_SPOOL_DIR, exist_ok=True)
+    path = os.path.join(settings.INGEST_SPOOL_DIR, uuid.uuid4().hex)
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, READ_BLOCK_SIZE)
+    return path, os.path.getsize(path)
+
+
+def remove_spool_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def enqueue_ingestion(db: Session, document: Document, spool_path: str) -> IngestionJob:
+    """Add a queued job for ``document`` to the session (caller commits)"""
+    job = IngestionJob(
+        organization_id=document.organization_id,
+        document_id=document.id,
+        spool_path=spool_path,
+        status=JobStatus.QUEUED,
+        max_attempts=settings.INGEST_MAX_ATTEMPTS,
+        run_after=utcnow()
+    )
+    db.add(job)
+    return job
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[IngestionJob]:
+    """Lock and mark running the next due job, or return None if the queue is idle"""
+    while True:
+        now = utcnow()
+        stale_before = now - timedelta(seconds=settings.INGEST_LOCK_TIMEOUT_SECONDS)
+        
+        # Due queued jobs, plus running jobs whose lease went unrenewed so long their worker is presumed dead
+        job = db.execute(
+            select(IngestionJob)
+            .where(or_(
+                and_(IngestionJob.status == JobStatus.QUEUED, IngestionJob.run_after <= now),
+                and_(IngestionJob.status == JobStatus.RUNNING, IngestionJob.locked_at < stale_before),
+            ))
+            .order_by(IngestionJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        
+        if job is None:
+            db.rollback()
+            return None
+        
+        if job.status == JobStatus.RUNNING:
+            logger.warning("Reclaiming stale ingestion job %s from %s", job.id, job.locked_by)
+            if job.attempts >= job.max_attempts:
+                finish_job(db, job, job.locked_by, JobStatus.FAILED, "Worker lost during final attempt")
+                continue
+        
+        job.status = JobStatus.RUNNING
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+        db.commit()
+        return job
+
+
+def renew_lease(db: Session, job_id, worker_id: str) -> bool:
+    """Refresh a running job's lock; False if another worker has reclaimed it"""
+    renewed = db.execute(
+        update(IngestionJob)
+        .where(
+            IngestionJob.id == job_id,
+            IngestionJob.status == JobStatus.RUNNING,
+            IngestionJob.locked_by == worker_id
+        )
+        .values(locked_at=utcnow())
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+class LeaseHeartbeat:
+    """Renews a job's lock from a background thread while it is being processed.
+    
+    Without it, a job running longer than INGEST_LOCK_TIMEOUT_SECONDS (a large
+    PDF) would be reclaimed and ingested a second time by another worker.
+    Uses its own session, since the job's session is busy in the worker thread.
+    ``lost`` is set once a renewal finds the job reclaimed by another worker.
+    """
+    
+    def __init__(self, db: Session, job: IngestionJob, interval: float):
+        self.bind = db.get_bind()
+        self.job_id = job.id
+        self.worker_id = job.locked_by
+        self.interval = interval
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job.id}", daemon=True)
+    
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                with Session(bind=self.bind) as db:
+                    if not renew_lease(db, self.job_id, self.worker_id):
+                        logger.warning("Lost the lease on ingestion job %s", self.job_id)
+                        self.lost.set()
+                        return
+            except Exception:
+                logger.exception("Failed to renew the lease on ingestion job %s", self.job_id)
+    
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+def _release(db: Session, job: IngestionJob, worker_id: str, **values) -> bool:
+    """Write the job's new state and drop ``worker_id``'s lock, unless another worker has reclaimed it meanwhile"""
+    job_id = job.id
+    released = db.execute(
+        update(IngestionJob)
+        .where(IngestionJob.id == job_id, IngestionJob.locked_by == worker_id)
+        .values(locked_by=None, locked_at=None, **values)
+    ).rowcount
+    db.commit()
+    if not released:
+        logger.warning("Ingestion job %s was reclaimed from %s; discarding its outcome", job_id, worker_id)
+    return bool(released)
+
+
+def finish_job(
+    db: Session,
+    job: IngestionJob,
+    worker_id: str,
+    status: JobStatus,
+    error: Optional[str] = None,
+    **results
+) -> bool:
+    """Record the outcome (and any result columns); False if the job was no longer ``worker_id``'s"""
+    spool_path = job.spool_path
+    if not _release(db, job, worker_id, status=status, last_error=error, finished_at=utcnow(), **results):
+        return False
+    remove_spool_file(spool_path)
+    return True
+
+
+def fail_job(db: Session, job: IngestionJob, worker_id: str, error: str) -> bool:
+    """Requeue with exponential backoff, or mark failed once attempts run out"""
+    if job.attempts >= job.max_attempts:
+        return finish_job(db, job, worker_id, JobStatus.FAILED, error)
+    
+    delay = settings.INGEST_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+    return _release(
+        db, job, worker_id,
+        status=JobStatus.QUEUED,
+        last_error=error,
+        run_after=utcnow() + timedelta(seconds=delay)
+    )
+
+
+def run_job(db: Session, job: IngestionJob) -> None:
+    """Ingest the job's document from its spooled upload and record the outcome"""
+    # Ours as of the claim; a reload after a later commit would show whoever reclaimed it
+    worker_id = job.locked_by
+    document = db.get(Document, job.document_id)
+    if document is None:
+        # Document deleted while queued
+        finish_job(db, job, worker_id, JobStatus.SUCCEEDED)
+        return
+    
+    heartbeat = LeaseHeartbeat(db, job, settings.INGEST_LEASE_RENEW_SECONDS)
+    try:
+        with heartbeat:
+            with open(job.spool_path, "rb") as fileobj:
+                stats = ingest_document(db, document, fileobj, should_abort=heartbeat.lost.is_set)
+    except IngestionAborted:
+        # Reclaimed by another worker, which now owns the outcome and the spool file
+        db.rollback()
+        logger.warning("Abandoned ingestion job %s after losing its lease", job.id)
+        return
+    except Exception as e:
+        db.rollback()
+        logger.exception("Ingestion job %s failed (attempt %d/%d)", job.id, job.attempts, job.max_attempts)
+        fail_job(db, job, worker_id, f"{type(e).__name__}: {e}")
+        return
+    
+    finished = finish_job(
+        db, job, worker_id, JobStatus.SUCCEEDED,
+        chunk_count=stats["chunks"],
+        embedding_cache_hits=stats["embedding_cache_hits"],
+        embedding_cache_misses=stats["embedding_cache_misses"]
+    )
+    if finished:
+        logger.info(
+            "Ingested document %s into %d chunks (%d embeddings cached, %d computed)",
+            document.id, stats["chunks"], stats["embedding_cache_hits"], stats["embedding_cache_misses"]
+        )
@@ -0,0 +1,178 @@
+"""
+Response cache for chat completions.
+
+Exact layer: keyed by a hash of model, messages and temperature, stored in
+a CacheBackend (per-process LRU or Redis) with a TTL. Deterministic prompts
+such as quick insights hit it on every repeat click.
+
+Semantic layer (opt-in): reuses an answer when a new user message embeds
+within ``similarity_threshold`` (cosine) of a cached one asked against the
+same organization and the same context, i.e. identical system prompt,
+retrieved chunks and history. Entries live in process memory with the same
+TTL and a global LRU bound.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+import hashlib
+import json
+import threading
+import time
+
+import numpy as np
+
+from ..config import settings
+from .cache import CacheBackend, LRUCacheBackend, RedisCacheBackend
+
+
+def hash_messages(messages: Sequence[Dict[str, Any]]) -> str:
+    return hashlib.sha256(json.dumps(list(messages), sort_keys=True, default=str).encode()).hexdigest()
+
+
+class LLMResponseCache:
+    """Exact + semantic cache for LLM answers"""
+    
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float,
+        semantic: bool = False,
+        similarity_threshold: float = 0.95,
+        semantic_max_entries: int = 2000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.semantic_max_entries = semantic_max_entries
+        self.clock = clock
+        # entry key -> (context key, expires_at, unit vector, value); oldest first
+        self._semantic_entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._by_context: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def make_key(self, model: str, messages: Sequence[Dict[str, Any]], temperature: float) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": list(messages), "temperature": temperature},
+            sort_keys=True,
+            default=str
+        )
+        return f"llm:{hashlib.sha256(payload.encode()).hexdigest()}"
+    
+    @staticmethod
+    def context_key(org_id: str, messages: Sequence[Dict[str, Any]]) -> str:
+        """Everything but the final user message: system prompt (with retrieved context) and history"""
+        return f"{org_id}:{hash_messages(messages[:-1])}"
+    
+    # Exact layer
+    
+    def get(self, model: str, messages: Sequence[Dict[str, Any]], temperature: float) -> Optional[Dict[str, Any]]:
+        value = self.backend.get(self.make_key(model, messages, temperature))
+        if value is not None:
+            self.exact_hits += 1
+        return value
+    
+    def set(self, model: str, messages: Sequence[Dict[str, Any]], temperature: float, value: Dict[str, Any]) -> None:
+        self.backend.set(self.make_key(model, messages, temperature), value, self.ttl)
+    
+    # Semantic layer
+    
+    def get_similar(self, org_id: str, messages: Sequence[Dict[str, Any]], embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Best cached answer for this context whose question is similar enough, if any"""
+        if not self.semantic:
+            return None
+        context = self.context_key(str(org_id), messages)
+        query = _unit(embedding)
+        now = self.clock()
+        
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for key in list(self._by_context.get(context, ())):
+                _, expires_at, vector, _ = self._semantic_entries[key]
+                if expires_at <= now:
+                    self._drop(key)
+                    continue
+                score = float(np.dot(vector, query))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            
+            if best_key is None:
+                return None
+            self._semantic_entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            return {**self._semantic_entries[best_key][3], "similarity": round(best_score, 4)}
+    
+    def set_similar(
+        self,
+        org_id: str,
+        messages: Sequence[Dict[str, Any]],
+        embedding: Sequence[float],
+        value: Dict[str, Any]
+    ) -> None:
+        if not self.semantic:
+            return
+        context = self.context_key(str(org_id), messages)
+        key = f"{context}:{hash_messages(messages[-1:])}"
+        
+        with self._lock:
+            if key in self._semantic_entries:
+                self._drop(key)
+            self._semantic_entries[key] = (context, self.clock() + self.ttl, _unit(embedding), value)
+            self._by_context.setdefault(context, set()).add(key)
+            while len(self._semantic_entries) > self.semantic_max_entries:
+                self._drop(next(iter(self._semantic_entries)))
+                self.evictions += 1
+    
+    def _drop(self, key: str) -> None:
+        context = self._semantic_entries.pop(key)[0]
+        keys = self._by_context[context]
+        keys.discard(key)
+        if not keys:
+            del self._by_context[context]
+    
+    def record_miss(self) -> None:
+        self.misses += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "exact_entries": self.backend.size(),
+            "semantic_enabled": self.semantic,
+            "semantic_entries": len(self._semantic_entries),
+            "semantic_evictions": self.evictions,
+            "similarity_threshold": self.similarity_threshold,
+            "ttl_seconds": self.ttl
+        }
+
+
+def _unit(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _create_llm_cache() -> LLMResponseCache:
+    if settings.LLM_CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(settings.REDIS_URL)
+    else:
+        backend = LRUCacheBackend(max_entries=settings.LLM_CACHE_MAX_ENTRIES)
+    return LLMResponseCache(
+        backend,
+        ttl=settings.LLM_CACHE_TTL_SECONDS,
+        semantic=settings.LLM_SEMANTIC_CACHE,
+        similarity_threshold=settings.LLM_SEMANTIC_THRESHOLD,
+        semantic_max_entries=settings.LLM_SEMANTIC_MAX_ENTRIES
+    )
+
+
+# Global LLM response cache instance
+llm_cache = _create_llm_cache()
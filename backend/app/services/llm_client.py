@@ -0,0 +1,122 @@
+import httpx
+import json
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from ..config import settings
+from .metrics import LatencyHistogram
+
+
+class LLMNotConfigured(Exception):
+    """Raised when no API key is set for the LLM provider"""
+
+
+class LLMClient:
+    """Pooled client for an OpenAI-compatible chat completions API (Groq by default).
+    
+    One AsyncClient is shared by every request, so connections (and their TLS
+    sessions) are reused instead of being set up per message.
+    """
+    
+    def __init__(
+        self,
+        api_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.api_url = api_url or settings.LLM_API_URL
+        self.api_key = settings.GROQ_API_KEY if api_key is None else api_key
+        self.model = model or settings.LLM_MODEL
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=settings.LLM_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            transport=transport
+        )
+        self.completion_latency = LatencyHistogram()
+        self.first_token_latency = LatencyHistogram()
+    
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+    
+    def _payload(self, messages: List[Dict[str, str]], temperature: float, max_tokens: int, stream: bool) -> Dict[str, Any]:
+        if not self.configured:
+            raise LLMNotConfigured("Set GROQ_API_KEY to enable the chat assistant")
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream
+        }
+    
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> Dict[str, Any]:
+        """Full completion; returns the message content, model and token usage"""
+        payload = self._payload(messages, temperature, max_tokens, stream=False)
+        start = time.perf_counter()
+        response = await self.client.post(self.api_url, json=payload)
+        self.completion_latency.observe(time.perf_counter() - start)
+        response.raise_for_status()
+        result = response.json()
+        
+        return {
+            "content": result["choices"][0]["message"]["content"],
+            "model": result.get("model", self.model),
+            "usage": result.get("usage")
+        }
+    
+    async def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> AsyncIterator[str]:
+        """Yield content deltas as the provider streams them (SSE ``data:`` lines)"""
+        payload = self._payload(messages, temperature, max_tokens, stream=True)
+        start = time.perf_counter()
+        first = True
+        
+        async with self.client.stream("POST", self.api_url, json=payload) as response:
+            if response.is_error:
+                await response.aread()
+                response.raise_for_status()
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                
+                choices = json.loads(data).get("choices") or [{}]
+                delta = choices[0].get("delta", {}).get("content")
+                if delta:
+                    if first:
+                        self.first_token_latency.observe(time.perf_counter() - start)
+                        first = False
+                    yield delta
+        
+        self.completion_latency.observe(time.perf_counter() - start)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "completion": self.completion_latency.snapshot(),
+            "first_token": self.first_token_latency.snapshot()
+        }
+    
+    async def close(self):
+        await self.client.aclose()
+
+
+# Global LLM client instance
+llm_client = LLMClient()
@@ -1,63 +1,200 @@
 import httpx
-from typing import Dict, Any
+import asyncio
+import random
+import time
+from typing import Dict, Any, List, Optional
 from ..config import settings
+from .metrics import LatencyHistogram
+
+
+class MLServiceUnavailable(Exception):
+    """Raised without calling the ML service while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated ML service failures.
+    
+    closed -> open after ``failure_threshold`` consecutive failures; after
+    ``reset_timeout`` seconds one trial call is let through (half-open) and
+    its outcome closes or re-opens the breaker.
+    """
+    
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+    
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        self.rejected += 1
+        return False
+    
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+    
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+# Per-endpoint request timeouts (seconds); batch and image endpoints get more room
+ENDPOINT_TIMEOUTS = {
+    "/predict/engagement": 5.0,
+    "/predict/engagement/batch": 30.0,
+    "/trust/calculate": 10.0,
+    "/creative/analyze": 20.0,
+    "/detect/text": 10.0,
+    "/detect/image": 20.0,
+}
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
 
 
 class MLClient:
     """Client for ML service communication"""
     
-    def __init__(self):
-        self.base_url = settings.ML_SERVICE_URL
-        self.client = httpx.AsyncClient(timeout=30.0)
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or settings.ML_SERVICE_URL
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.ML_TIMEOUT_SECONDS, connect=settings.ML_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.ML_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ML_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.ML_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            http2=settings.ML_HTTP2,
+            transport=transport
+        )
+        self.max_retries = settings.ML_MAX_RETRIES
+        self.retry_backoff = settings.ML_RETRY_BACKOFF_SECONDS
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.ML_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.ML_BREAKER_RESET_SECONDS
+        )
+        self.latency: Dict[str, LatencyHistogram] = {}
+        self.retries = 0
+    
+    async def _post(self, path: str, payload: Dict[str, Any], idempotent: bool = True) -> Dict[str, Any]:
+        """POST to the ML service with retries, circuit breaking and latency tracking.
+        
+        Only idempotent calls are retried. Transport errors and 5xx responses
+        count as breaker failures; 4xx responses are returned as errors
+        immediately and do not trip the breaker.
+        """
+        if not self.breaker.allow():
+            raise MLServiceUnavailable(f"ML service circuit open, skipping {path}")
+        
+        histogram = self.latency.setdefault(path, LatencyHistogram())
+        attempts = self.max_retries + 1 if idempotent else 1
+        trial = self.breaker.state == "half_open"
+        
+        try:
+            for attempt in range(attempts):
+                start = time.perf_counter()
+                try:
+                    response = await self.client.post(
+                        f"{self.base_url}{path}",
+                        json=payload,
+                        timeout=ENDPOINT_TIMEOUTS.get(path, settings.ML_TIMEOUT_SECONDS)
+                    )
+                except httpx.TransportError:
+                    histogram.observe(time.perf_counter() - start)
+                    if attempt + 1 < attempts:
+                        await self._backoff(attempt)
+                        continue
+                    self.breaker.record_failure()
+                    raise
+                
+                histogram.observe(time.perf_counter() - start)
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt + 1 < attempts:
+                    await self._backoff(attempt)
+                    continue
+                
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                    response.raise_for_status()
+                if response.status_code >= 400:
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                
+                result = response.json()  # A malformed body counts against the trial, like a 5xx
+                self.breaker.record_success()
+                return result
+        finally:
+            # A trial that ended any other way (cancelled, unexpected error) must not
+            # leave the breaker half-open, which would reject every call from now on
+            if trial and self.breaker.state == "half_open":
+                self.breaker.record_failure()
+    
+    async def _backoff(self, attempt: int) -> None:
+        """Sleep with full jitter exponential backoff"""
+        self.retries += 1
+        await asyncio.sleep(random.uniform(0, self.retry_backoff * (2 ** attempt)))
     
     async def predict_engagement(self, campaign_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict engagement rate for campaign"""
-        response = await self.client.post(
-            f"{self.base_url}/predict/engagement",
-            json=campaign_data
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._post("/predict/engagement", campaign_data)
+    
+    async def predict_engagement_batch(
+        self,
+        campaigns: List[Dict[str, Any]],
+        chunk_size: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Predict engagement for many campaigns, chunking large inputs.
+        
+        Results are returned in the same order as ``campaigns``.
+        """
+        chunk_size = chunk_size or settings.ML_BATCH_SIZE
+        predictions: List[Dict[str, Any]] = []
+        
+        for start in range(0, len(campaigns), chunk_size):
+            chunk = campaigns[start:start + chunk_size]
+            result = await self._post("/predict/engagement/batch", {"campaigns": chunk})
+            predictions.extend(result["predictions"])
+        
+        return predictions
     
     async def calculate_trust_score(self, campaign_id: str, text: str = None, image_url: str = None) -> Dict[str, Any]:
         """Calculate AI Justice Score (Trust Score)"""
-        response = await self.client.post(
-            f"{self.base_url}/trust/calculate",
-            json={
-                "campaign_id": campaign_id,
-                "text": text,
-                "image_url": image_url
-            }
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._post("/trust/calculate", {
+            "campaign_id": campaign_id,
+            "text": text,
+            "image_url": image_url
+        })
     
     async def analyze_creative_quality(self, image_url: str) -> Dict[str, Any]:
         """Analyze creative quality"""
-        response = await self.client.post(
-            f"{self.base_url}/creative/analyze",
-            json={"image_url": image_url}
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._post("/creative/analyze", {"image_url": image_url})
     
     async def detect_ai_text(self, text: str) -> Dict[str, Any]:
         """Detect if text is AI-generated"""
-        response = await self.client.post(
-            f"{self.base_url}/detect/text",
-            json={"text": text}
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._post("/detect/text", {"text": text})
     
     async def detect_ai_image(self, image_url: str) -> Dict[str, Any]:
         """Detect if image is AI-generated"""
-        response = await self.client.post(
-            f"{self.base_url}/detect/image",
-            json={"image_url": image_url}
-        )
-        response.raise_for_status()
-        return response.json()
+        return await self._post("/detect/image", {"image_url": image_url})
+    
+    def stats(self) -> Dict[str, Any]:
+        """Breaker state, retry count and per-endpoint latency histograms"""
+        return {
+            "circuit_breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+                "rejected_calls": self.breaker.rejected
+            },
+            "retries": self.retries,
+            "latency": {path: histogram.snapshot() for path, histogram in self.latency.items()}
+        }
     
     async def close(self):
         await self.client.aclose()
@@ -0,0 +1,194 @@
+"""
+Hybrid retrieval for chat RAG: BM25 keyword search and vector similarity,
+merged with reciprocal rank fusion and optionally reranked, all within a
+latency budget.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from .bm25 import BM25Index, get_bm25_index, tokenize
+from .vector_store import AsyncVectorStore, get_async_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, List[Dict[str, Any]]], k: int = 60) -> List[Dict[str, Any]]:
+    """Merge ranked hit lists: score = sum over lists of 1 / (k + rank)"""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for source, hits in rankings.items():
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.get(hit["id"])
+            if entry is None:
+                entry = fused[hit["id"]] = {
+                    "id": hit["id"],
+                    "document": hit["document"],
+                    "metadata": hit["metadata"],
+                    "score": 0.0,
+                    "ranks": {}
+                }
+            entry["score"] += 1.0 / (k + rank)
+            entry["ranks"][source] = rank
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+
+
+class Reranker:
+    """Reorders fused candidates; must be cheap enough to run on the request path"""
+    
+    def rerank(self, query: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class LexicalReranker(Reranker):
+    """Boosts candidates covering more of the query's terms, and exact phrase matches.
+    
+    Pure Python and sub-millisecond for tens of candidates.
+    """
+    
+    def __init__(self, coverage_weight: float = 0.5, phrase_weight: float = 0.25):
+        self.coverage_weight = coverage_weight
+        self.phrase_weight = phrase_weight
+    
+    def rerank(self, query, candidates):
+        terms = set(tokenize(query))
+        if not terms or not candidates:
+            return candidates
+        phrase = " ".join(tokenize(query))
+        top_score = candidates[0]["score"] or 1.0
+        
+        for candidate in candidates:
+            chunk_terms = tokenize(candidate["document"])
+            coverage = len(terms.intersection(chunk_terms)) / len(terms)
+            has_phrase = len(terms) > 1 and f" {phrase} " in f" {' '.join(chunk_terms)} "
+            candidate["rerank_score"] = (
+                candidate["score"] / top_score
+                + self.coverage_weight * coverage
+                + (self.phrase_weight if has_phrase else 0.0)
+            )
+        return sorted(candidates, key=lambda c: c["rerank_score"], reverse=True)
+
+
+class CrossEncoderReranker(Reranker):
+    """sentence-transformers cross-encoder on CPU (needs the optional package)"""
+    
+    def __init__(self, model_name: str):
+        from sentence_transformers import CrossEncoder
+        
+        self.model = CrossEncoder(model_name, device="cpu")
+    
+    def rerank(self, query, candidates):
+        if not candidates:
+            return candidates
+        scores = self.model.predict([(query, c["document"]) for c in candidates])
+        for candidate, score in zip(candidates, scores):
+            candidate["rerank_score"] = float(score)
+        return sorted(candidates, key=lambda c: c["rerank_score"], reverse=True)
+
+
+def make_reranker(name: str) -> Optional[Reranker]:
+    if name == "lexical":
+        return LexicalReranker()
+    if name == "cross-encoder":
+        try:
+            return CrossEncoderReranker(settings.RERANKER_MODEL)
+        except ImportError:
+            logger.warning("sentence-transformers is not installed; using the lexical reranker")
+            return LexicalReranker()
+    return None
+
+
+def _ignore_late_result(future: asyncio.Future) -> None:
+    # Searches that miss the budget finish in their thread; don't log their errors as unretrieved
+    if not future.cancelled():
+        future.exception()
+
+
+class HybridRetriever:
+    """BM25 + vector retrieval fused with RRF, bounded by ``budget_ms``.
+    
+    Both searches run concurrently off the event loop (vector search on the
+    store's bounded pool). Whatever has finished
+    when the budget runs out is fused; reranking only runs on the remaining
+    budget, and its result is dropped if it doesn't finish in time.
+    """
+    
+    def __init__(
+        self,
+        store: AsyncVectorStore,
+        bm25: BM25Index,
+        reranker: Optional[Reranker] = None,
+        rrf_k: int = 60,
+        candidates: int = 20,
+        budget_ms: float = 300.0
+    ):
+        self.store = store
+        self.bm25 = bm25
+        self.reranker = reranker
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+    
+    async def retrieve(self, org_id: str, query: str, k: int = 5) -> Dict[str, Any]:
+        start = time.perf_counter()
+        budget = self.budget_ms / 1000
+        loop = asyncio.get_running_loop()
+        n = max(self.candidates, k)
+        
+        searches = {
+            "vector": asyncio.ensure_future(self.store.query_text(str(org_id), query, n)),
+            "keyword": loop.run_in_executor(None, self.bm25.search, str(org_id), query, n),
+        }
+        done, pending = await asyncio.wait(searches.values(), timeout=budget)
+        for future in pending:
+            future.add_done_callback(_ignore_late_result)
+        
+        rankings = {}
+        skipped = []
+        for source, future in searches.items():
+            if future not in done:
+                skipped.append(source)
+            elif future.exception() is not None:
+                logger.warning("%s search failed: %r", source, future.exception())
+                skipped.append(source)
+            else:
+                rankings[source] = future.result()
+        search_ms = (time.perf_counter() - start) * 1000
+        
+        results = reciprocal_rank_fusion(rankings, k=self.rrf_k)[:n]
+        
+        reranked = False
+        remaining = budget - (time.perf_counter() - start)
+        if self.reranker is not None and results and remaining > 0:
+            rerank = loop.run_in_executor(None, self.reranker.rerank, query, results)
+            try:
+                results = await asyncio.wait_for(asyncio.shield(rerank), timeout=remaining)
+                reranked = True
+            except asyncio.TimeoutError:
+                rerank.add_done_callback(_ignore_late_result)
+                skipped.append("rerank")
+        
+        return {
+            "results": results[:k],
+            "sources": sorted(rankings),
+            "skipped": skipped,
+            "reranked": reranked,
+            "timings_ms": {
+                "search": round(search_ms, 2),
+                "total": round((time.perf_counter() - start) * 1000, 2)
+            }
+        }
+
+
+@lru_cache()
+def get_retriever() -> HybridRetriever:
+    return HybridRetriever(
+        get_async_vector_store(),
+        get_bm25_index(),
+        reranker=make_reranker(settings.RETRIEVAL_RERANKER),
+        rrf_k=settings.RETRIEVAL_RRF_K,
+        candidates=settings.RETRIEVAL_CANDIDATES,
+        budget_ms=settings.RETRIEVAL_BUDGET_MS
+    )
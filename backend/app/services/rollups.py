@@ -0,0 +1,140 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Any, Optional
+from decimal import Decimal
+import uuid
+
+from ..models import Campaign, DashboardRollup, Organization, OrgRollupState
+
+
+def campaign_snapshot(campaign: Campaign) -> Dict[str, Any]:
+    """Capture the rollup-relevant fields of a campaign (take before updating it)"""
+    return {
+        "organization_id": campaign.organization_id,
+        "platform": campaign.platform,
+        "spend": Decimal(campaign.spend or 0),
+        "revenue": Decimal(campaign.revenue or 0),
+        "impressions": campaign.impressions or 0,
+        "clicks": campaign.clicks or 0,
+    }
+
+
+def apply_delta(db: Session, snapshot: Dict[str, Any], sign: int) -> None:
+    """Add (sign=1) or subtract (sign=-1) one campaign from its platform rollup.
+    
+    Runs in the caller's transaction, so the rollup commits atomically with
+    the campaign change. The org row is share-locked first, so a delta
+    never interleaves with a rebuild of the same org.
+    """
+    _lock_orgs(db, snapshot["organization_id"], shared=True)
+    
+    values = {
+        "campaign_count": sign,
+        "spend": snapshot["spend"] * sign,
+        "revenue": snapshot["revenue"] * sign,
+        "impressions": snapshot["impressions"] * sign,
+        "clicks": snapshot["clicks"] * sign,
+    }
+    
+    stmt = insert(DashboardRollup).values(
+        id=uuid.uuid4(),
+        organization_id=snapshot["organization_id"],
+        platform=snapshot["platform"],
+        **values
+    )
+    set_ = {
+        column: getattr(DashboardRollup, column) + getattr(stmt.excluded, column)
+        for column in values
+    }
+    set_["updated_at"] = func.now()
+    
+    db.execute(stmt.on_conflict_do_update(constraint="uq_rollup_org_platform", set_=set_))
+
+
+def record_campaign_created(db: Session, campaign: Campaign) -> None:
+    apply_delta(db, campaign_snapshot(campaign), 1)
+
+
+def record_campaign_deleted(db: Session, campaign: Campaign) -> None:
+    apply_delta(db, campaign_snapshot(campaign), -1)
+
+
+def record_campaign_updated(db: Session, previous: Dict[str, Any], campaign: Campaign) -> None:
+    """Move a campaign's contribution from its previous snapshot to its current values"""
+    apply_delta(db, previous, -1)
+    apply_delta(db, campaign_snapshot(campaign), 1)
+
+
+def _lock_orgs(db: Session, org_id: Optional[str], shared: bool = False) -> None:
+    """Row-lock one org (or all) until commit: shared for deltas, exclusive for rebuilds"""
+    query = db.query(Organization.id)
+    if org_id is not None:
+        query = query.filter(Organization.id == org_id)
+    query.with_for_update(read=shared).all()
+
+
+def rebuild_org_rollups(db: Session, org_id: Optional[str] = None) -> int:
+    """Recompute rollups from the campaigns table (one org, or all when org_id is None).
+    
+    Deletes the existing rows and re-inserts them with a single INSERT ... SELECT
+    ... GROUP BY, then marks the orgs as backfilled. Does not commit.
+    """
+    _lock_orgs(db, org_id)
+    
+    delete_query = db.query(DashboardRollup)
+    if org_id is not None:
+        delete_query = delete_query.filter(DashboardRollup.organization_id == org_id)
+    delete_query.delete(synchronize_session=False)
+    
+    aggregate = select(
+        func.gen_random_uuid(),
+        Campaign.organization_id,
+        Campaign.platform,
+        func.count(Campaign.id),
+        func.coalesce(func.sum(Campaign.spend), 0),
+        func.coalesce(func.sum(Campaign.revenue), 0),
+        func.coalesce(func.sum(Campaign.impressions), 0),
+        func.coalesce(func.sum(Campaign.clicks), 0),
+    ).group_by(Campaign.organization_id, Campaign.platform)
+    if org_id is not None:
+        aggregate = aggregate.where(Campaign.organization_id == org_id)
+    
+    result = db.execute(
+        insert(DashboardRollup).from_select(
+            ["id", "organization_id", "platform", "campaign_count",
+             "spend", "revenue", "impressions", "clicks"],
+            aggregate
+        )
+    )
+    
+    orgs = select(Organization.id, func.now())
+    if org_id is not None:
+        orgs = orgs.where(Organization.id == org_id)
+    mark = insert(OrgRollupState).from_select(["organization_id", "built_at"], orgs)
+    db.execute(mark.on_conflict_do_update(
+        index_elements=[OrgRollupState.organization_id],
+        set_={"built_at": mark.excluded.built_at}
+    ))
+    return result.rowcount
+
+
+def ensure_org_rollups(db: Session, org_id: str) -> None:
+    """Backfill rollups for an org that has never had a full rebuild.
+    
+    Rollup rows alone don't prove a backfill: campaigns created or deleted
+    before it leave partial (or negative) delta rows. The org's
+    ``org_rollup_state`` row does. Normally set for every org by running
+    ``python -m app.jobs.rebuild_rollups`` at deploy; this is the fallback.
+    """
+    built = db.query(OrgRollupState.built_at).filter(OrgRollupState.organization_id == org_id).scalar()
+    if built is not None:
+        return
+    
+    # Concurrent first reads: the exclusive org lock in the rebuild serializes them,
+    # and whoever goes second sees the marker and skips
+    _lock_orgs(db, org_id)
+    built = db.query(OrgRollupState.built_at).filter(OrgRollupState.organization_id == org_id).scalar()
+    if built is None:
+        rebuild_org_rollups(db, org_id)
+    db.commit()
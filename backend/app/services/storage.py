@@ -1,45 +1,146 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.client import Config
-from typing import BinaryIO
+from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict, Optional
+import asyncio
 import uuid
 from ..config import settings
 
-# Cloudflare R2 is S3-compatible
-s3_client = boto3.client(
-    's3',
-    endpoint_url=f'https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com',
-    aws_access_key_id=settings.R2_ACCESS_KEY_ID,
-    aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
-    config=Config(signature_version='s3v4'),
-    region_name='auto'
-)
+MB = 1024 * 1024
 
 
-async def upload_file(file: BinaryIO, filename: str, content_type: str) -> str:
-    """Upload file to R2 and return URL"""
+def make_s3_client():
+    # Cloudflare R2 is S3-compatible; STORAGE_ENDPOINT_URL points elsewhere (MinIO, S3, tests)
+    return boto3.client(
+        's3',
+        endpoint_url=settings.STORAGE_ENDPOINT_URL or f'https://{settings.R2_ACCOUNT_ID}.r2.cloudflarestorage.com',
+        aws_access_key_id=settings.R2_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+        config=Config(signature_version='s3v4'),
+        region_name=settings.STORAGE_REGION
+    )
+
+
+class ObjectStorage:
+    """Non-blocking object storage for creatives.
+    
+    boto3 is synchronous, so transfers run on a dedicated, bounded thread pool
+    (``max_transfers`` uploads at once). Each upload streams the file in
+    ``part_size`` parts with up to ``max_concurrency`` parts in flight,
+    instead of blocking the event loop for the whole transfer. Presigned PUT
+    URLs let clients upload directly, bypassing the API process entirely.
+    """
+    
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        public_base_url: str,
+        part_size: int = 8 * MB,
+        max_concurrency: int = 4,
+        max_transfers: int = 4
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip('/')
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=max_concurrency
+        )
+        self._executor = ThreadPoolExecutor(max_workers=max_transfers, thread_name_prefix="storage")
+    
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(*args, **kwargs))
+    
+    @staticmethod
+    def make_key(filename: str, prefix: str = "") -> str:
+        """Unique object key, keeping the upload's extension"""
+        file_extension = (filename or "").rsplit('.', 1)[-1].lower() if '.' in (filename or "") else "bin"
+        key = f"{uuid.uuid4()}.{file_extension}"
+        return f"{prefix}/{key}" if prefix else key
+    
+    def public_url(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+    
+    def key_from_url(self, file_url: str) -> str:
+        if file_url.startswith(self.public_base_url + '/'):
+            return file_url[len(self.public_base_url) + 1:]
+        return file_url.split('/')[-1]  # URLs from before keys were prefixed
     
-    # Generate unique filename
-    file_extension = filename.split('.')[-1]
-    unique_filename = f"{uuid.uuid4()}.{file_extension}"
+    async def upload(self, file: BinaryIO, key: str, content_type: str) -> str:
+        """Stream ``file`` to ``key`` in parts; returns the public URL"""
+        await self._run(
+            self.client.upload_fileobj,
+            file,
+            self.bucket,
+            key,
+            ExtraArgs={'ContentType': content_type},
+            Config=self.transfer_config
+        )
+        return self.public_url(key)
     
-    # Upload to R2
-    s3_client.upload_fileobj(
-        file,
+    async def head(self, key: str) -> Optional[Dict[str, Any]]:
+        """Size and content type of ``key``, or None if it doesn't exist"""
+        try:
+            response = await self._run(self.client.head_object, Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+        return {"size": response['ContentLength'], "content_type": response.get('ContentType')}
+    
+    async def delete(self, key: str) -> None:
+        await self._run(self.client.delete_object, Bucket=self.bucket, Key=key)
+    
+    def presigned_put_url(
+        self,
+        key: str,
+        content_type: str,
+        expires_in: int = 900,
+        checksum_sha256: Optional[str] = None
+    ) -> str:
+        """URL a client can PUT the object to directly (signing is local, no network call).
+        
+        With ``checksum_sha256`` (base64) the client must send it as
+        x-amz-checksum-sha256, and storage rejects bytes that don't match.
+        """
+        params = {'Bucket': self.bucket, 'Key': key, 'ContentType': content_type}
+        if checksum_sha256:
+            params['ChecksumSHA256'] = checksum_sha256
+        return self.client.generate_presigned_url('put_object', Params=params, ExpiresIn=expires_in)
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+@lru_cache()
+def get_storage() -> ObjectStorage:
+    return ObjectStorage(
+        make_s3_client(),
         settings.R2_BUCKET_NAME,
-        unique_filename,
-        ExtraArgs={'ContentType': content_type}
+        settings.STORAGE_PUBLIC_URL or f"https://{settings.R2_BUCKET_NAME}.{settings.R2_ACCOUNT_ID}.r2.dev",
+        part_size=settings.STORAGE_PART_SIZE_MB * MB,
+        max_concurrency=settings.STORAGE_PART_CONCURRENCY,
+        max_transfers=settings.STORAGE_MAX_TRANSFERS
     )
-    
-    # Return public URL
-    return f"https://{settings.R2_BUCKET_NAME}.{settings.R2_ACCOUNT_ID}.r2.dev/{unique_filename}"
+
+
+async def upload_file(file: BinaryIO, filename: str, content_type: str, prefix: str = "") -> str:
+    """Upload file to R2 and return URL"""
+    storage = get_storage()
+    return await storage.upload(file, storage.make_key(filename, prefix), content_type)
 
 
 async def delete_file(file_url: str) -> bool:
     """Delete file from R2"""
     try:
-        # Extract filename from URL
-        filename = file_url.split('/')[-1]
-        s3_client.delete_object(Bucket=settings.R2_BUCKET_NAME, Key=filename)
+        storage = get_storage()
+        await storage.delete(storage.key_from_url(file_url))
         return True
     except Exception:
         return False
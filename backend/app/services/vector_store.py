@@ -0,0 +1,666 @@
+"""
+Pluggable vector storage for document chunks.
+
+``ChromaVectorStore`` talks to the Chroma server over HTTP, with a collection
+per organization. ``LocalVectorStore`` keeps an in-process index on local
+disk: one partition per organization, each a memory-mapped float32 matrix
+plus a SQLite table of ids, text and metadata. Search is exact (normalized
+dot product) unless VECTOR_STORE_INDEX=hnsw and hnswlib is installed.
+
+Either way a query only touches the requesting organization's vectors; the
+partition name is recorded in ``Document.chroma_namespace``.
+
+The API and the ingestion worker can share a local store directory: writers
+bump a version counter in each partition and readers re-sync when it changes.
+Local partitions are compacted once enough of their rows are tombstones.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from ..config import settings
+from .embeddings import embed_query
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """Chunk vector storage partitioned by organization.
+    
+    ``query`` returns hits as dicts with id, document, metadata and a cosine
+    distance (0 = identical), best first.
+    """
+    
+    def upsert(
+        self,
+        org_id: str,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]]
+    ) -> None:
+        raise NotImplementedError
+    
+    def delete_document(self, org_id: str, document_id: str, namespace: Optional[str] = None) -> None:
+        """Remove a document's chunks; ``namespace`` is where they were written, if known"""
+        raise NotImplementedError
+    
+    def query(self, org_id: str, embedding: Sequence[float], n_results: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+    
+    def document_chunks(self, org_id: str, document_id: str, namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        """A document's chunks as dicts with id, document and metadata, in chunk order"""
+        raise NotImplementedError
+    
+    def namespace(self, org_id: str) -> str:
+        """Name of the partition holding ``org_id``'s vectors (Document.chroma_namespace)"""
+        return str(org_id)
+    
+    def flush(self) -> None:
+        """Persist any buffered index state"""
+    
+    def compact(self, org_id: Optional[str] = None) -> int:
+        """Reclaim space held by deleted or replaced chunks; returns rows reclaimed"""
+        return 0
+    
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class ChromaVectorStore(VectorStore):
+    """Chroma over HTTP, with one collection per organization.
+    
+    With ``per_org=False`` every tenant shares ``collection_name`` and queries
+    filter on organization_id metadata (the original layout, kept for
+    deployments that haven't run app.jobs.repartition_vectors yet).
+    """
+    
+    def __init__(self, host: str, port: int, collection_name: str, per_org: bool = True, client=None):
+        self.host = host
+        self.port = port
+        self.collection_name = collection_name
+        self.per_org = per_org
+        self.client = client
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+    
+    def namespace(self, org_id: str) -> str:
+        if not self.per_org:
+            return self.collection_name
+        # Chroma names allow 3-63 alphanumerics, '_' and '-'
+        return f"{self.collection_name}_{str(org_id).replace('-', '')}"[:63]
+    
+    def get_collection(self, namespace: str, create: bool = True):
+        """Collection for ``namespace``, or None if it doesn't exist and ``create`` is False"""
+        with self._lock:
+            collection = self._collections.get(namespace)
+            if collection is not None:
+                return collection
+            
+            from .embeddings import get_embedding_function
+            
+            if self.client is None:
+                import chromadb
+                from chromadb.config import Settings as ChromaSettings
+                
+                self.client = chromadb.HttpClient(
+                    host=self.host,
+                    port=self.port,
+                    settings=ChromaSettings(anonymized_telemetry=False)
+                )
+            if create:
+                # Only newly created collections get cosine space; existing ones keep theirs
+                collection = self.client.get_or_create_collection(
+                    name=namespace,
+                    embedding_function=get_embedding_function(),
+                    metadata={"description": "Marketing documents and knowledge base", "hnsw:space": "cosine"}
+                )
+            else:
+                try:
+                    collection = self.client.get_collection(name=namespace, embedding_function=get_embedding_function())
+                except ValueError:
+                    return None
+            self._collections[namespace] = collection
+            return collection
+    
+    def upsert(self, org_id, ids, embeddings, documents, metadatas):
+        self.get_collection(self.namespace(org_id)).upsert(
+            ids=list(ids), embeddings=list(embeddings), documents=list(documents), metadatas=list(metadatas)
+        )
+    
+    def delete_document(self, org_id, document_id, namespace=None):
+        collection = self.get_collection(namespace or self.namespace(org_id), create=False)
+        if collection is not None:
+            collection.delete(where={"document_id": str(document_id)})
+    
+    def document_chunks(self, org_id, document_id, namespace=None):
+        collection = self.get_collection(namespace or self.namespace(org_id), create=False)
+        if collection is None:
+            return []
+        page = collection.get(where={"document_id": str(document_id)}, include=["documents", "metadatas"])
+        chunks = [
+            {"id": chunk_id, "document": document, "metadata": metadata or {}}
+            for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+        ]
+        return sorted(chunks, key=lambda chunk: chunk["metadata"].get("chunk_index", 0))
+    
+    def query(self, org_id, embedding, n_results):
+        collection = self.get_collection(self.namespace(org_id), create=False)
+        if collection is None:
+            return []
+        
+        # Chroma clamps n_results to the collection size itself
+        results = collection.query(
+            query_embeddings=[list(embedding)],
+            n_results=n_results,
+            where=None if self.per_org else {"organization_id": str(org_id)}
+        )
+        
+        # Squared L2 between unit vectors is twice the cosine distance
+        scale = 0.5 if (collection.metadata or {}).get("hnsw:space", "l2") == "l2" else 1.0
+        
+        hits = []
+        if results["ids"] and results["ids"][0]:
+            for i, chunk_id in enumerate(results["ids"][0]):
+                hits.append({
+                    "id": chunk_id,
+                    "document": results["documents"][0][i],
+                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
+                    "distance": results["distances"][0][i] * scale if results["distances"] else 0.0
+                })
+        return hits
+    
+    def stats(self):
+        return {
+            "backend": "chroma",
+            "per_org": self.per_org,
+            "collections_open": len(self._collections)
+        }
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _Partition:
+    """One organization's vectors: ``vectors.f32`` (rows x dim) + ``meta.sqlite3``.
+    
+    Rows are append-only; upserts and deletes tombstone old rows (live = 0).
+    ``compact`` rewrites the live rows contiguously into a new generation of
+    the vectors file (``vectors.<n>.f32``) and renumbers them; other
+    processes see the generation change and remap, rebuilding any ANN index.
+    """
+    
+    MIN_CAPACITY = 1024
+    
+    def __init__(self, directory: str, use_hnsw: bool = False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.generation: Optional[int] = None
+        self.vectors_path = self._vectors_path(0)
+        self.hnsw_path = self._hnsw_path(0)
+        self.use_hnsw = use_hnsw
+        self.lock = threading.Lock()
+        
+        # Autocommit mode; writes take an explicit BEGIN IMMEDIATE so processes serialize
+        self.conn = sqlite3.connect(
+            os.path.join(directory, "meta.sqlite3"), timeout=30,
+            isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "row INTEGER PRIMARY KEY, id TEXT NOT NULL, document_id TEXT, "
+            "document TEXT, metadata TEXT, live INTEGER NOT NULL DEFAULT 1)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_id ON chunks (id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_chunks_document ON chunks (document_id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)")
+        
+        self.version = -1
+        self.dim: Optional[int] = None
+        self.rows = 0
+        self.capacity = 0
+        self.matrix: Optional[np.memmap] = None
+        self.live = np.zeros(0, dtype=bool)
+        self.ann = None
+        self.ann_live = np.zeros(0, dtype=bool)
+        self.ann_dirty = False
+    
+    def _state(self, key: str) -> Optional[int]:
+        row = self.conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _vectors_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"vectors.{generation}.f32" if generation else "vectors.f32")
+    
+    def _hnsw_path(self, generation: int) -> str:
+        return os.path.join(self.directory, f"hnsw.{generation}.bin" if generation else "hnsw.bin")
+    
+    def _sync_generation(self) -> None:
+        """Switch to the current vectors file if a compaction replaced it"""
+        generation = self._state("generation") or 0
+        if generation == self.generation:
+            return
+        self.generation = generation
+        self.vectors_path = self._vectors_path(generation)
+        self.hnsw_path = self._hnsw_path(generation)
+        self.matrix = None
+        self.capacity = 0
+        # Row numbers changed, so the ANN index is rebuilt from the new file
+        self.ann = None
+        self.ann_live = np.zeros(0, dtype=bool)
+        self.ann_dirty = False
+    
+    def _map(self) -> None:
+        """(Re)open the memmap if the file was grown, here or by another process"""
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        capacity = size // (4 * self.dim)
+        if capacity != self.capacity or self.matrix is None:
+            self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)) if capacity else None
+            self.capacity = capacity
+    
+    def _grow(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        capacity = max(self.MIN_CAPACITY, needed, self.capacity * 2)
+        self.matrix = None
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(capacity * self.dim * 4)
+        self._map()
+    
+    def refresh(self) -> None:
+        """Sync row count, tombstones and the ANN index with the latest committed version"""
+        version = self._state("version") or 0
+        if version == self.version:
+            return
+        self.dim = self._state("dim")
+        if self.dim is None:
+            self.version = version
+            return
+        
+        self._sync_generation()
+        self._map()
+        self.rows = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+        live = np.zeros(self.rows, dtype=bool)
+        live_rows = [r for (r,) in self.conn.execute("SELECT row FROM chunks WHERE live = 1")]
+        live[live_rows] = True
+        self.live = live
+        if self.use_hnsw:
+            self._sync_ann()
+        self.version = version
+    
+    def _sync_ann(self) -> None:
+        import hnswlib
+        
+        if self.ann is None:
+            self.ann = hnswlib.Index(space="ip", dim=self.dim)
+            if os.path.exists(self.hnsw_path):
+                self.ann.load_index(self.hnsw_path, max_elements=max(self.rows, self.MIN_CAPACITY))
+            else:
+                self.ann.init_index(max_elements=max(self.rows, self.MIN_CAPACITY), ef_construction=200, M=16)
+            self.ann_live = np.ones(self.ann.get_current_count(), dtype=bool)
+        
+        # Index rows appended since the last sync (labels are row numbers)
+        indexed = self.ann.get_current_count()
+        if self.rows > indexed:
+            if self.rows > self.ann.get_max_elements():
+                self.ann.resize_index(max(self.rows, self.ann.get_max_elements() * 2))
+            self.ann.add_items(np.asarray(self.matrix[indexed:self.rows]), np.arange(indexed, self.rows))
+            self.ann_live = np.concatenate([self.ann_live, np.ones(self.rows - indexed, dtype=bool)])
+            self.ann_dirty = True
+        
+        for row in np.flatnonzero(self.ann_live[:self.rows] & ~self.live):
+            try:
+                self.ann.mark_deleted(int(row))
+            except RuntimeError:
+                pass  # Already deleted in a persisted index
+            self.ann_live[row] = False
+            self.ann_dirty = True
+    
+    def upsert(self, ids, vectors: np.ndarray, documents, metadatas) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            dim = self._state("dim")
+            if dim is None:
+                self.conn.execute("INSERT INTO state (key, value) VALUES ('dim', ?)", (vectors.shape[1],))
+                dim = vectors.shape[1]
+            elif dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {dim}")
+            if self.dim != dim:
+                self.dim = dim
+                self.matrix = None
+            # Another process may have grown (or compacted) the file since we last mapped it
+            self._sync_generation()
+            self._map()
+            
+            start = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+            self._grow(start + len(ids))
+            self.matrix[start:start + len(ids)] = vectors
+            self.matrix.flush()
+            
+            self.conn.executemany("UPDATE chunks SET live = 0 WHERE id = ? AND live = 1", [(i,) for i in ids])
+            self.conn.executemany(
+                "INSERT INTO chunks (row, id, document_id, document, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (start + i, chunk_id, metadata.get("document_id"), document, json.dumps(metadata))
+                    for i, (chunk_id, document, metadata) in enumerate(zip(ids, documents, metadatas))
+                ]
+            )
+            self._bump_version()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+    
+    def delete_document(self, document_id: str) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("UPDATE chunks SET live = 0 WHERE document_id = ? AND live = 1", (document_id,))
+        self._bump_version()
+        self.conn.execute("COMMIT")
+    
+    def dead_rows(self) -> int:
+        return self.rows - int(self.live.sum())
+    
+    def compact(self) -> int:
+        """Rewrite the live rows into a new vectors file and drop tombstones; returns rows reclaimed"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.dim = self._state("dim")
+            if self.dim is None:
+                self.conn.execute("ROLLBACK")
+                return 0
+            self._sync_generation()
+            self._map()
+            
+            total = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM chunks").fetchone()[0]
+            live_rows = [r for (r,) in self.conn.execute("SELECT row FROM chunks WHERE live = 1 ORDER BY row")]
+            if len(live_rows) == total:
+                self.conn.execute("ROLLBACK")
+                return 0
+            
+            # The new file is complete before the generation switches, so a crash leaves the old one in use
+            old_generation = self.generation
+            generation = old_generation + 1
+            vectors_path = self._vectors_path(generation)
+            compacted = np.memmap(
+                vectors_path, dtype=np.float32, mode="w+",
+                shape=(max(self.MIN_CAPACITY, len(live_rows)), self.dim)
+            )
+            if live_rows:
+                compacted[:len(live_rows)] = self.matrix[live_rows]
+            compacted.flush()
+            del compacted
+            
+            # Ascending renumbering never collides: each live row moves to a slot at or below its own
+            self.conn.execute("DELETE FROM chunks WHERE live = 0")
+            self.conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new, old) for new, old in enumerate(live_rows) if new != old]
+            )
+            self.conn.execute(
+                "INSERT INTO state (key, value) VALUES ('generation', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (generation,)
+            )
+            self._bump_version()
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            if "vectors_path" in locals() and os.path.exists(vectors_path):
+                os.remove(vectors_path)
+            raise
+        
+        self.matrix = None
+        for path in (self._vectors_path(old_generation), self._hnsw_path(old_generation)):
+            if os.path.exists(path):
+                os.remove(path)
+        self.refresh()
+        return total - len(live_rows)
+    
+    def _bump_version(self) -> None:
+        self.conn.execute(
+            "INSERT INTO state (key, value) VALUES ('version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+    
+    def search(self, query: np.ndarray, k: int) -> List[tuple]:
+        """Top-k (row, similarity) pairs among live rows"""
+        live_count = int(self.live.sum())
+        k = min(k, live_count)
+        if k == 0:
+            return []
+        
+        if self.ann is not None:
+            self.ann.set_ef(max(64, k))
+            labels, distances = self.ann.knn_query(query, k=k)
+            return [(int(row), 1.0 - float(d)) for row, d in zip(labels[0], distances[0])]
+        
+        scores = np.asarray(self.matrix[:self.rows] @ query)
+        scores[~self.live] = -np.inf
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+    
+    def fetch(self, rows: Sequence[int]) -> Dict[int, tuple]:
+        placeholders = ",".join("?" * len(rows))
+        return {
+            row: (chunk_id, document, json.loads(metadata))
+            for row, chunk_id, document, metadata in self.conn.execute(
+                f"SELECT row, id, document, metadata FROM chunks WHERE row IN ({placeholders})", list(rows)
+            )
+        }
+    
+    def document_chunks(self, document_id: str) -> List[tuple]:
+        return [
+            (chunk_id, document, json.loads(metadata))
+            for chunk_id, document, metadata in self.conn.execute(
+                "SELECT id, document, metadata FROM chunks WHERE document_id = ? AND live = 1 ORDER BY row",
+                (document_id,)
+            )
+        ]
+    
+    def save_ann(self) -> None:
+        if self.ann is not None and self.ann_dirty:
+            self.ann.save_index(self.hnsw_path)
+            self.ann_dirty = False
+
+
+class LocalVectorStore(VectorStore):
+    """In-process vector index persisted under ``path``, one partition per organization"""
+    
+    def __init__(self, path: str, index: str = "exact", compact_ratio: float = 0.3, compact_min_rows: int = 1024):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_rows = compact_min_rows
+        self.compactions = 0
+        self.use_hnsw = index == "hnsw"
+        if self.use_hnsw:
+            try:
+                import hnswlib  # noqa: F401
+            except ImportError:
+                logger.warning("hnswlib is not installed; falling back to exact search")
+                self.use_hnsw = False
+        self._partitions: Dict[str, _Partition] = {}
+        self._lock = threading.Lock()
+    
+    def _partition(self, org_id: str) -> _Partition:
+        org_id = str(org_id)
+        with self._lock:
+            partition = self._partitions.get(org_id)
+            if partition is None:
+                partition = _Partition(os.path.join(self.path, org_id), use_hnsw=self.use_hnsw)
+                self._partitions[org_id] = partition
+            return partition
+    
+    def upsert(self, org_id, ids, embeddings, documents, metadatas):
+        if not ids:
+            return
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        partition = self._partition(org_id)
+        with partition.lock:
+            partition.upsert(list(ids), vectors, list(documents), list(metadatas))
+            partition.refresh()
+            self._maybe_compact(partition)
+    
+    def delete_document(self, org_id, document_id, namespace=None):
+        partition = self._partition(org_id)
+        with partition.lock:
+            partition.delete_document(str(document_id))
+            partition.refresh()
+            self._maybe_compact(partition)
+    
+    def document_chunks(self, org_id, document_id, namespace=None):
+        partition = self._partition(org_id)
+        with partition.lock:
+            chunks = partition.document_chunks(str(document_id))
+        return [{"id": chunk_id, "document": document, "metadata": metadata} for chunk_id, document, metadata in chunks]
+    
+    def _maybe_compact(self, partition: _Partition) -> None:
+        """Compact once tombstones are both numerous and a large share of the rows (caller holds the lock)"""
+        dead = partition.dead_rows()
+        if dead >= self.compact_min_rows and dead >= self.compact_ratio * partition.rows:
+            reclaimed = partition.compact()
+            if reclaimed:
+                self.compactions += 1
+                logger.info("Compacted %s: reclaimed %d rows", partition.directory, reclaimed)
+    
+    def compact(self, org_id=None):
+        """Compact one organization's partition, or every partition on disk, regardless of thresholds"""
+        if org_id is not None:
+            org_ids = [str(org_id)]
+        elif os.path.isdir(self.path):
+            org_ids = [name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name))]
+        else:
+            org_ids = []
+        reclaimed = 0
+        for name in org_ids:
+            partition = self._partition(name)
+            with partition.lock:
+                reclaimed += partition.compact()
+        return reclaimed
+    
+    def query(self, org_id, embedding, n_results):
+        query = _normalize(np.asarray(embedding, dtype=np.float32))
+        partition = self._partition(org_id)
+        with partition.lock:
+            partition.refresh()
+            if partition.dim is None:
+                return []
+            ranked = partition.search(query, n_results)
+            rows = partition.fetch([row for row, _ in ranked]) if ranked else {}
+        
+        return [
+            {
+                "id": rows[row][0],
+                "document": rows[row][1],
+                "metadata": rows[row][2],
+                "distance": 1.0 - similarity
+            }
+            for row, similarity in ranked
+            if row in rows
+        ]
+    
+    def flush(self):
+        for partition in list(self._partitions.values()):
+            with partition.lock:
+                partition.save_ann()
+    
+    def stats(self):
+        with self._lock:
+            partitions = list(self._partitions.values())
+        return {
+            "backend": "local",
+            "index": "hnsw" if self.use_hnsw else "exact",
+            "partitions": len(partitions),
+            "live_vectors": sum(int(p.live.sum()) for p in partitions),
+            "rows": sum(p.rows for p in partitions),
+            "dead_rows": sum(p.dead_rows() for p in partitions),
+            "compactions": self.compactions,
+        }
+
+
+class AsyncVectorStore:
+    """Awaitable facade over a VectorStore.
+    
+    Chroma's client and the local index are blocking, so every call runs on a
+    dedicated, bounded thread pool. Slow vector queries then can't stall the
+    event loop or starve the default executor other handlers rely on.
+    """
+    
+    def __init__(self, store: VectorStore, max_workers: int = 8):
+        self.store = store
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-store")
+        self._in_flight = 0
+        self._peak_in_flight = 0
+    
+    async def _run(self, fn, *args):
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+    
+    def namespace(self, org_id: str) -> str:
+        return self.store.namespace(org_id)
+    
+    async def upsert(self, org_id, ids, embeddings, documents, metadatas) -> None:
+        await self._run(self.store.upsert, org_id, ids, embeddings, documents, metadatas)
+    
+    async def delete_document(self, org_id, document_id, namespace=None) -> None:
+        await self._run(self.store.delete_document, org_id, document_id, namespace)
+    
+    async def query(self, org_id, embedding, n_results) -> List[Dict[str, Any]]:
+        return await self._run(self.store.query, org_id, embedding, n_results)
+    
+    async def query_text(self, org_id: str, text: str, n_results: int) -> List[Dict[str, Any]]:
+        """Embed ``text`` and search, in a single hop to the pool"""
+        return await self._run(self._query_text, org_id, text, n_results)
+    
+    def _query_text(self, org_id, text, n_results):
+        return self.store.query(org_id, embed_query(text), n_results)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.store.stats(),
+            "max_workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight
+        }
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+@lru_cache()
+def get_vector_store() -> VectorStore:
+    """Vector store selected by VECTOR_STORE_BACKEND"""
+    if settings.VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore(
+            settings.VECTOR_STORE_PATH,
+            index=settings.VECTOR_STORE_INDEX,
+            compact_ratio=settings.VECTOR_STORE_COMPACT_RATIO,
+            compact_min_rows=settings.VECTOR_STORE_COMPACT_MIN_ROWS
+        )
+    return ChromaVectorStore(
+        settings.CHROMA_HOST,
+        settings.CHROMA_PORT,
+        settings.CHROMA_COLLECTION,
+        per_org=settings.CHROMA_PER_ORG_COLLECTIONS
+    )
+
+
+@lru_cache()
+def get_async_vector_store() -> AsyncVectorStore:
+    return AsyncVectorStore(get_vector_store(), max_workers=settings.VECTOR_STORE_MAX_WORKERS)
@@ -0,0 +1,8 @@
+"""Environment the benchmarks need before importing the app.
+
+Settings are validated at import; the benchmarks never touch the database.
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("JWT_SECRET", "benchmark")
@@ -0,0 +1,65 @@
+"""Wall time for N simultaneous chat retrievals: blocking vs. offloaded store calls.
+
+A fake store sleeps ``--latency-ms`` per query to stand in for the Chroma
+HTTP round-trip (embedding included). "blocking" calls it directly from the
+coroutine, as the chat handler used to, so every request on the event loop
+waits for the one before it; "offloaded" goes through AsyncVectorStore.
+
+Usage (from backend/):
+    python -m benchmarks.bench_chat_concurrency [--concurrency 1,8,32] [--latency-ms 50] [--workers 8]
+"""
+import argparse
+import asyncio
+import time
+
+from . import _env  # noqa: F401  (must precede the app imports)
+from app.services.vector_store import AsyncVectorStore, VectorStore
+
+HITS = [{"id": f"doc_bench_chunk_{i}", "document": "chunk", "metadata": {}, "distance": 0.1} for i in range(5)]
+
+
+class FakeChromaStore(VectorStore):
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    def query(self, org_id, embedding, n_results):
+        time.sleep(self.latency)
+        return HITS[:n_results]
+
+
+async def blocking_request(store: VectorStore):
+    return store.query("bench-org", [0.0], 5)
+
+
+async def offloaded_request(store: AsyncVectorStore):
+    return await store.query("bench-org", [0.0], 5)
+
+
+async def run(request, store, concurrency: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[request(store) for _ in range(concurrency)])
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    
+    store = FakeChromaStore(args.latency_ms / 1000)
+    async_store = AsyncVectorStore(store, max_workers=args.workers)
+    
+    print(f"{'requests':>8} {'blocking ms':>12} {'offloaded ms':>13} {'speedup':>8}")
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            blocking_ms = asyncio.run(run(blocking_request, store, concurrency))
+            offloaded_ms = asyncio.run(run(offloaded_request, async_store, concurrency))
+            print(f"{concurrency:>8} {blocking_ms:>12.1f} {offloaded_ms:>13.1f} {blocking_ms / offloaded_ms:>7.1f}x")
+    finally:
+        async_store.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Query latency for one tenant as other tenants' data grows.
+
+Compares the shared collection + organization_id filter with per-org
+collections. Uses an in-process Chroma (EphemeralClient) unless --chroma-url
+is given.
+
+Usage (from backend/):
+    python -m benchmarks.bench_tenant_isolation [--tenant-vectors 2000]
+        [--other-vectors 0,20000,100000] [--queries 200] [--chroma-url URL]
+"""
+import argparse
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from . import _env  # noqa: F401  (must precede the app imports)
+from app.services.vector_store import ChromaVectorStore
+
+TENANT = "tenant-0"
+OTHER_TENANTS = 10
+BATCH = 5000
+
+
+def make_client(chroma_url):
+    import chromadb
+    from chromadb.config import Settings as ChromaSettings
+    
+    if chroma_url:
+        url = urlparse(chroma_url)
+        return chromadb.HttpClient(host=url.hostname, port=url.port or 8000, settings=ChromaSettings(anonymized_telemetry=False))
+    return chromadb.EphemeralClient(settings=ChromaSettings(anonymized_telemetry=False, allow_reset=True))
+
+
+def unit_vectors(rng, n, dim):
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def add(store, org_id, vectors, offset):
+    for start in range(0, len(vectors), BATCH):
+        part = vectors[start:start + BATCH]
+        ids = [f"{org_id}_chunk_{offset + start + i}" for i in range(len(part))]
+        store.upsert(
+            org_id, ids, part.tolist(),
+            documents=[""] * len(part),
+            metadatas=[{"document_id": f"{org_id}-doc", "organization_id": org_id}] * len(part)
+        )
+
+
+def measure(store, queries, k):
+    store.query(TENANT, queries[0].tolist(), k)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.query(TENANT, query.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenant-vectors", type=int, default=2000)
+    parser.add_argument("--other-vectors", default="0,20000,100000", help="Cumulative vectors owned by other tenants")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chroma-url", default=None)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    queries = unit_vectors(rng, args.queries, args.dim)
+    client = make_client(args.chroma_url)
+    
+    layouts = {
+        "shared+filter": ChromaVectorStore("", 0, "bench_shared", per_org=False, client=client),
+        "per-org": ChromaVectorStore("", 0, "bench_org", per_org=True, client=client),
+    }
+    for store in layouts.values():
+        add(store, TENANT, unit_vectors(rng, args.tenant_vectors, args.dim), 0)
+    
+    print(f"tenant vectors: {args.tenant_vectors}, k={args.k}")
+    print(f"{'layout':>14} {'other tenants':>14} {'p50 ms':>8} {'p99 ms':>8}")
+    loaded = 0
+    try:
+        for target in [int(n) for n in args.other_vectors.split(",")]:
+            if target > loaded:
+                noise = unit_vectors(rng, target - loaded, args.dim)
+                per_tenant = np.array_split(noise, OTHER_TENANTS)
+                for store in layouts.values():
+                    for t, vectors in enumerate(per_tenant):
+                        add(store, f"tenant-{t + 1}", vectors, loaded)
+                loaded = target
+            for name, store in layouts.items():
+                p50, p99 = measure(store, queries, args.k)
+                print(f"{name:>14} {loaded:>14} {p50:>8.2f} {p99:>8.2f}")
+    finally:
+        for collection in client.list_collections():
+            if collection.name.startswith("bench_"):
+                client.delete_collection(collection.name)
+
+
+if __name__ == "__main__":
+    main()
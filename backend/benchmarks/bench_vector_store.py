@@ -0,0 +1,94 @@
+"""Query latency of the local vector store vs. the Chroma HTTP path.
+
+Indexes random unit vectors (MiniLM's 384 dims by default) for one
+organization and reports p50/p99 latency for top-k queries.
+
+Usage (from backend/):
+    python -m benchmarks.bench_vector_store [--sizes 10000,100000,1000000] [--queries 200]
+        [--index exact,hnsw] [--chroma-url http://localhost:8002]
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from . import _env  # noqa: F401  (must precede the app imports)
+from app.services.vector_store import ChromaVectorStore, LocalVectorStore
+
+ORG_ID = "bench-org"
+BATCH = 5000
+
+
+def make_vectors(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    return rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def load(store, vectors: np.ndarray) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(vectors), BATCH):
+        part = vectors[offset:offset + BATCH]
+        ids = [f"doc_bench_chunk_{offset + i}" for i in range(len(part))]
+        store.upsert(
+            ORG_ID, ids, part,
+            documents=[f"chunk {offset + i}" for i in range(len(part))],
+            metadatas=[{"document_id": "bench", "organization_id": ORG_ID, "chunk_index": offset + i} for i in range(len(part))]
+        )
+    store.flush()
+    return time.perf_counter() - start
+
+
+def measure(store, queries: np.ndarray, k: int):
+    store.query(ORG_ID, queries[0], k)  # Warm up (maps files, builds caches)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.query(ORG_ID, query, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index", default="exact,hnsw")
+    parser.add_argument("--chroma-url", default=None, help="Also benchmark a running Chroma server")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    queries = make_vectors(args.queries, args.dim, rng)
+    
+    print(f"{'backend':>12} {'vectors':>9} {'load s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        vectors = make_vectors(size, args.dim, rng)
+        
+        for index in args.index.split(","):
+            path = tempfile.mkdtemp(prefix="bench-vectors-")
+            try:
+                store = LocalVectorStore(path, index=index)
+                if index == "hnsw" and not store.use_hnsw:
+                    continue
+                load_s = load(store, vectors)
+                p50, p99 = measure(store, queries, args.k)
+                print(f"{'local-' + index:>12} {size:>9} {load_s:>8.1f} {p50:>8.2f} {p99:>8.2f}")
+            finally:
+                shutil.rmtree(path)
+        
+        if args.chroma_url:
+            url = urlparse(args.chroma_url)
+            store = ChromaVectorStore(url.hostname, url.port or 8000, f"bench_{size}")
+            try:
+                load_s = load(store, vectors)
+                p50, p99 = measure(store, queries, args.k)
+                print(f"{'chroma-http':>12} {size:>9} {load_s:>8.1f} {p50:>8.2f} {p99:>8.2f}")
+            finally:
+                store.client.delete_collection(f"bench_{size}")
+
+
+if __name__ == "__main__":
+    main()
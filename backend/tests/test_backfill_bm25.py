@@ -0,0 +1,45 @@
+import uuid
+
+from app.jobs.backfill_bm25 import backfill
+from app.models import Document
+from app.models.document import DocumentType
+from app.services.bm25 import BM25Index
+from app.services.vector_store import LocalVectorStore
+
+
+def add_document(db, store, org_id, texts, processed=True):
+    document = Document(
+        organization_id=org_id, name="playbook.txt", document_type=DocumentType.TXT, is_processed=processed
+    )
+    db.add(document)
+    db.commit()
+    store.upsert(
+        org_id,
+        [f"doc_{document.id}_chunk_{i}" for i in range(len(texts))],
+        [[1.0, float(i), 0.0] for i in range(len(texts))],
+        texts,
+        [{"document_id": str(document.id), "chunk_index": i} for i in range(len(texts))]
+    )
+    return document
+
+
+def test_backfill_indexes_existing_chunks_once(db, tmp_path):
+    """Test that processed documents become keyword-searchable and re-runs skip them"""
+    org_id = uuid.uuid4()
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    document = add_document(db, store, org_id, ["Spring sale for SKU-1042", "Brand voice guide"])
+    add_document(db, store, org_id, ["SKU-1042 draft"], processed=False)
+    
+    assert index.search(org_id, "sku-1042") == []
+    
+    totals = backfill(db, store, index, batch_size=1)
+    
+    assert totals == {"documents": 1, "chunks": 2, "skipped": 0}
+    hits = index.search(org_id, "sku-1042")
+    assert [h["id"] for h in hits] == [f"doc_{document.id}_chunk_0"]
+    assert hits[0]["metadata"] == {"document_id": str(document.id), "chunk_index": 0}
+    
+    assert backfill(db, store, index) == {"documents": 0, "chunks": 0, "skipped": 1}
+    assert backfill(db, store, index, reindex=True) == {"documents": 1, "chunks": 2, "skipped": 0}
+    assert len(index.search(org_id, "sku-1042")) == 1
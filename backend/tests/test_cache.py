@@ -0,0 +1,63 @@
+from app.services.cache import LRUCacheBackend, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    """Test that the LRU backend stays within max_entries"""
+    backend = LRUCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    backend.get("a")
+    backend.set("c", 3, ttl=60)
+    
+    assert backend.get("a") == 1
+    assert backend.get("b") is None
+    assert backend.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    """Test that cached responses expire"""
+    clock = FakeClock()
+    cache = ResponseCache(LRUCacheBackend(clock=clock), ttl=30)
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return {"total": len(calls)}
+    
+    assert cache.get_or_compute("org", "dashboard", None, compute) == {"total": 1}
+    assert cache.get_or_compute("org", "dashboard", None, compute) == {"total": 1}
+    clock.now = 31
+    assert cache.get_or_compute("org", "dashboard", None, compute) == {"total": 2}
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+def test_invalidate_org_only_affects_that_org():
+    """Test that invalidation is scoped to one organization"""
+    cache = ResponseCache(LRUCacheBackend(), ttl=30)
+    cache.get_or_compute("org-a", "dashboard", None, lambda: "a1")
+    cache.get_or_compute("org-b", "dashboard", None, lambda: "b1")
+    
+    cache.invalidate_org("org-a")
+    
+    assert cache.get_or_compute("org-a", "dashboard", None, lambda: "a2") == "a2"
+    assert cache.get_or_compute("org-b", "dashboard", None, lambda: "b2") == "b1"
+
+
+def test_params_are_part_of_the_key():
+    """Test that different endpoint parameters are cached separately"""
+    cache = ResponseCache(LRUCacheBackend(), ttl=30)
+    cache.get_or_compute("org", "campaign_roi", {"campaign_id": "1"}, lambda: 1)
+    
+    assert cache.get_or_compute("org", "campaign_roi", {"campaign_id": "2"}, lambda: 2) == 2
+    assert cache.get_or_compute("org", "campaign_roi", {"campaign_id": "1"}, lambda: 3) == 1
@@ -0,0 +1,68 @@
+from app.services import context_builder
+from app.services.context_builder import ContextBuilder
+
+
+def words(start, stop):
+    return " ".join(f"w{i}" for i in range(start, stop))
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_packs_best_chunks_and_recent_history_within_budget():
+    """Test budget packing: newest history, best chunks, nothing truncated"""
+    builder = ContextBuilder(max_tokens=120, history_max_tokens=30, counter=count_words)
+    chunks = [
+        {"content": words(0, 40), "relevance_score": 0.2},
+        {"content": words(100, 170), "relevance_score": 0.9},
+        {"content": words(200, 230), "relevance_score": 0.5},
+    ]
+    history = [{"role": "user", "content": words(300, 320)}, {"role": "assistant", "content": words(400, 410)}]
+    
+    built = builder.build("You are helpful.", "What now?", chunks, history)
+    
+    assert built["messages"][1:] == [history[1], {"role": "user", "content": "What now?"}]
+    assert [c["relevance_score"] for c in built["sources"]] == [0.9]
+    assert built["dropped"] == {"history_turns": 1, "duplicate_chunks": 0, "over_budget_chunks": 2}
+    assert built["tokens"]["total"] <= 120
+    assert built["tokens"]["history"] == 14
+
+
+def test_overlapping_chunks_are_deduplicated():
+    """Test that ingestion overlap is stripped and contained chunks are dropped"""
+    builder = ContextBuilder(max_tokens=1000, counter=count_words)
+    chunks = [
+        {"content": words(0, 40), "relevance_score": 0.9},
+        {"content": words(30, 70), "relevance_score": 0.8},
+        {"content": words(10, 20), "relevance_score": 0.7},
+    ]
+    
+    built = builder.build("System.", "Question?", chunks)
+    
+    assert [c["content"] for c in built["sources"]] == [words(0, 40), words(40, 70)]
+    assert built["dropped"]["duplicate_chunks"] == 1
+    assert "[Document 2]: w40 " in built["messages"][0]["content"]
+
+
+def test_containment_matches_whole_words_only():
+    """Test that a chunk is only dropped as contained when its words appear whole in another"""
+    builder = ContextBuilder(max_tokens=1000, counter=count_words)
+    chunks = [
+        {"content": "w11 w2 w3 w4", "relevance_score": 0.9},
+        {"content": "w1 w2 w3", "relevance_score": 0.8},
+        {"content": "w2 w3", "relevance_score": 0.7},
+    ]
+    
+    built = builder.build("System.", "Question?", chunks)
+    
+    assert [c["content"] for c in built["sources"]] == ["w11 w2 w3 w4", "w1 w2 w3"]
+    assert built["dropped"]["duplicate_chunks"] == 1
+
+
+def test_fallback_estimate_overcounts(monkeypatch):
+    """Test that without tiktoken the word estimate is padded by the safety margin"""
+    monkeypatch.setattr(context_builder, "_get_encoding", lambda name: None)
+    
+    assert context_builder.count_tokens("") == 0
+    assert context_builder.count_tokens("Internationalization isn't easy.") == 8  # 6 words/marks * 1.3
@@ -0,0 +1,143 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from app.config import settings
+from app.models import Creative, CreativeAnalysisJob, CreativeBlob, Prediction, StoredBlob
+from app.models.ingestion_job import JobStatus
+from app.services.creative_analysis import claim_next_job, enqueue_analysis, run_job, utcnow
+
+CONTENT_HASH = "ab" * 32
+
+
+class FakeMLClient:
+    """Answers each analysis, failing the ones named in ``failing``, and records what was called"""
+    
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+    
+    async def _answer(self, name):
+        self.calls.append(name)
+        if name in self.failing:
+            raise RuntimeError(f"{name} unavailable")
+        return {"model_version": f"{name}-test", "score": 0.5}
+    
+    def analyze_creative_quality(self, image_url):
+        return self._answer("quality")
+    
+    def detect_ai_image(self, image_url):
+        return self._answer("ai_image")
+    
+    def calculate_trust_score(self, campaign_id, text=None, image_url=None):
+        return self._answer("trust")
+
+
+def add_creative(db, org_id, analysis_results=None):
+    if db.get(StoredBlob, (org_id, CONTENT_HASH)) is None:
+        db.add(StoredBlob(organization_id=org_id, content_hash=CONTENT_HASH, key="k", ref_count=0,
+                          analysis_results=analysis_results))
+    creative = Creative(
+        organization_id=org_id,
+        campaign_id=uuid.uuid4(),
+        image_url="https://cdn.example.com/k.png",
+        blob_ref=CreativeBlob(organization_id=org_id, content_hash=CONTENT_HASH)
+    )
+    db.add(creative)
+    db.flush()
+    job = enqueue_analysis(db, creative)
+    db.commit()
+    return creative, job
+
+
+def run_next(db, client, worker_id="worker-a"):
+    job = claim_next_job(db, worker_id)
+    asyncio.run(run_job(db, job, client))
+    db.refresh(job)
+    return job
+
+
+def prediction_types(db, creative):
+    return sorted(p.prediction_type for p in db.query(Prediction).filter(Prediction.creative_id == creative.id))
+
+
+def test_partial_failure_requeues_and_retries_only_the_failed_call(db):
+    """Test that succeeded analyses are kept and the retry, after backoff, reruns only the failure"""
+    creative, _ = add_creative(db, uuid.uuid4())
+    
+    client = FakeMLClient(failing={"ai_image"})
+    job = run_next(db, client)
+    
+    assert sorted(client.calls) == ["ai_image", "quality", "trust"]
+    assert job.status == JobStatus.QUEUED
+    assert job.locked_by is None
+    assert "ai_image" in job.last_error
+    assert sorted(job.results) == ["quality", "trust"]
+    backoff = job.run_after.replace(tzinfo=None) - utcnow().replace(tzinfo=None)  # SQLite drops the zone
+    assert timedelta(0) < backoff <= timedelta(seconds=settings.ANALYSIS_RETRY_BACKOFF_SECONDS)
+    assert claim_next_job(db, "worker-a") is None  # Still backing off
+    
+    job.run_after = utcnow()
+    db.commit()
+    client = FakeMLClient()
+    job = run_next(db, client)
+    
+    assert client.calls == ["ai_image"]
+    assert (job.status, job.attempts) == (JobStatus.SUCCEEDED, 2)
+    assert prediction_types(db, creative) == ["ai_image", "quality", "trust"]
+
+
+def test_job_fails_once_attempts_run_out(db):
+    """Test that the last failed attempt marks the job failed instead of requeueing it"""
+    creative, job = add_creative(db, uuid.uuid4())
+    job.max_attempts = 2
+    db.commit()
+    
+    client = FakeMLClient(failing={"trust"})
+    for _ in range(2):
+        job = run_next(db, client)
+        job.run_after = utcnow()
+        db.commit()
+    
+    assert (job.status, job.attempts) == (JobStatus.FAILED, 2)
+    assert "trust" in job.last_error
+    assert job.finished_at is not None
+    assert client.calls.count("trust") == 2
+    assert client.calls.count("quality") == 1
+    assert claim_next_job(db, "worker-a") is None
+
+
+def test_creatives_with_the_same_bytes_reuse_blob_analyses(db):
+    """Test that image-only analyses run once per blob and trust runs per creative"""
+    org_id = uuid.uuid4()
+    first, _ = add_creative(db, org_id)
+    second, _ = add_creative(db, org_id)
+    
+    client = FakeMLClient()
+    run_next(db, client)
+    run_next(db, client)
+    
+    assert sorted(client.calls) == ["ai_image", "quality", "trust", "trust"]
+    assert sorted(db.get(StoredBlob, (org_id, CONTENT_HASH)).analysis_results) == ["ai_image", "quality"]
+    assert prediction_types(db, first) == prediction_types(db, second) == ["ai_image", "quality", "trust"]
+
+
+def test_reclaimed_job_outcome_is_discarded(session_factory):
+    """Test that a worker whose job was reclaimed meanwhile records neither state nor predictions"""
+    db = session_factory()
+    creative, _ = add_creative(db, uuid.uuid4())
+    job = claim_next_job(db, "worker-a")
+    
+    class SlowMLClient(FakeMLClient):
+        async def _answer(self, name):
+            # Taken over by worker-b while the calls are in flight
+            with session_factory() as other:
+                other.query(CreativeAnalysisJob).update({CreativeAnalysisJob.locked_by: "worker-b"})
+                other.commit()
+            return await super()._answer(name)
+    
+    asyncio.run(run_job(db, job, SlowMLClient()))
+    
+    db.refresh(job)
+    assert (job.status, job.locked_by, job.results) == (JobStatus.RUNNING, "worker-b", {})
+    assert prediction_types(db, creative) == []
@@ -0,0 +1,36 @@
+from app.services.embedding_cache import EmbeddingCache
+
+
+def fake_embed(calls):
+    def compute(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+    return compute
+
+
+def test_only_new_chunks_are_embedded(tmp_path):
+    """Test that unchanged chunks are served from the cache"""
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"), model_id="m1")
+    calls = []
+    
+    cache.embed(["intro", "pricing"], fake_embed(calls))
+    vectors, hits, misses = cache.embed(["intro  ", "pricing", "new section"], fake_embed(calls))
+    
+    assert calls[-1] == ["new section"]
+    assert (hits, misses) == (2, 1)
+    assert vectors[0] == [5.0, 1.0]
+    
+    # A different model never reuses another model's vectors
+    other = EmbeddingCache(str(tmp_path / "emb.sqlite3"), model_id="m2")
+    assert other.embed(["intro"], fake_embed(calls))[1:] == (0, 1)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    """Test that the cache stays within max_entries"""
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite3"), model_id="m1", max_entries=10)
+    cache.embed([f"chunk {i}" for i in range(10)], fake_embed([]))
+    cache.embed(["chunk 0"], fake_embed([]))
+    cache.embed(["chunk 10"], fake_embed([]))
+    
+    assert cache.stats()["size"] <= 10
+    assert cache.embed(["chunk 0"], fake_embed([]))[1] == 1
@@ -0,0 +1,26 @@
+import io
+
+from app.services.ingestion import chunk_text, iter_text_file
+
+
+def test_chunks_overlap_and_cover_all_tokens():
+    """Test that chunks are token-bounded and share the configured overlap"""
+    words = [f"w{i}" for i in range(25)]
+    chunks = list(chunk_text([" ".join(words)], chunk_tokens=10, overlap_tokens=3))
+    
+    assert [c.split() for c in chunks] == [words[0:10], words[7:17], words[14:24], words[21:25]]
+
+
+def test_words_split_across_pieces_are_rejoined():
+    """Test that streamed pieces ending mid-word don't split tokens"""
+    chunks = list(chunk_text(["alpha be", "ta gam", "ma"], chunk_tokens=10, overlap_tokens=2))
+    
+    assert chunks == ["alpha beta gamma"]
+
+
+def test_text_file_decodes_multibyte_characters_across_blocks(monkeypatch):
+    """Test that UTF-8 sequences split between read blocks decode cleanly"""
+    monkeypatch.setattr("app.services.ingestion.READ_BLOCK_SIZE", 3)
+    text = "café naïve résumé"
+    
+    assert "".join(iter_text_file(io.BytesIO(text.encode("utf-8")))) == text
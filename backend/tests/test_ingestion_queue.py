@@ -0,0 +1,87 @@
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from app.config import settings
+from app.models import Document, IngestionJob
+from app.models.document import DocumentType
+from app.models.ingestion_job import JobStatus
+from app.services import ingestion_queue
+from app.services.ingestion import IngestionAborted
+from app.services.ingestion_queue import claim_next_job, enqueue_ingestion, finish_job, run_job, utcnow
+
+
+def add_job(db, tmp_path, run_after=None):
+    document = Document(organization_id=uuid.uuid4(), name="brief.txt", document_type=DocumentType.TXT)
+    db.add(document)
+    db.flush()
+    
+    spool_path = tmp_path / f"{document.id.hex}.txt"
+    spool_path.write_text("campaign brief")
+    job = enqueue_ingestion(db, document, str(spool_path))
+    if run_after is not None:
+        job.run_after = run_after
+    db.commit()
+    return job
+
+
+def test_due_jobs_are_claimed_once(db, tmp_path):
+    """Test that claims skip jobs in backoff and never hand out a running job twice"""
+    due = add_job(db, tmp_path)
+    add_job(db, tmp_path, run_after=utcnow() + timedelta(hours=1))
+    
+    job = claim_next_job(db, "worker-a")
+    
+    assert job.id == due.id
+    assert (job.status, job.locked_by, job.attempts) == (JobStatus.RUNNING, "worker-a", 1)
+    assert claim_next_job(db, "worker-b") is None
+
+
+def test_stale_jobs_are_reclaimed_and_the_old_worker_cannot_finish_them(session_factory, tmp_path):
+    """Test that an unrenewed lease is taken over and the previous owner's outcome is discarded"""
+    db_a, db_b = session_factory(), session_factory()
+    job_id = add_job(db_a, tmp_path).id
+    stale = claim_next_job(db_a, "worker-a")
+    
+    assert claim_next_job(db_b, "worker-b") is None
+    
+    db_b.query(IngestionJob).update(
+        {IngestionJob.locked_at: utcnow() - timedelta(seconds=settings.INGEST_LOCK_TIMEOUT_SECONDS + 1)}
+    )
+    db_b.commit()
+    reclaimed = claim_next_job(db_b, "worker-b")
+    
+    assert reclaimed.id == job_id
+    assert (reclaimed.locked_by, reclaimed.attempts) == ("worker-b", 2)
+    
+    assert finish_job(db_a, stale, "worker-a", JobStatus.SUCCEEDED) is False
+    db_b.refresh(reclaimed)
+    assert (reclaimed.status, reclaimed.locked_by) == (JobStatus.RUNNING, "worker-b")
+    assert os.path.exists(reclaimed.spool_path)  # Still needed by worker-b
+
+
+def test_losing_the_lease_aborts_the_run(session_factory, tmp_path, monkeypatch):
+    """Test that the heartbeat notices a takeover and run_job stops without recording anything"""
+    db = session_factory()
+    add_job(db, tmp_path)
+    job = claim_next_job(db, "worker-a")
+    monkeypatch.setattr(settings, "INGEST_LEASE_RENEW_SECONDS", 0.01)
+    
+    def ingest_while_reclaimed(db, document, fileobj, should_abort):
+        with session_factory() as other:
+            other.query(IngestionJob).update({IngestionJob.locked_by: "worker-b"})
+            other.commit()
+        deadline = time.monotonic() + 5
+        while not should_abort() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        if should_abort():
+            raise IngestionAborted("lease lost")
+        return {"chunks": 1, "embedding_cache_hits": 0, "embedding_cache_misses": 1}
+    
+    monkeypatch.setattr(ingestion_queue, "ingest_document", ingest_while_reclaimed)
+    run_job(db, job)
+    
+    db.refresh(job)
+    assert (job.status, job.locked_by, job.attempts, job.last_error) == (JobStatus.RUNNING, "worker-b", 1, None)
+    assert os.path.exists(job.spool_path)
@@ -0,0 +1,47 @@
+from app.services.cache import LRUCacheBackend
+from app.services.llm_cache import LLMResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def conversation(question, context="Campaign data: spend 100"):
+    return [{"role": "system", "content": context}, {"role": "user", "content": question}]
+
+
+def test_exact_layer_keys_on_model_messages_and_temperature():
+    """Test exact hits, misses on any key change, and expiry"""
+    clock = FakeClock()
+    cache = LLMResponseCache(LRUCacheBackend(clock=clock), ttl=60)
+    messages = conversation("Give me 3 insights")
+    cache.set("llama", messages, 0.7, {"content": "Cut spend", "model": "llama"})
+    
+    assert cache.get("llama", messages, 0.7) == {"content": "Cut spend", "model": "llama"}
+    assert cache.get("llama", messages, 0.2) is None
+    assert cache.get("mixtral", messages, 0.7) is None
+    assert cache.get("llama", conversation("Give me 3 insights", "Campaign data: spend 200"), 0.7) is None
+    clock.now = 61
+    assert cache.get("llama", messages, 0.7) is None
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_layer_matches_similar_questions_in_same_context():
+    """Test the similarity threshold, org/context isolation and LRU eviction"""
+    cache = LLMResponseCache(LRUCacheBackend(), ttl=60, semantic=True, similarity_threshold=0.9, semantic_max_entries=2)
+    cache.set_similar("org", conversation("best channel?"), [1.0, 0.0], {"content": "Instagram"})
+    
+    hit = cache.get_similar("org", conversation("which channel is best?"), [0.99, 0.05])
+    assert hit["content"] == "Instagram"
+    assert cache.get_similar("org", conversation("how much did we spend?"), [0.0, 1.0]) is None
+    assert cache.get_similar("other-org", conversation("best channel?"), [1.0, 0.0]) is None
+    assert cache.get_similar("org", conversation("best channel?", "Other context"), [1.0, 0.0]) is None
+    
+    cache.set_similar("org", conversation("q2"), [0.0, 1.0], {"content": "b"})
+    cache.set_similar("org", conversation("q3"), [-1.0, 0.0], {"content": "c"})
+    assert cache.stats()["semantic_entries"] == 2
+    assert cache.stats()["semantic_evictions"] == 1
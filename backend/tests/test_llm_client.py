@@ -0,0 +1,68 @@
+import asyncio
+import json
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.services.llm_client import LLMClient, LLMNotConfigured
+
+
+async def fake_completions(request):
+    """Minimal OpenAI-compatible /chat/completions"""
+    body = await request.json()
+    assert request.headers["authorization"] == "Bearer test-key"
+    words = ["Raise ", "the ", "Q3 ", "budget."]
+    
+    if not body.get("stream"):
+        return JSONResponse({
+            "model": body["model"],
+            "choices": [{"message": {"role": "assistant", "content": "".join(words)}}],
+            "usage": {"total_tokens": 12}
+        })
+    
+    async def chunks():
+        yield f"data: {json.dumps({'choices': [{'delta': {'role': 'assistant'}}]})}\n\n"
+        for word in words:
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': word}}]})}\n\n"
+        yield "data: [DONE]\n\n"
+    
+    return StreamingResponse(chunks(), media_type="text/event-stream")
+
+
+app = Starlette(routes=[Route("/v1/chat/completions", fake_completions, methods=["POST"])])
+
+
+def make_client(api_key="test-key"):
+    return LLMClient(
+        api_url="http://llm/v1/chat/completions",
+        api_key=api_key,
+        model="fake-model",
+        transport=httpx.ASGITransport(app=app)
+    )
+
+
+def test_complete_and_stream():
+    """Test a full completion and that streamed deltas reassemble it"""
+    client = make_client()
+    messages = [{"role": "user", "content": "What should I change?"}]
+    
+    async def run():
+        completion = await client.complete(messages)
+        deltas = [delta async for delta in client.stream(messages)]
+        await client.close()
+        return completion, deltas
+    
+    completion, deltas = asyncio.run(run())
+    assert completion == {"content": "Raise the Q3 budget.", "model": "fake-model", "usage": {"total_tokens": 12}}
+    assert deltas == ["Raise ", "the ", "Q3 ", "budget."]
+    assert client.stats()["first_token"]["count"] == 1
+
+
+def test_missing_api_key_is_rejected_before_calling():
+    """Test that an unconfigured client fails fast"""
+    client = make_client(api_key="")
+    assert not client.configured
+    with pytest.raises(LLMNotConfigured):
+        asyncio.run(client.complete([{"role": "user", "content": "hi"}]))
@@ -0,0 +1,91 @@
+import asyncio
+import httpx
+import pytest
+
+from app.services.ml_client import MLClient, MLServiceUnavailable
+
+
+def make_client(handler):
+    client = MLClient(base_url="http://ml", transport=httpx.MockTransport(handler))
+    client.retry_backoff = 0
+    return client
+
+
+def test_retries_transient_errors():
+    """Test that 503s are retried and the eventual success is returned"""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ai_probability": 0.1})
+    
+    client = make_client(handler)
+    result = asyncio.run(client.detect_ai_text("hello"))
+    
+    assert result == {"ai_probability": 0.1}
+    assert len(calls) == 3
+    assert client.stats()["latency"]["/detect/text"]["count"] == 3
+
+
+def test_client_errors_are_not_retried():
+    """Test that 4xx responses fail immediately without tripping the breaker"""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(422)
+    
+    client = make_client(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(client.detect_ai_text("hello"))
+    
+    assert len(calls) == 1
+    assert client.breaker.state == "closed"
+
+
+def test_circuit_breaker_fails_fast():
+    """Test that the breaker opens after repeated failures"""
+    calls = []
+    
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+    
+    client = make_client(handler)
+    client.breaker.failure_threshold = 2
+    
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(client.detect_ai_text("hello"))
+    calls_before = len(calls)
+    
+    with pytest.raises(MLServiceUnavailable):
+        asyncio.run(client.detect_ai_text("hello"))
+    
+    assert len(calls) == calls_before
+    assert client.breaker.state == "open"
+
+
+def test_cancelled_half_open_trial_reopens_breaker():
+    """Test that a half-open trial that never completes re-opens the breaker instead of sticking"""
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={})
+    
+    client = make_client(handler)
+    client.breaker.state = "open"
+    client.breaker.reset_timeout = 0
+    
+    async def run():
+        task = asyncio.create_task(client.detect_ai_text("hello"))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(run())
+    
+    assert client.breaker.state == "open"
+    assert client.breaker.allow()  # reset_timeout=0: the next call gets a fresh trial
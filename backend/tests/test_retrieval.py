@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+from app.services.bm25 import BM25Index
+from app.services.retrieval import HybridRetriever, LexicalReranker, reciprocal_rank_fusion
+from app.services.vector_store import AsyncVectorStore, VectorStore
+
+
+def index_chunks(index, org_id, document_id, texts):
+    index.add_chunks(
+        org_id,
+        [f"doc_{document_id}_chunk_{i}" for i in range(len(texts))],
+        texts,
+        [{"document_id": document_id, "chunk_index": i} for i in range(len(texts))]
+    )
+
+
+def test_bm25_matches_exact_skus_and_tracks_deletes(tmp_path):
+    """Test keyword scoring, SKU tokens and incremental deletes"""
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index_chunks(index, "org", "d1", [
+        "Spring sale playbook for SKU-1042 on Instagram",
+        "General guidance on brand voice and tone",
+    ])
+    index_chunks(index, "org", "d2", ["SKU-2077 bundle pricing"])
+    index_chunks(index, "other-org", "d3", ["SKU-1042 is also sold here"])
+    
+    assert [h["id"] for h in index.search("org", "pricing for sku-1042")] == ["doc_d1_chunk_0", "doc_d2_chunk_0"]
+    
+    index.delete_document("org", "d1")
+    assert [h["id"] for h in index.search("org", "sku-1042")] == []
+
+
+class SlowVectorStore(VectorStore):
+    def __init__(self, hits, delay):
+        self.hits = hits
+        self.delay = delay
+    
+    def query(self, org_id, embedding, n_results):
+        time.sleep(self.delay)
+        return self.hits
+
+
+def test_hybrid_retrieval_fuses_and_respects_budget(tmp_path, monkeypatch):
+    """Test RRF fusion, and that a search missing the budget is skipped"""
+    monkeypatch.setattr("app.services.vector_store.embed_query", lambda text: [1.0])
+    index = BM25Index(str(tmp_path / "bm25.sqlite3"))
+    index_chunks(index, "org", "d1", ["Q3 promo code SUMMER24 results", "unrelated text"])
+    vector_hits = [
+        {"id": "doc_d1_chunk_1", "document": "unrelated text", "metadata": {}, "distance": 0.1},
+        {"id": "doc_d1_chunk_0", "document": "Q3 promo code SUMMER24 results", "metadata": {}, "distance": 0.2},
+    ]
+    
+    retriever = HybridRetriever(AsyncVectorStore(SlowVectorStore(vector_hits, 0)), index, reranker=LexicalReranker(), budget_ms=1000)
+    result = asyncio.run(retriever.retrieve("org", "summer24 promo", k=2))
+    assert result["sources"] == ["keyword", "vector"]
+    assert result["reranked"]
+    assert result["results"][0]["id"] == "doc_d1_chunk_0"
+    
+    retriever = HybridRetriever(AsyncVectorStore(SlowVectorStore(vector_hits, 0.5)), index, budget_ms=100)
+    result = asyncio.run(retriever.retrieve("org", "summer24 promo", k=2))
+    assert result["skipped"] == ["vector"]
+    assert [h["id"] for h in result["results"]] == ["doc_d1_chunk_0"]
+
+
+def test_async_vector_store_runs_queries_concurrently():
+    """Test that simultaneous queries overlap on the pool instead of serializing"""
+    store = AsyncVectorStore(SlowVectorStore([], 0.2), max_workers=4)
+    
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*[store.query("org", [1.0], 5) for _ in range(4)])
+        return time.perf_counter() - start
+    
+    try:
+        assert asyncio.run(run()) < 0.6
+        assert store.stats()["peak_in_flight"] == 4
+    finally:
+        store.shutdown()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """Test that a hit ranked well by both searches beats a single first place"""
+    hit = lambda i: {"id": i, "document": "", "metadata": {}}
+    fused = reciprocal_rank_fusion({"vector": [hit("a"), hit("b")], "keyword": [hit("c"), hit("b")]})
+    
+    assert fused[0]["id"] == "b"
+    assert fused[0]["ranks"] == {"vector": 2, "keyword": 2}
@@ -0,0 +1,56 @@
+import asyncio
+import base64
+import hashlib
+import io
+import pytest
+
+moto = pytest.importorskip("moto")
+boto3 = pytest.importorskip("boto3")
+requests = pytest.importorskip("requests")
+
+from app.services.storage import MB, ObjectStorage  # noqa: E402
+
+BUCKET = "test-creatives"
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    mock = getattr(moto, "mock_aws", None) or moto.mock_s3
+    with mock():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        store = ObjectStorage(client, BUCKET, "https://cdn.example.com", part_size=5 * MB, max_concurrency=2)
+        yield store
+        store.shutdown()
+
+
+def test_multipart_upload_head_and_delete(storage):
+    """Test a multi-part upload off the event loop round-trips"""
+    data = bytes(range(256)) * (11 * MB // 256)  # Three 5MB parts
+    key = storage.make_key("banner.PNG", prefix="org-1")
+    
+    url = asyncio.run(storage.upload(io.BytesIO(data), key, "image/png"))
+    
+    assert key.startswith("org-1/") and key.endswith(".png")
+    assert url == f"https://cdn.example.com/{key}"
+    assert storage.key_from_url(url) == key
+    assert asyncio.run(storage.head(key)) == {"size": len(data), "content_type": "image/png"}
+    assert storage.client.get_object(Bucket=BUCKET, Key=key)["Body"].read() == data
+    
+    asyncio.run(storage.delete(key))
+    assert asyncio.run(storage.head(key)) is None
+
+
+def test_presigned_put_uploads_directly(storage):
+    """Test that a client can PUT to the presigned URL without the API"""
+    data = b"\xff\xd8 jpeg bytes"
+    checksum = base64.b64encode(hashlib.sha256(data).digest()).decode()
+    key = storage.make_key("ad.jpg", prefix="org-1")
+    url = storage.presigned_put_url(key, "image/jpeg", expires_in=60, checksum_sha256=checksum)
+    
+    response = requests.put(url, data=data, headers={"Content-Type": "image/jpeg", "x-amz-checksum-sha256": checksum})
+    
+    assert response.status_code == 200
+    assert asyncio.run(storage.head(key)) == {"size": 13, "content_type": "image/jpeg"}
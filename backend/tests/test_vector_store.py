@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from app.services.vector_store import LocalVectorStore
+
+
+def add_chunks(store, org_id, document_id, vectors):
+    ids = [f"doc_{document_id}_chunk_{i}" for i in range(len(vectors))]
+    store.upsert(
+        org_id, ids, vectors,
+        documents=[f"{document_id} text {i}" for i in range(len(vectors))],
+        metadatas=[{"document_id": document_id, "chunk_index": i} for i in range(len(vectors))]
+    )
+
+
+def test_local_store_queries_deletes_and_isolates_orgs(tmp_path):
+    """Test exact search, tombstone deletes and per-org partitions"""
+    store = LocalVectorStore(str(tmp_path))
+    add_chunks(store, "org-a", "d1", [[1, 0, 0], [0, 1, 0]])
+    add_chunks(store, "org-a", "d2", [[0.9, 0.1, 0]])
+    add_chunks(store, "org-b", "d3", [[1, 0, 0]])
+    
+    hits = store.query("org-a", [1, 0, 0], n_results=2)
+    assert [h["id"] for h in hits] == ["doc_d1_chunk_0", "doc_d2_chunk_0"]
+    assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-6)
+    
+    store.delete_document("org-a", "d1")
+    assert [h["id"] for h in store.query("org-a", [1, 0, 0], n_results=5)] == ["doc_d2_chunk_0"]
+    assert [h["metadata"]["document_id"] for h in store.query("org-b", [1, 0, 0], n_results=5)] == ["d3"]
+
+
+def test_writes_are_visible_to_other_store_instances(tmp_path):
+    """Test that a reader (e.g. the API) sees rows added by another process's store"""
+    writer = LocalVectorStore(str(tmp_path))
+    reader = LocalVectorStore(str(tmp_path))
+    add_chunks(writer, "org", "d1", [[0, 1]])
+    assert len(reader.query("org", [0, 1], n_results=5)) == 1
+    
+    # Upserting an existing id replaces it instead of duplicating it
+    rng = np.random.default_rng(0)
+    add_chunks(writer, "org", "d1", rng.normal(size=(2000, 2)).tolist())
+    hits = reader.query("org", [0, 1], n_results=5000)
+    assert len(hits) == 2000
+    assert len({h["id"] for h in hits}) == 2000
+
+
+def test_hnsw_index_matches_exact_search(tmp_path):
+    """Test the optional approximate index on a small, easy dataset"""
+    pytest.importorskip("hnswlib")
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(500, 16))
+    exact = LocalVectorStore(str(tmp_path / "exact"))
+    approx = LocalVectorStore(str(tmp_path / "hnsw"), index="hnsw")
+    for store in (exact, approx):
+        add_chunks(store, "org", "d1", vectors.tolist())
+        store.delete_document("org", "missing")
+    
+    query = vectors[42]
+    assert approx.query("org", query, 3)[0]["id"] == exact.query("org", query, 3)[0]["id"] == "doc_d1_chunk_42"
+
+
+def test_tombstones_are_compacted_away(tmp_path):
+    """Test that re-ingesting past the tombstone threshold rewrites the partition, visibly to other instances"""
+    writer = LocalVectorStore(str(tmp_path), compact_ratio=0.5, compact_min_rows=4)
+    reader = LocalVectorStore(str(tmp_path))
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(6, 4))
+    add_chunks(writer, "org", "d1", vectors.tolist())
+    add_chunks(writer, "org", "d2", [[1, 0, 0, 0]])
+    assert len(reader.query("org", [1, 0, 0, 0], n_results=10)) == 7
+    
+    # Re-ingesting d1 tombstones its 6 old rows: 6 of 13 dead is under the ratio
+    add_chunks(writer, "org", "d1", vectors.tolist())
+    assert writer.stats()["dead_rows"] == 6
+    
+    writer.delete_document("org", "d1")
+    stats = writer.stats()
+    assert (stats["rows"], stats["dead_rows"], stats["compactions"]) == (1, 0, 1)
+    assert not (tmp_path / "org" / "vectors.f32").exists()
+    
+    for store in (writer, reader):
+        hits = store.query("org", [1, 0, 0, 0], n_results=10)
+        assert [h["id"] for h in hits] == ["doc_d2_chunk_0"]
+        assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-6)
+    
+    # Writes after a compaction append to the new file
+    add_chunks(reader, "org", "d3", vectors[:2].tolist())
+    assert [h["id"] for h in writer.query("org", vectors[1], n_results=1)] == ["doc_d3_chunk_1"]
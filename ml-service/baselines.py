@@ -0,0 +1,174 @@
+"""Heuristic baseline models.
+
+Placeholders until trained models are registered; each scorer works on a
+batch of inputs and is wrapped into a loadable model by model_manager.
+"""
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from text_signals import text_detector
+
+
+# Engagement Prediction
+# Simple baseline model (replace with actual ML model)
+# Formula: engagement_rate = (clicks / impressions) * platform_factor
+PLATFORM_FACTORS = {
+    "instagram": 1.2,
+    "facebook": 1.0,
+    "youtube": 0.8,
+    "google_ads": 0.9,
+    "twitter": 1.1,
+    "linkedin": 0.7
+}
+BASE_CTR = 0.02  # 2% base CTR
+
+
+def score_engagement(platforms: List[str], impressions: List[int], version: str = "baseline-v1") -> List[Dict[str, Any]]:
+    """Score many campaigns at once using column-wise NumPy operations"""
+    
+    # Map platforms to factors once per distinct platform, then broadcast
+    unique_platforms, inverse = np.unique(
+        np.array([p.lower() for p in platforms]),
+        return_inverse=True
+    )
+    unique_factors = np.array(
+        [PLATFORM_FACTORS.get(p, 1.0) for p in unique_platforms],
+        dtype=np.float64
+    )
+    platform_factor = unique_factors[inverse]
+    
+    # Estimate clicks based on impressions and platform CTR
+    estimated_ctr = BASE_CTR * platform_factor
+    estimated_clicks = (np.asarray(impressions, dtype=np.float64) * estimated_ctr).astype(np.int64)
+    engagement_rate = np.round(estimated_ctr, 4)
+    
+    return [
+        {
+            "engagement_rate": float(rate),
+            "estimated_clicks": int(clicks),
+            "confidence": 0.75,
+            "model_version": version
+        }
+        for rate, clicks in zip(engagement_rate.tolist(), estimated_clicks.tolist())
+    ]
+
+
+# Trust Score Calculation
+def score_trust(text: Optional[str], image_url: Optional[str]) -> Dict[str, Any]:
+    """Trust score computation; a pure function of the normalized text and image"""
+    
+    # Initialize scores
+    authenticity_score = 1.0
+    factual_accuracy_score = 1.0
+    source_credibility_score = 1.0
+    transparency_score = 1.0
+    ethical_compliance_score = 1.0
+    
+    ai_text_probability = 0.0
+    ai_image_probability = 0.0
+    recommendations = []
+    
+    # AI Text Detection (simplified - replace with actual model)
+    if text:
+        # Simple heuristic: check for AI-like patterns
+        if text_detector.any_match(text):
+            ai_text_probability = 0.9
+            authenticity_score *= 0.7
+            recommendations.append("Disclose AI-generated content")
+        else:
+            ai_text_probability = 0.1
+    
+    # AI Image Detection (simplified - replace with actual model)
+    if image_url:
+        # Placeholder: would use actual AI detection model
+        ai_image_probability = 0.15  # Assume 15% chance
+        if ai_image_probability > 0.5:
+            authenticity_score *= 0.8
+            recommendations.append("Verify image authenticity")
+    
+    # Fact-checking (simplified - would integrate with fact-check APIs)
+    if text:
+        # Placeholder for fact-checking
+        factual_accuracy_score = 0.95
+    
+    # Calculate overall trust score (weighted average)
+    trust_score = (
+        authenticity_score * 0.30 +
+        factual_accuracy_score * 0.25 +
+        source_credibility_score * 0.20 +
+        transparency_score * 0.15 +
+        ethical_compliance_score * 0.10
+    ) * 100
+    
+    # Determine badge level
+    if trust_score >= 90:
+        badge_level = "high"
+    elif trust_score >= 70:
+        badge_level = "medium"
+    elif trust_score >= 50:
+        badge_level = "low"
+    else:
+        badge_level = "risk"
+    
+    return {
+        "trust_score": round(trust_score, 2),
+        "badge_level": badge_level,
+        "authenticity_score": round(authenticity_score, 2),
+        "factual_accuracy_score": round(factual_accuracy_score, 2),
+        "source_credibility_score": round(source_credibility_score, 2),
+        "transparency_score": round(transparency_score, 2),
+        "ethical_compliance_score": round(ethical_compliance_score, 2),
+        "ai_text_probability": round(ai_text_probability, 2),
+        "ai_image_probability": round(ai_image_probability, 2),
+        "fact_check_results": [],
+        "recommendations": recommendations
+    }
+
+
+# Creative Quality Analysis
+def score_creative(image: np.ndarray, version: str = "vit-v1") -> Dict[str, Any]:
+    # Placeholder: would run a Vision Transformer over the normalized (3, H, W) tensor
+    quality_score = 75  # 0-100
+    
+    suggestions = []
+    if quality_score < 50:
+        suggestions.append("Increase image contrast")
+        suggestions.append("Simplify text overlay")
+    
+    return {
+        "quality_score": quality_score,
+        "predicted_engagement": 0.035,
+        "suggestions": suggestions,
+        "model_version": version
+    }
+
+
+# AI Text Detection
+def score_ai_text(text: str, version: str = "roberta-v1") -> Dict[str, Any]:
+    # Simplified detection (replace with actual model like GPTZero)
+    matches = text_detector.find(text)
+    ai_probability = 0.9 if matches else 0.1
+    
+    return {
+        "ai_probability": ai_probability,
+        "is_ai_generated": ai_probability > 0.5,
+        "signals": [
+            {"name": m.name, "start": m.start, "end": m.end, "weight": m.weight}
+            for m in matches
+        ],
+        "confidence": 0.75,
+        "model_version": version
+    }
+
+
+# AI Image Detection
+def score_ai_image(image: np.ndarray, version: str = "cnn-v1") -> Dict[str, Any]:
+    # Placeholder: would run an AI image detection model over the normalized tensor
+    ai_probability = 0.15
+    
+    return {
+        "ai_probability": ai_probability,
+        "is_ai_generated": ai_probability > 0.5,
+        "confidence": 0.70,
+        "model_version": version
+    }
@@ -0,0 +1,159 @@
+"""Dynamic micro-batching in front of each model.
+
+Concurrent requests for the same model are queued and coalesced into one
+``predict_batch`` call: a batch is dispatched when it reaches
+``max_batch_size`` or when its oldest request has waited ``max_wait_ms``,
+whichever comes first. Results are fanned back out to the waiting requests.
+
+Batches run on the inference executor; up to ``max_in_flight`` batches per
+model run concurrently, and ``submit`` rejects requests with ``Saturated``
+once ``max_queue_depth`` requests are already waiting.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import time
+
+from executor import InferenceExecutor, Saturated
+from model_manager import ModelManager
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into model batches"""
+    
+    def __init__(
+        self,
+        model_name: str,
+        manager: ModelManager,
+        executor: InferenceExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_depth: int = 1024,
+        max_in_flight: int = 1
+    ):
+        self.model_name = model_name
+        self.manager = manager
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_depth = max_queue_depth
+        self.max_in_flight = max_in_flight
+        
+        self._pending: List[Tuple[Any, asyncio.Future, float]] = []
+        self._has_items: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_tasks: set = set()
+        self.rejected = 0
+        
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes: Dict[int, int] = {}
+        self.total_wait_ms = 0.0
+        self.max_wait_ms_seen = 0.0
+        self.total_inference_ms = 0.0
+        self.errors = 0
+    
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._has_items = asyncio.Event()
+            self._full = asyncio.Event()
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._worker = asyncio.create_task(self._run())
+    
+    async def submit(self, item: Any) -> Any:
+        """Queue one input and wait for its result"""
+        if len(self._pending) >= self.max_queue_depth:
+            self.rejected += 1
+            raise Saturated(f"{self.model_name} queue is full ({len(self._pending)} waiting)")
+        
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+    
+    async def _run(self) -> None:
+        while True:
+            await self._has_items.wait()
+            await self._slots.acquire()
+            
+            # Wait until the batch is full or the oldest request hits max_wait
+            remaining = self.max_wait - (time.perf_counter() - self._pending[0][2])
+            if remaining > 0 and len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if not self._pending:
+                self._has_items.clear()
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            
+            task = asyncio.create_task(self._process(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+    
+    async def _process(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        dispatched = time.perf_counter()
+        for _, _, enqueued in batch:
+            wait_ms = (dispatched - enqueued) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms_seen = max(self.max_wait_ms_seen, wait_ms)
+        self.batches += 1
+        self.items += len(batch)
+        self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+        
+        try:
+            # Resolved per batch, so a hot-swapped version is picked up immediately
+            model = self.manager.get(self.model_name)
+            results = await self._predict(model, [item for item, _, _ in batch])
+            if len(results) != len(batch):
+                # zip() would silently leave the unmatched requests waiting forever
+                raise RuntimeError(
+                    f"{self.model_name} returned {len(results)} results for a batch of {len(batch)}"
+                )
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self.total_inference_ms += (time.perf_counter() - dispatched) * 1000
+            self._slots.release()
+        
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+    
+    async def _predict(self, model, inputs: List[Any]) -> List[Any]:
+        return await self.executor.run(model, inputs)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": len(self._pending),
+            "max_queue_depth": self.max_queue_depth,
+            "rejected": self.rejected,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "batch_size_counts": dict(sorted(self.batch_sizes.items())),
+            "avg_wait_ms": round(self.total_wait_ms / self.items, 3) if self.items else 0.0,
+            "max_wait_ms_seen": round(self.max_wait_ms_seen, 3),
+            "avg_inference_ms": round(self.total_inference_ms / self.batches, 3) if self.batches else 0.0,
+            "errors": self.errors
+        }
+    
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
@@ -0,0 +1,75 @@
+"""Load benchmark: inference throughput vs. number of pool workers.
+
+Runs a CPU-bound stand-in model through InferenceExecutor with 1..N process
+workers (and a thread pool for comparison, which stays flat under the GIL).
+
+Usage (from ml-service/):
+    python -m benchmarks.bench_executor [--batches 64] [--batch-size 8] [--work 20000]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from executor import InferenceExecutor
+from model_manager import LoadedModel, ModelSpec, register_loader
+
+WORK_PER_ITEM = 20000
+
+
+@register_loader("cpu-bench")
+def load_cpu_bench(spec: ModelSpec) -> LoadedModel:
+    """Pure-Python CPU work standing in for a model forward pass.
+    
+    Items are (value, work) pairs: the work size travels with each item, so
+    process and thread runs do exactly the same amount of it.
+    """
+    def predict_batch(items):
+        results = []
+        for item, work in items:
+            acc = 0
+            for i in range(work):
+                acc = (acc + i * item) % 1000003
+            results.append(acc)
+        return results
+    return LoadedModel(spec.name, spec.version, predict_batch, [(1, 1)])
+
+
+async def run_load(executor: InferenceExecutor, model: LoadedModel, batches: int, batch_size: int, work: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        executor.run(model, [(item, work) for item in range(batch_size)])
+        for _ in range(batches)
+    ])
+    return batches * batch_size / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batches", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--work", type=int, default=WORK_PER_ITEM)
+    args = parser.parse_args()
+    
+    spec = ModelSpec("cpu-bench", "v1")
+    model = load_cpu_bench(spec)
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, cores} & set(range(1, cores + 1)))
+    
+    print(f"{cores} cores, {args.batches} batches x {args.batch_size} items, {args.work} steps per item")
+    print(f"{'mode':>8} {'workers':>8} {'items/s':>10} {'scaling':>8}")
+    
+    baseline = None
+    for mode in ("process", "thread"):
+        for workers in worker_counts:
+            executor = InferenceExecutor(mode=mode, workers=workers, max_pending=args.batches)
+            executor.start([spec])
+            throughput = asyncio.run(run_load(executor, model, args.batches, args.batch_size, args.work))
+            executor.shutdown()
+            
+            baseline = baseline or throughput
+            print(f"{mode:>8} {workers:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark the signal matcher's compiled pattern and per-phrase scan against substring scans.
+
+SIGNAL_SCAN_MAX_PHRASES should sit near the phrase count where the compiled
+pattern overtakes the per-phrase scan.
+
+Usage (from ml-service/):
+    python -m benchmarks.bench_text_signals [--text-kb 20] [--repeat 20]
+"""
+import argparse
+import random
+import string
+import time
+
+from text_signals import DEFAULT_SIGNALS, Signal, SignalMatcher
+
+
+def make_signals(count: int, rng: random.Random):
+    signals = list(DEFAULT_SIGNALS[:count])
+    while len(signals) < count:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(rng.randint(2, 4))]
+        signals.append(Signal(f"synthetic_{len(signals)}", " ".join(words)))
+    return signals
+
+
+def make_text(kb: int, signals, rng: random.Random) -> str:
+    words = []
+    size = 0
+    while size < kb * 1024:
+        if rng.random() < 0.01:
+            word = rng.choice(signals).pattern
+        else:
+            word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def substring_scan(text: str, signals):
+    """Current approach: lowercase the text, then one `in` scan per phrase"""
+    text_lower = text.lower()
+    return [signal.name for signal in signals if signal.pattern in text_lower]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--text-kb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    
+    rng = random.Random(42)
+    print(f"text size: {args.text_kb} KB, {args.repeat} runs each")
+    print(
+        f"{'patterns':>8} {'compile ms':>11} {'substring ms':>13} {'scan ms':>8} {'speedup':>8} "
+        f"{'compiled ms':>12} {'speedup':>8}"
+    )
+    
+    for count in (1, 10, 100, 300, 1000):
+        signals = make_signals(count, rng)
+        text = make_text(args.text_kb, signals, rng)
+        
+        start = time.perf_counter()
+        compiled = SignalMatcher(signals, scan_max_phrases=0)
+        compile_ms = (time.perf_counter() - start) * 1000
+        scan = SignalMatcher(signals, scan_max_phrases=count)
+        
+        baseline_ms = timed(lambda: substring_scan(text, signals), args.repeat)
+        scan_ms = timed(lambda: scan.find(text), args.repeat)
+        compiled_ms = timed(lambda: compiled.find(text), args.repeat)
+        
+        print(
+            f"{count:>8} {compile_ms:>11.2f} {baseline_ms:>13.3f} {scan_ms:>8.3f} {baseline_ms / scan_ms:>7.1f}x "
+            f"{compiled_ms:>12.3f} {baseline_ms / compiled_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""Execution layer that keeps CPU-bound inference off the event loop.
+
+``process`` mode runs ``predict_batch`` in a process pool whose workers load
+their own copy of every model at startup. A reload starts a fresh pool with
+the new versions preloaded and switches to it together with the parent's
+models, so no request waits for a worker to load a model. ``thread`` mode
+uses a thread pool, for libraries that release the GIL during inference
+(PyTorch, tokenizers). Admission is bounded: when
+too many batches are pending, ``Saturated`` is raised and the API answers
+503 with Retry-After instead of queueing without limit.
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Sequence
+import asyncio
+import logging
+import multiprocessing
+import os
+
+from model_manager import LoadedModel, ModelManager, ModelSpec
+
+logger = logging.getLogger(__name__)
+
+
+class Saturated(Exception):
+    """Raised when inference admission limits are reached"""
+    
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Per-process model manager used inside pool workers
+_worker_manager: Optional[ModelManager] = None
+
+
+def _init_worker(specs: Sequence[ModelSpec]) -> None:
+    global _worker_manager
+    _worker_manager = ModelManager()
+    _worker_manager.load_all(specs)
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+def _worker_predict(name: str, version: str, path: Optional[str], inputs: List[Any]) -> List[Any]:
+    """Run a batch in a pool worker, loading the requested version if needed.
+    
+    Pools are started with the served versions, so the load only happens for
+    a batch that was handed its model just before a reload switched pools.
+    """
+    global _worker_manager
+    if _worker_manager is None:
+        _worker_manager = ModelManager()
+    
+    try:
+        model = _worker_manager.get(name)
+    except Exception:
+        model = None
+    if model is None or model.version != version:
+        model = _worker_manager.swap(ModelSpec(name, version, path))
+    return model.predict_batch(inputs)
+
+
+class InferenceExecutor:
+    """Dispatches model batches to a process or thread pool with bounded admission"""
+    
+    def __init__(self, mode: str = "process", workers: Optional[int] = None, max_pending: Optional[int] = None):
+        if mode not in ("process", "thread"):
+            raise ValueError(f"Unknown executor mode '{mode}'")
+        self.mode = mode
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.workers * 4
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self._pool: Optional[Executor] = None
+        self._specs: List[ModelSpec] = []
+    
+    def start(self, specs: Sequence[ModelSpec]) -> None:
+        """Create the pool; process workers preload ``specs`` before taking work"""
+        self._specs = list(specs)
+        if self.mode == "process":
+            self._pool = self.prepare(specs)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+    
+    def prepare(self, specs: Sequence[ModelSpec]) -> Optional[Executor]:
+        """Start a process pool with ``specs`` loaded in every worker, for ``start`` or ``activate``.
+        
+        Thread workers share the parent's models, so thread mode has nothing
+        to prepare and returns None.
+        """
+        if self.mode != "process":
+            return None
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(list(specs),)
+        )
+        # Start every worker now so model loading doesn't land on the first requests
+        for future in [pool.submit(_worker_ping) for _ in range(self.workers)]:
+            future.result()
+        return pool
+    
+    def activate(self, pool: Optional[Executor], specs: Sequence[ModelSpec]) -> None:
+        """Serve from a pool returned by ``prepare``; the previous pool finishes its queued batches.
+        
+        Call on the event loop, together with installing the same versions in
+        the parent, so requests never reach workers holding other versions.
+        """
+        self._specs = list(specs)
+        if pool is None:
+            return
+        previous, self._pool = self._pool, pool
+        if previous is not None:
+            previous.shutdown(wait=False)
+    
+    async def run(self, model: LoadedModel, inputs: List[Any]) -> List[Any]:
+        """Run ``model.predict_batch(inputs)`` in the pool"""
+        if self._pool is None:
+            raise Saturated("Inference pool is not started yet", retry_after=5)
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise Saturated(f"{self.pending} inference batches already pending")
+        
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        self.pending += 1
+        try:
+            if self.mode == "process":
+                return await loop.run_in_executor(
+                    pool, _worker_predict, model.name, model.version, model.path, inputs
+                )
+            return await loop.run_in_executor(pool, model.predict_batch, inputs)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM); replace the pool in the background, unless a reload already has
+            if self._pool is pool:
+                logger.error("Inference process pool broke, restarting it")
+                self._pool = None
+                pool.shutdown(wait=False, cancel_futures=True)
+                loop.run_in_executor(None, self.start, self._specs)
+            raise Saturated("Inference pool is restarting", retry_after=5)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "started": self._pool is not None,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,323 @@
+"""Image fetching, decoding and derivatives for the image models.
+
+Each image is downloaded once (streamed, with a size cap), hashed, and decoded
+with Pillow's draft mode, so JPEGs are decoded at a reduced scale close to the
+model input instead of at full resolution. One decode produces the
+normalized model-input tensor (float32, CHW) and a thumbnail written to disk
+under its content hash. Tensors are kept in an LRU by content hash, and
+concurrent requests for the same URL share a single download and decode, so
+every model scoring an image reuses the same tensor.
+
+URLs come from callers, so fetches are restricted: http(s) only, to
+IMAGE_ALLOWED_HOSTS when set (by default the storage host from
+STORAGE_PUBLIC_URL), and otherwise only to hosts resolving to public
+addresses. Redirects are followed by hand so every hop is checked, and each
+hop connects to the address that was checked (keeping the Host header and
+TLS server name), so a second DNS answer can't point it somewhere else.
+"""
+from collections import OrderedDict
+from typing import Any, Collection, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import io
+import ipaddress
+import os
+import re
+import socket
+import time
+
+import httpx
+import numpy as np
+from PIL import Image, ImageOps
+
+from result_cache import content_hash
+
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(20 * 1024 * 1024)))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(50_000_000)))  # Decompression bomb guard
+IMAGE_FETCH_TIMEOUT_SECONDS = float(os.getenv("IMAGE_FETCH_TIMEOUT_SECONDS", "10"))
+IMAGE_INPUT_SIZE = int(os.getenv("IMAGE_INPUT_SIZE", "224"))
+IMAGE_TENSOR_CACHE_ENTRIES = int(os.getenv("IMAGE_TENSOR_CACHE_ENTRIES", "512"))  # ~600KB each at 224px
+IMAGE_URL_CACHE_TTL_SECONDS = float(os.getenv("IMAGE_URL_CACHE_TTL_SECONDS", "3600"))
+THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "/tmp/advision-thumbnails")
+THUMBNAIL_SIZE = int(os.getenv("THUMBNAIL_SIZE", "256"))
+IMAGE_MAX_REDIRECTS = int(os.getenv("IMAGE_MAX_REDIRECTS", "3"))
+# Hosts images may be fetched from (comma-separated); empty allows any host with public addresses
+IMAGE_ALLOWED_HOSTS = frozenset(
+    host.strip().lower()
+    for host in os.getenv("IMAGE_ALLOWED_HOSTS", urlsplit(os.getenv("STORAGE_PUBLIC_URL", "")).hostname or "").split(",")
+    if host.strip()
+)
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+# ImageNet normalization, as expected by ViT/CNN checkpoints
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32).reshape(3, 1, 1)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32).reshape(3, 1, 1)
+
+Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+
+
+class ImageTooLarge(Exception):
+    """Raised when an image exceeds IMAGE_MAX_BYTES"""
+
+
+class ImageFetchError(Exception):
+    """Raised when an image can't be downloaded or decoded"""
+
+
+class ImageURLNotAllowed(ImageFetchError):
+    """Raised for URLs the service must not fetch (other schemes, hosts, internal addresses)"""
+
+
+class PreparedImage(NamedTuple):
+    content_hash: str
+    width: int  # Original dimensions
+    height: int
+    format: Optional[str]
+    tensor: np.ndarray  # float32 (3, IMAGE_INPUT_SIZE, IMAGE_INPUT_SIZE), normalized
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])  # Drop IPv6 zone ids
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    # Excludes loopback, private, link-local (cloud metadata), shared and reserved ranges
+    return ip.is_global
+
+
+async def resolve_host(host: str, port: int):
+    loop = asyncio.get_running_loop()
+    infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+def thumbnail_path(digest: str, thumbnail_dir: str = THUMBNAIL_DIR) -> str:
+    return os.path.join(thumbnail_dir, digest[:2], f"{digest}_{THUMBNAIL_SIZE}.jpg")
+
+
+def decode_image(data: bytes, input_size: int = IMAGE_INPUT_SIZE) -> Tuple[np.ndarray, Image.Image, Dict[str, Any]]:
+    """Decode once into (model tensor, thumbnail, original info)"""
+    try:
+        image = Image.open(io.BytesIO(data))
+        info = {"width": image.width, "height": image.height, "format": image.format}
+        # JPEG only: let the decoder scale by 1/2..1/8, keeping at least what the derivatives need
+        target = max(input_size, THUMBNAIL_SIZE)
+        image.draft("RGB", (target, target))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ImageFetchError(f"Could not decode image: {e}") from e
+    
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.BILINEAR)
+    
+    fitted = ImageOps.fit(image, (input_size, input_size), Image.BILINEAR)
+    tensor = np.asarray(fitted, dtype=np.float32).transpose(2, 0, 1) / 255.0
+    tensor = (tensor - MEAN) / STD
+    return np.ascontiguousarray(tensor, dtype=np.float32), thumbnail, info
+
+
+def write_thumbnail(digest: str, thumbnail: Image.Image, thumbnail_dir: str = THUMBNAIL_DIR) -> str:
+    path = thumbnail_path(digest, thumbnail_dir)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        thumbnail.save(tmp_path, "JPEG", quality=85)
+        os.replace(tmp_path, path)  # Atomic, so readers never see a partial file
+    return path
+
+
+class ImagePipeline:
+    """Download-once image preparation shared by the image endpoints"""
+    
+    def __init__(
+        self,
+        max_bytes: int = IMAGE_MAX_BYTES,
+        cache_entries: int = IMAGE_TENSOR_CACHE_ENTRIES,
+        url_ttl: float = IMAGE_URL_CACHE_TTL_SECONDS,
+        thumbnail_dir: str = THUMBNAIL_DIR,
+        allowed_hosts: Collection[str] = IMAGE_ALLOWED_HOSTS,
+        max_redirects: int = IMAGE_MAX_REDIRECTS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        resolver=resolve_host
+    ):
+        self.max_bytes = max_bytes
+        self.cache_entries = cache_entries
+        self.url_ttl = url_ttl
+        self.thumbnail_dir = thumbnail_dir
+        self.allowed_hosts = frozenset(host.lower() for host in allowed_hosts)
+        self.max_redirects = max_redirects
+        self.resolver = resolver
+        # Redirects are followed in fetch(), so each hop goes through check_url()
+        self.client = httpx.AsyncClient(
+            timeout=IMAGE_FETCH_TIMEOUT_SECONDS,
+            follow_redirects=False,
+            transport=transport
+        )
+        self._images: "OrderedDict[str, PreparedImage]" = OrderedDict()  # content hash -> prepared
+        self._urls: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()  # url -> (fetched at, content hash)
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_fetches = 0
+        self.bytes_downloaded = 0
+        self.decodes = 0
+        self.decode_seconds = 0.0
+    
+    async def check_url(self, url: str) -> Optional[str]:
+        """Refuse URLs outside the allowlist or resolving to non-public addresses.
+        
+        Returns the validated address to connect to, or None for allowlisted
+        hosts, which are trusted to resolve normally.
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or not host:
+            raise ImageURLNotAllowed(f"Only http(s) image URLs are supported: {url}")
+        if self.allowed_hosts:
+            if host not in self.allowed_hosts:
+                raise ImageURLNotAllowed(f"Image host {host} is not allowed")
+            return None
+        
+        try:
+            ipaddress.ip_address(host)
+            addresses = [host]  # Literal address, nothing to resolve
+        except ValueError:
+            try:
+                addresses = await self.resolver(host, parts.port or (443 if parts.scheme == "https" else 80))
+            except (OSError, UnicodeError) as e:
+                raise ImageFetchError(f"Could not resolve {host}: {e}") from e
+        if not addresses or not all(_is_public(address) for address in addresses):
+            raise ImageURLNotAllowed(f"Image host {host} does not resolve to a public address")
+        return addresses[0]
+    
+    def _request(self, url: str, address: Optional[str]) -> httpx.Request:
+        """GET ``url``, connecting to ``address`` (when given) instead of resolving the host again"""
+        if address is None:
+            return self.client.build_request("GET", url)
+        target = httpx.URL(url)
+        return self.client.build_request(
+            "GET",
+            target.copy_with(host=address.split("%", 1)[0]),
+            headers={"Host": target.netloc.decode("ascii")},
+            # Certificates are still verified against the original host
+            extensions={"sni_hostname": target.host} if target.scheme == "https" else {}
+        )
+    
+    async def fetch(self, url: str) -> bytes:
+        """Stream ``url`` into memory, refusing anything over ``max_bytes``"""
+        try:
+            for _ in range(self.max_redirects + 1):
+                address = await self.check_url(url)
+                response = await self.client.send(self._request(url, address), stream=True)
+                try:
+                    if response.is_redirect:
+                        # Relative to the URL as given, not the pinned address
+                        url = str(httpx.URL(url).join(response.headers["location"]))
+                        continue
+                    response.raise_for_status()
+                    declared = int(response.headers.get("content-length") or 0)
+                    if declared > self.max_bytes:
+                        raise ImageTooLarge(f"Image is {declared} bytes; the limit is {self.max_bytes}")
+                    
+                    buffer = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        buffer.extend(chunk)
+                        if len(buffer) > self.max_bytes:
+                            raise ImageTooLarge(f"Image exceeds the {self.max_bytes} byte limit")
+                    break
+                finally:
+                    await response.aclose()
+            else:
+                raise ImageFetchError(f"Too many redirects fetching image (limit {self.max_redirects})")
+        except httpx.HTTPError as e:
+            raise ImageFetchError(f"Could not fetch {url}: {e}") from e
+        
+        self.bytes_downloaded += len(buffer)
+        return bytes(buffer)
+    
+    def _cached(self, url: str) -> Optional[PreparedImage]:
+        entry = self._urls.get(url)
+        if entry is None or time.monotonic() - entry[0] > self.url_ttl:
+            return None
+        image = self._images.get(entry[1])
+        if image is not None:
+            self._images.move_to_end(entry[1])
+        return image
+    
+    async def prepare(self, url: str) -> PreparedImage:
+        """Tensor and metadata for ``url``, from cache or a single shared download and decode"""
+        image = self._cached(url)
+        if image is not None:
+            self.hits += 1
+            return image
+        
+        task = self._in_flight.get(url)
+        if task is not None:
+            self.shared_fetches += 1
+            return await asyncio.shield(task)
+        
+        # Its own task, so a caller cancelling (e.g. a client disconnect) doesn't fail the others sharing it
+        self.misses += 1
+        task = asyncio.create_task(self._load(url))
+        self._in_flight[url] = task
+        task.add_done_callback(lambda done: self._load_done(url, done))
+        return await asyncio.shield(task)
+    
+    def _load_done(self, url: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(url) is task:
+            del self._in_flight[url]
+        if not task.cancelled():
+            task.exception()  # Waiters get it; don't log it as never retrieved if they all left
+    
+    async def _load(self, url: str) -> PreparedImage:
+        data = await self.fetch(url)
+        digest = content_hash(data)
+        
+        # Same bytes under another URL: reuse the decode
+        image = self._images.get(digest)
+        if image is None:
+            start = time.perf_counter()
+            image = await asyncio.to_thread(self._decode, digest, data)
+            self.decodes += 1
+            self.decode_seconds += time.perf_counter() - start
+            self._images[digest] = image
+            while len(self._images) > self.cache_entries:
+                self._images.popitem(last=False)
+        self._images.move_to_end(digest)
+        
+        self._urls[url] = (time.monotonic(), digest)
+        self._urls.move_to_end(url)
+        while len(self._urls) > self.cache_entries * 4:
+            self._urls.popitem(last=False)
+        return image
+    
+    def _decode(self, digest: str, data: bytes) -> PreparedImage:
+        tensor, thumbnail, info = decode_image(data)
+        write_thumbnail(digest, thumbnail, self.thumbnail_dir)
+        return PreparedImage(digest, info["width"], info["height"], info["format"], tensor)
+    
+    def thumbnail(self, digest: str) -> Optional[str]:
+        """Path of the cached thumbnail for a content hash, if one was generated"""
+        if not SHA256_RE.match(digest):
+            return None
+        path = thumbnail_path(digest, self.thumbnail_dir)
+        return path if os.path.exists(path) else None
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.shared_fetches
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared_fetches": self.shared_fetches,
+            "hit_rate": round((self.hits + self.shared_fetches) / lookups, 4) if lookups else 0.0,
+            "tensors_cached": len(self._images),
+            "in_flight": len(self._in_flight),
+            "bytes_downloaded": self.bytes_downloaded,
+            "decodes": self.decodes,
+            "avg_decode_ms": round(self.decode_seconds * 1000 / self.decodes, 2) if self.decodes else 0.0
+        }
+    
+    async def close(self) -> None:
+        for task in list(self._in_flight.values()):
+            task.cancel()
+        await self.client.aclose()
@@ -1,14 +1,67 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
+import asyncio
+import logging
 import os
 
+from batching import MicroBatcher
+from executor import InferenceExecutor, Saturated
+from images import SHA256_RE, ImagePipeline, ImageFetchError, ImageTooLarge
+from model_manager import model_manager, load_model_specs, ModelNotReady
+from result_cache import ResultCache, normalize_text
+from text_signals import text_detector
+
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="AdVision AI - ML Service",
     description="Machine Learning inference service for marketing intelligence",
     version="1.0.0"
 )
 
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000")),
+    persist_path=os.getenv("RESULT_CACHE_PATH") or None
+)
+
+# CPU-bound inference runs in a process (or thread) pool, never on the event loop
+inference_executor = InferenceExecutor(
+    mode=os.getenv("ML_EXECUTOR", "process"),
+    workers=int(os.getenv("ML_EXECUTOR_WORKERS", "0")) or None,
+    max_pending=int(os.getenv("ML_EXECUTOR_MAX_PENDING", "0")) or None
+)
+
+# Images are downloaded and decoded once; every image model scores the same tensor
+image_pipeline = ImagePipeline()
+
+# Micro-batching queues for the per-item inference endpoints
+BATCHED_MODELS = ["ai-text-detector", "ai-image-detector", "creative-quality"]
+batchers = {
+    name: MicroBatcher(
+        name,
+        model_manager,
+        inference_executor,
+        max_batch_size=int(os.getenv("ML_MAX_BATCH_SIZE", "32")),
+        max_wait_ms=float(os.getenv("ML_MAX_BATCH_WAIT_MS", "5")),
+        max_queue_depth=int(os.getenv("ML_MAX_QUEUE_DEPTH", "1024")),
+        max_in_flight=inference_executor.workers
+    )
+    for name in BATCHED_MODELS
+}
+
+
+async def cached_batched(kind: str, model_name: str, item: Any, version_suffix: str = "", **key_inputs) -> Dict[str, Any]:
+    """Result-cache lookup, falling back to the model's micro-batch queue"""
+    model = model_manager.get(model_name)
+    key = result_cache.make_key(kind, model.version + version_suffix, **key_inputs)
+    result = result_cache.get(key)
+    if result is None:
+        result = await batchers[model_name].submit(item)
+        result_cache.set(key, result)
+    return result
+
 
 # Request/Response Models
 class EngagementRequest(BaseModel):
@@ -20,6 +73,10 @@ class EngagementRequest(BaseModel):
     reach: int
 
 
+class BatchEngagementRequest(BaseModel):
+    campaigns: List[EngagementRequest]
+
+
 class TrustScoreRequest(BaseModel):
     campaign_id: str
     text: Optional[str] = None
@@ -38,47 +95,138 @@ class ImageDetectionRequest(BaseModel):
     image_url: str
 
 
+class ImagePrepareRequest(BaseModel):
+    image_url: str
+
+
+# Lifecycle
+@app.on_event("startup")
+async def load_models():
+    # Load in the background so /health can report progress while models warm up
+    async def run():
+        specs = await asyncio.to_thread(load_model_specs)
+        await asyncio.to_thread(model_manager.load_all, specs)
+        await asyncio.to_thread(inference_executor.start, specs)
+    
+    def report(task: asyncio.Task):
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            # Surface in /health instead of leaving the service "loading" with no explanation
+            logger.error("Model startup failed", exc_info=exc)
+            model_manager.errors["startup"] = f"{type(exc).__name__}: {exc}"
+            model_manager.state = "failed"
+    
+    # Keep a reference: the event loop only holds tasks weakly
+    app.state.startup_task = asyncio.create_task(run())
+    app.state.startup_task.add_done_callback(report)
+
+
+@app.on_event("shutdown")
+async def stop_inference():
+    for batcher in batchers.values():
+        await batcher.close()
+    inference_executor.shutdown()
+    await image_pipeline.close()
+
+
+@app.exception_handler(ModelNotReady)
+async def model_not_ready_handler(request: Request, exc: ModelNotReady):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"}
+    )
+
+
+@app.exception_handler(Saturated)
+async def saturated_handler(request: Request, exc: Saturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
+@app.exception_handler(ImageTooLarge)
+async def image_too_large_handler(request: Request, exc: ImageTooLarge):
+    return JSONResponse(status_code=413, content={"detail": str(exc)})
+
+
+@app.exception_handler(ImageFetchError)
+async def image_fetch_error_handler(request: Request, exc: ImageFetchError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
+
+
+def is_ready() -> bool:
+    return model_manager.ready and inference_executor.stats()["started"]
+
+
 # Health check
 @app.get("/health")
 async def health():
+    models = model_manager.status()
     return {
-        "status": "ok",
+        "status": "ok" if is_ready() else models["state"],
         "service": "ml-service",
-        "models_loaded": ["engagement-baseline", "trust-score-v1"]
+        "models_loaded": sorted(models["models"]),
+        "models": models,
+        "executor": inference_executor.stats(),
+        "result_cache": result_cache.stats(),
+        "images": image_pipeline.stats()
     }
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 200 only once every expected model is loaded and warm"""
+    if not is_ready():
+        return JSONResponse(status_code=503, content=model_manager.status(), headers={"Retry-After": "5"})
+    return {"ready": True}
+
+
+@app.get("/metrics/batching")
+async def batching_metrics():
+    """Queue depth, batch size and wait-time metrics per model"""
+    return {name: batcher.stats() for name, batcher in batchers.items()}
+
+
+@app.post("/models/reload")
+async def reload_models():
+    """Re-read the model registry and hot-swap any changed versions"""
+    specs = await asyncio.to_thread(load_model_specs)
+    models = await asyncio.to_thread(model_manager.prepare, specs)
+    pool = await asyncio.to_thread(inference_executor.prepare, specs)
+    
+    # Switch both at once (no await in between), so batches only reach workers that hold their version
+    model_manager.install(models)
+    inference_executor.activate(pool, specs)
+    return model_manager.status()
+
+
 # Engagement Prediction
 @app.post("/predict/engagement")
 async def predict_engagement(request: EngagementRequest):
     """Predict engagement rate for a campaign"""
+    model = model_manager.get("engagement-baseline")
+    return (await inference_executor.run(model, [request.dict()]))[0]
+
+
+@app.post("/predict/engagement/batch")
+async def predict_engagement_batch(request: BatchEngagementRequest):
+    """Predict engagement rates for many campaigns; results follow input order"""
+    model = model_manager.get("engagement-baseline")
     
-    # Simple baseline model (replace with actual ML model)
-    # Formula: engagement_rate = (clicks / impressions) * platform_factor
-    
-    platform_factors = {
-        "instagram": 1.2,
-        "facebook": 1.0,
-        "youtube": 0.8,
-        "google_ads": 0.9,
-        "twitter": 1.1,
-        "linkedin": 0.7
-    }
-    
-    platform_factor = platform_factors.get(request.platform.lower(), 1.0)
-    
-    # Estimate clicks based on spend and impressions
-    estimated_ctr = 0.02 * platform_factor  # 2% base CTR
-    estimated_clicks = int(request.impressions * estimated_ctr)
+    if not request.campaigns:
+        return {"predictions": [], "count": 0, "model_version": model.version}
     
-    # Calculate engagement rate
-    engagement_rate = estimated_ctr
+    predictions = await inference_executor.run(model, [c.dict() for c in request.campaigns])
     
     return {
-        "engagement_rate": round(engagement_rate, 4),
-        "estimated_clicks": estimated_clicks,
-        "confidence": 0.75,
-        "model_version": "baseline-v1"
+        "predictions": predictions,
+        "count": len(predictions),
+        "model_version": model.version
     }
 
 
@@ -86,134 +234,73 @@ async def predict_engagement(request: EngagementRequest):
 @app.post("/trust/calculate")
 async def calculate_trust_score(request: TrustScoreRequest):
     """Calculate AI Justice Score (Trust Score)"""
+    model = model_manager.get("trust-score")
+    text = normalize_text(request.text)
     
-    # Initialize scores
-    authenticity_score = 1.0
-    factual_accuracy_score = 1.0
-    source_credibility_score = 1.0
-    transparency_score = 1.0
-    ethical_compliance_score = 1.0
-    
-    ai_text_probability = 0.0
-    ai_image_probability = 0.0
-    recommendations = []
-    
-    # AI Text Detection (simplified - replace with actual model)
-    if request.text:
-        # Simple heuristic: check for AI-like patterns
-        text_lower = request.text.lower()
-        ai_indicators = ["as an ai", "i'm an ai", "i cannot", "i don't have", "i'm not able"]
-        
-        if any(indicator in text_lower for indicator in ai_indicators):
-            ai_text_probability = 0.9
-            authenticity_score *= 0.7
-            recommendations.append("Disclose AI-generated content")
-        else:
-            ai_text_probability = 0.1
-    
-    # AI Image Detection (simplified - replace with actual model)
-    if request.image_url:
-        # Placeholder: would use actual AI detection model
-        ai_image_probability = 0.15  # Assume 15% chance
-        if ai_image_probability > 0.5:
-            authenticity_score *= 0.8
-            recommendations.append("Verify image authenticity")
-    
-    # Fact-checking (simplified - would integrate with fact-check APIs)
-    if request.text:
-        # Placeholder for fact-checking
-        factual_accuracy_score = 0.95
-    
-    # Calculate overall trust score (weighted average)
-    trust_score = (
-        authenticity_score * 0.30 +
-        factual_accuracy_score * 0.25 +
-        source_credibility_score * 0.20 +
-        transparency_score * 0.15 +
-        ethical_compliance_score * 0.10
-    ) * 100
-    
-    # Determine badge level
-    if trust_score >= 90:
-        badge_level = "high"
-    elif trust_score >= 70:
-        badge_level = "medium"
-    elif trust_score >= 50:
-        badge_level = "low"
-    else:
-        badge_level = "risk"
-    
-    return {
-        "trust_score": round(trust_score, 2),
-        "badge_level": badge_level,
-        "authenticity_score": round(authenticity_score, 2),
-        "factual_accuracy_score": round(factual_accuracy_score, 2),
-        "source_credibility_score": round(source_credibility_score, 2),
-        "transparency_score": round(transparency_score, 2),
-        "ethical_compliance_score": round(ethical_compliance_score, 2),
-        "ai_text_probability": round(ai_text_probability, 2),
-        "ai_image_probability": round(ai_image_probability, 2),
-        "fact_check_results": [],
-        "recommendations": recommendations
-    }
+    # Text results depend on the signal set too, so its fingerprint is part of the key
+    key = result_cache.make_key(
+        "trust", f"{model.version}+{text_detector.fingerprint}",
+        text=text, image=request.image_url
+    )
+    result = result_cache.get(key)
+    if result is None:
+        result = (await inference_executor.run(model, [{"text": text, "image_url": request.image_url}]))[0]
+        result_cache.set(key, result)
+    return result
 
 
 # Creative Quality Analysis
 @app.post("/creative/analyze")
 async def analyze_creative(request: CreativeAnalysisRequest):
     """Analyze creative quality"""
-    
-    # Placeholder: would use Vision Transformer model
-    quality_score = 75  # 0-100
-    
-    suggestions = []
-    if quality_score < 50:
-        suggestions.append("Increase image contrast")
-        suggestions.append("Simplify text overlay")
-    
-    return {
-        "quality_score": quality_score,
-        "predicted_engagement": 0.035,
-        "suggestions": suggestions,
-        "model_version": "vit-v1"
-    }
+    # Keyed by content, so the same bytes under another URL hit the cache
+    image = await image_pipeline.prepare(request.image_url)
+    return await cached_batched("creative", "creative-quality", image.tensor, image=image.content_hash)
 
 
 # AI Text Detection
 @app.post("/detect/text")
 async def detect_ai_text(request: TextDetectionRequest):
     """Detect if text is AI-generated"""
-    
-    # Simplified detection (replace with actual model like GPTZero)
-    text_lower = request.text.lower()
-    ai_indicators = ["as an ai", "i'm an ai", "i cannot", "i don't have"]
-    
-    ai_probability = 0.9 if any(ind in text_lower for ind in ai_indicators) else 0.1
-    
-    return {
-        "ai_probability": ai_probability,
-        "is_ai_generated": ai_probability > 0.5,
-        "confidence": 0.75,
-        "model_version": "roberta-v1"
-    }
+    text = normalize_text(request.text)
+    return await cached_batched(
+        "detect_text", "ai-text-detector", text,
+        version_suffix=f"+{text_detector.fingerprint}", text=text
+    )
 
 
 # AI Image Detection
 @app.post("/detect/image")
 async def detect_ai_image(request: ImageDetectionRequest):
     """Detect if image is AI-generated"""
-    
-    # Placeholder: would use actual AI image detection model
-    ai_probability = 0.15
-    
+    image = await image_pipeline.prepare(request.image_url)
+    return await cached_batched("detect_image", "ai-image-detector", image.tensor, image=image.content_hash)
+
+
+# Image derivatives
+@app.post("/images/prepare")
+async def prepare_image(request: ImagePrepareRequest):
+    """Fetch and decode an image ahead of scoring; returns its content hash and thumbnail"""
+    image = await image_pipeline.prepare(request.image_url)
     return {
-        "ai_probability": ai_probability,
-        "is_ai_generated": ai_probability > 0.5,
-        "confidence": 0.70,
-        "model_version": "cnn-v1"
+        "content_hash": image.content_hash,
+        "width": image.width,
+        "height": image.height,
+        "format": image.format,
+        "thumbnail_url": f"/images/{image.content_hash}/thumbnail"
     }
 
 
+@app.get("/images/{content_hash}/thumbnail")
+async def get_thumbnail(content_hash: str):
+    if not SHA256_RE.match(content_hash):
+        raise HTTPException(status_code=400, detail="content_hash must be a sha256 hex digest")
+    path = image_pipeline.thumbnail(content_hash)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(path, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
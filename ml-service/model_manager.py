@@ -0,0 +1,302 @@
+"""Model loading, warmup and hot-swapping.
+
+The set of models to serve comes from the backend's ``model_registry`` table
+(rows with ``is_active = true``), falling back to the built-in baselines for
+any model the registry doesn't name. Models are loaded and warmed up at
+startup; ``/health`` reports real readiness. Swapping a version loads and
+warms the new one first and then replaces the reference, so requests that
+already hold the old model finish on it.
+"""
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+import baselines
+from images import IMAGE_INPUT_SIZE
+
+logger = logging.getLogger(__name__)
+
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "/app/models")
+WARMUP_RUNS = int(os.getenv("MODEL_WARMUP_RUNS", "2"))
+
+
+class ModelSpec(NamedTuple):
+    name: str
+    version: str
+    path: Optional[str] = None  # model_registry.s3_path
+
+
+class ModelNotReady(Exception):
+    """Raised when a request needs a model that hasn't finished loading"""
+
+
+class LoadedModel:
+    """A loaded model version with a batch prediction function"""
+    
+    def __init__(
+        self,
+        name: str,
+        version: str,
+        predict_batch: Callable[[List[Any]], List[Dict[str, Any]]],
+        warmup_inputs: Sequence[Any] = ()
+    ):
+        self.name = name
+        self.version = version
+        self.predict_batch = predict_batch
+        self.warmup_inputs = list(warmup_inputs)
+        self.path: Optional[str] = None
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        self.loaded_at: Optional[float] = None
+
+
+# Built-in models served when the registry doesn't override them
+DEFAULT_MODELS = [
+    ModelSpec("engagement-baseline", "baseline-v1"),
+    ModelSpec("trust-score", "trust-score-v1"),
+    ModelSpec("creative-quality", "vit-v1"),
+    ModelSpec("ai-text-detector", "roberta-v1"),
+    ModelSpec("ai-image-detector", "cnn-v1"),
+]
+
+# Blank normalized input, shaped like images.prepare() output
+WARMUP_IMAGE = np.zeros((3, IMAGE_INPUT_SIZE, IMAGE_INPUT_SIZE), dtype=np.float32)
+
+LOADERS: Dict[str, Callable[[ModelSpec], LoadedModel]] = {}
+
+
+def register_loader(name: str):
+    def decorator(fn):
+        LOADERS[name] = fn
+        return fn
+    return decorator
+
+
+@register_loader("engagement-baseline")
+def load_engagement(spec: ModelSpec) -> LoadedModel:
+    def predict_batch(campaigns):
+        return baselines.score_engagement(
+            [c["platform"] for c in campaigns],
+            [c["impressions"] for c in campaigns],
+            version=spec.version
+        )
+    return LoadedModel(spec.name, spec.version, predict_batch, [{"platform": "instagram", "impressions": 1000}])
+
+
+@register_loader("trust-score")
+def load_trust(spec: ModelSpec) -> LoadedModel:
+    def predict_batch(items):
+        return [baselines.score_trust(item.get("text"), item.get("image_url")) for item in items]
+    return LoadedModel(spec.name, spec.version, predict_batch, [{"text": "warmup", "image_url": None}])
+
+
+@register_loader("creative-quality")
+def load_creative_quality(spec: ModelSpec) -> LoadedModel:
+    def predict_batch(images):
+        return [baselines.score_creative(image, version=spec.version) for image in images]
+    return LoadedModel(spec.name, spec.version, predict_batch, [WARMUP_IMAGE])
+
+
+@register_loader("ai-text-detector")
+def load_ai_text_detector(spec: ModelSpec) -> LoadedModel:
+    if spec.path and spec.path.startswith("hf://"):
+        return _load_hf_text_classifier(spec)
+    
+    def predict_batch(texts):
+        return [baselines.score_ai_text(text, version=spec.version) for text in texts]
+    return LoadedModel(spec.name, spec.version, predict_batch, ["warmup text"])
+
+
+@register_loader("ai-image-detector")
+def load_ai_image_detector(spec: ModelSpec) -> LoadedModel:
+    def predict_batch(images):
+        return [baselines.score_ai_image(image, version=spec.version) for image in images]
+    return LoadedModel(spec.name, spec.version, predict_batch, [WARMUP_IMAGE])
+
+
+def _load_hf_text_classifier(spec: ModelSpec) -> LoadedModel:
+    """Load a Hugging Face text classifier given as hf://<repo-or-local-path>"""
+    from transformers import pipeline  # Heavy import, only when a real model is registered
+    
+    classifier = pipeline(
+        "text-classification",
+        model=spec.path[len("hf://"):],
+        device=-1,
+        model_kwargs={"cache_dir": MODEL_CACHE_DIR},
+        top_k=None
+    )
+    
+    def predict_batch(texts):
+        outputs = classifier(list(texts), batch_size=len(texts), truncation=True)
+        results = []
+        for scores in outputs:
+            by_label = {s["label"].lower(): s["score"] for s in scores}
+            # Detector checkpoints label the AI class differently; take the first we recognise
+            ai_probability = next(
+                (by_label[label] for label in ("fake", "ai", "label_1", "machine") if label in by_label),
+                0.0
+            )
+            results.append({
+                "ai_probability": round(float(ai_probability), 4),
+                "is_ai_generated": ai_probability > 0.5,
+                "signals": [],
+                "confidence": round(float(max(by_label.values())), 4),
+                "model_version": spec.version
+            })
+        return results
+    
+    return LoadedModel(spec.name, spec.version, predict_batch, ["warmup text"])
+
+
+def fetch_registry_models(database_url: Optional[str]) -> List[ModelSpec]:
+    """Active models from the backend's model_registry table"""
+    if not database_url:
+        return []
+    
+    from sqlalchemy import create_engine, text
+    
+    engine = create_engine(database_url, pool_pre_ping=True)
+    try:
+        with engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT model_name, version, s3_path FROM model_registry WHERE is_active = true"
+            )).all()
+    finally:
+        engine.dispose()
+    return [ModelSpec(row.model_name, row.version, row.s3_path) for row in rows]
+
+
+def resolve_model_specs(registry_specs: Sequence[ModelSpec]) -> List[ModelSpec]:
+    """Built-in defaults, overridden (and extended) by registry entries by name.
+    
+    Registry rows this service has no loader for are skipped: they could
+    never load, and expecting them would keep readiness false forever.
+    """
+    specs = {spec.name: spec for spec in DEFAULT_MODELS}
+    for spec in registry_specs:
+        if spec.name not in LOADERS:
+            logger.warning("Ignoring registry model %s %s: no loader registered", spec.name, spec.version)
+            continue
+        specs[spec.name] = spec
+    return list(specs.values())
+
+
+class ModelManager:
+    """Holds the currently served version of every model"""
+    
+    def __init__(self):
+        self._models: Dict[str, LoadedModel] = {}
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # Serializes startup loads and reloads
+        self.expected: List[str] = []
+        self.errors: Dict[str, str] = {}
+        self.state = "starting"
+    
+    def load(self, spec: ModelSpec) -> LoadedModel:
+        """Load and warm up a model version without installing it"""
+        loader = LOADERS.get(spec.name)
+        if loader is None:
+            raise ValueError(f"No loader registered for model '{spec.name}'")
+        
+        start = time.perf_counter()
+        model = loader(spec)
+        model.path = spec.path
+        model.load_seconds = time.perf_counter() - start
+        
+        # Warmup: pay lazy init / JIT costs here rather than on the first request
+        start = time.perf_counter()
+        for _ in range(WARMUP_RUNS):
+            if model.warmup_inputs:
+                model.predict_batch(model.warmup_inputs)
+        model.warmup_seconds = time.perf_counter() - start
+        model.loaded_at = time.time()
+        return model
+    
+    def swap(self, spec: ModelSpec) -> LoadedModel:
+        """Load a version and atomically make it the served one"""
+        model = self.load(spec)
+        self._install(model)
+        return model
+    
+    def _install(self, model: LoadedModel) -> None:
+        with self._lock:
+            previous = self._models.get(model.name)
+            self._models[model.name] = model
+            self.errors.pop(model.name, None)
+        logger.info(
+            "Serving %s %s (previously %s), load %.2fs, warmup %.2fs",
+            model.name, model.version, previous.version if previous else None,
+            model.load_seconds, model.warmup_seconds
+        )
+    
+    def load_all(self, specs: Sequence[ModelSpec]) -> None:
+        """Load every spec whose version isn't already served"""
+        self.install(self.prepare(specs))
+    
+    def prepare(self, specs: Sequence[ModelSpec]) -> List[LoadedModel]:
+        """Load and warm up every spec whose version isn't already served, without serving it yet"""
+        with self._load_lock:
+            if not self.ready:
+                self.state = "loading"
+            self.expected = [spec.name for spec in specs]
+            loaded = []
+            for spec in specs:
+                current = self._models.get(spec.name)
+                if current is not None and current.version == spec.version:
+                    continue
+                try:
+                    loaded.append(self.load(spec))
+                except Exception as e:
+                    self.errors[spec.name] = str(e)
+                    logger.exception("Failed to load model %s %s", spec.name, spec.version)
+            return loaded
+    
+    def install(self, models: Sequence[LoadedModel]) -> None:
+        """Serve models returned by ``prepare``"""
+        for model in models:
+            self._install(model)
+        self.state = "ready" if self.ready else "degraded"
+    
+    def get(self, name: str) -> LoadedModel:
+        model = self._models.get(name)
+        if model is None:
+            raise ModelNotReady(f"Model '{name}' is not loaded")
+        return model
+    
+    @property
+    def ready(self) -> bool:
+        return bool(self.expected) and all(name in self._models for name in self.expected)
+    
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "ready": self.ready,
+            "models": {
+                name: {
+                    "version": model.version,
+                    "load_ms": round(model.load_seconds * 1000, 1),
+                    "warmup_ms": round(model.warmup_seconds * 1000, 1),
+                    "loaded_at": model.loaded_at
+                }
+                for name, model in self._models.items()
+            },
+            "errors": dict(self.errors)
+        }
+
+
+def load_model_specs() -> List[ModelSpec]:
+    """Models to serve: registry entries when the database is reachable, else defaults"""
+    try:
+        registry_specs = fetch_registry_models(os.getenv("DATABASE_URL"))
+    except Exception as e:
+        logger.warning("Could not read model_registry, serving built-in models: %s", e)
+        registry_specs = []
+    return resolve_model_specs(registry_specs)
+
+
+# Global model manager instance
+model_manager = ModelManager()
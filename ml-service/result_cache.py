@@ -0,0 +1,127 @@
+"""Content-hash result cache for pure inference endpoints.
+
+Results are keyed by a SHA-256 over the endpoint kind, the model version and
+the normalized inputs, so re-scoring identical ad copy or creatives is a
+dictionary lookup. An in-memory LRU holds the hot set; an optional SQLite
+file persists results across restarts.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Canonical form of ad copy for hashing (Unicode NFC, collapsed whitespace)"""
+    if not text:
+        return ""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache of JSON results with optional on-disk persistence"""
+    
+    def __init__(self, max_entries: int = 10000, persist_path: Optional[str] = None, max_disk_entries: int = 200000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        
+        self._db = None
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_results_last_access ON results (last_access)")
+            self._db.commit()
+    
+    @staticmethod
+    def make_key(kind: str, model_version: str, text: Optional[str] = None, image: Optional[str] = None) -> str:
+        """Key for an inference result.
+        
+        ``image`` is the content hash of the image bytes when available,
+        otherwise the image URL.
+        """
+        digest = hashlib.sha256()
+        for part in (kind, model_version, normalize_text(text), image or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            
+            if self._db is not None:
+                row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    value = json.loads(row[0])
+                    self._store(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+            
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, last_access) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), time.time())
+                )
+                self._prune_disk()
+                self._db.commit()
+    
+    def _store(self, key: str, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _prune_disk(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        # Prune in steps of 10% so the DELETE doesn't run on every insert
+        if count > self.max_disk_entries * 1.1:
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_access LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
+    
+    def get_or_compute(self, key: str, compute) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "disk_hits": self.disk_hits,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "persistent": self._db is not None
+        }
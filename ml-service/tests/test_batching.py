@@ -0,0 +1,40 @@
+import asyncio
+
+from batching import MicroBatcher
+
+
+class FakeModel:
+    version = "v1"
+
+
+class FakeManager:
+    def get(self, name):
+        return FakeModel()
+
+
+class DroppingExecutor:
+    """Returns one result too few for every batch"""
+    
+    async def run(self, model, inputs):
+        return [f"result-{item}" for item in inputs[:-1]]
+
+
+def test_short_result_lists_fail_the_whole_batch():
+    """Test that a model returning fewer results than inputs errors every request instead of hanging"""
+    async def run():
+        batcher = MicroBatcher(
+            "model", FakeManager(), DroppingExecutor(),
+            max_batch_size=4, max_wait_ms=5, max_queue_depth=16, max_in_flight=1
+        )
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(*[batcher.submit(i) for i in range(3)], return_exceptions=True),
+                timeout=2
+            ), batcher.stats()
+        finally:
+            await batcher.close()
+    
+    results, stats = asyncio.run(run())
+    
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert stats["errors"] == 1
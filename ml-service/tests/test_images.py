@@ -0,0 +1,175 @@
+import asyncio
+import io
+import httpx
+import numpy as np
+import pytest
+from PIL import Image
+
+from images import IMAGE_INPUT_SIZE, ImagePipeline, ImageTooLarge, ImageURLNotAllowed
+
+
+def jpeg_bytes(size=(1200, 800), color=(200, 40, 20)):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+async def public_resolver(host, port):
+    return ["93.184.216.34"]
+
+
+def make_pipeline(handler, tmp_path, **kwargs):
+    return ImagePipeline(
+        thumbnail_dir=str(tmp_path),
+        transport=httpx.MockTransport(handler),
+        resolver=kwargs.pop("resolver", public_resolver),
+        allowed_hosts=kwargs.pop("allowed_hosts", ()),
+        **kwargs
+    )
+
+
+def test_prepare_decodes_once_into_tensor_and_thumbnail(tmp_path):
+    """Test that concurrent requests share one download and get a normalized tensor plus thumbnail"""
+    data = jpeg_bytes()
+    calls = []
+    
+    async def handler(request):
+        calls.append(request.url)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=data)
+    
+    pipeline = make_pipeline(handler, tmp_path)
+    
+    async def run():
+        images = await asyncio.gather(*[pipeline.prepare("https://cdn.test/a.jpg") for _ in range(5)])
+        again = await pipeline.prepare("https://cdn.test/a.jpg")
+        await pipeline.close()
+        return images, again
+    
+    images, again = asyncio.run(run())
+    image = images[0]
+    
+    assert len(calls) == 1
+    assert all(other is image for other in images) and again is image
+    assert (image.width, image.height, image.format) == (1200, 800, "JPEG")
+    assert image.tensor.shape == (3, IMAGE_INPUT_SIZE, IMAGE_INPUT_SIZE)
+    assert image.tensor.dtype == np.float32
+    # Solid red-ish image: every channel is constant after normalization, red well above the mean
+    assert np.allclose(image.tensor[0], image.tensor[0, 0, 0], atol=0.05)
+    assert image.tensor[0].mean() > 1.0
+    
+    with Image.open(pipeline.thumbnail(image.content_hash)) as thumbnail:
+        assert max(thumbnail.size) == 256
+    assert pipeline.thumbnail("../../etc/passwd") is None
+    assert pipeline.stats()["shared_fetches"] == 4
+    assert pipeline.stats()["hits"] == 1
+
+
+def test_size_cap_applies_to_streamed_bodies(tmp_path):
+    """Test that oversized images are refused whether or not they declare a length"""
+    async def chunks():
+        for _ in range(10):
+            yield b"x" * 1000
+    
+    def handler(request):
+        if request.url.path == "/declared":
+            return httpx.Response(200, content=b"x" * 5000)
+        return httpx.Response(200, content=chunks())
+    
+    pipeline = make_pipeline(handler, tmp_path, max_bytes=4000)
+    
+    for path in ("/declared", "/streamed"):
+        with pytest.raises(ImageTooLarge):
+            asyncio.run(pipeline.fetch(f"https://cdn.test{path}"))
+    assert pipeline.stats()["bytes_downloaded"] == 0
+
+
+def test_internal_urls_are_refused(tmp_path):
+    """Test scheme, address and allowlist checks, including on redirect targets"""
+    data = jpeg_bytes((64, 64))
+    fetched = []
+    
+    def handler(request):
+        fetched.append(f"{request.headers['host']}{request.url.path}")
+        if request.url.path == "/redirect":
+            return httpx.Response(302, headers={"location": "http://169.254.169.254/latest/meta-data/"})
+        return httpx.Response(200, content=data)
+    
+    async def resolver(host, port):
+        return {"cdn.test": ["93.184.216.34"], "internal.test": ["10.0.0.5"]}[host]
+    
+    pipeline = make_pipeline(handler, tmp_path, resolver=resolver)
+    for url in (
+        "file:///etc/passwd",
+        "http://127.0.0.1:8001/health",
+        "http://[::ffff:127.0.0.1]/",
+        "http://internal.test/a.jpg",
+        "https://cdn.test/redirect",
+    ):
+        with pytest.raises(ImageURLNotAllowed):
+            asyncio.run(pipeline.fetch(url))
+    assert fetched == ["cdn.test/redirect"]
+    
+    allowlisted = make_pipeline(handler, tmp_path, allowed_hosts={"storage.test"})
+    assert asyncio.run(allowlisted.fetch("https://storage.test/a.jpg")) == data
+    with pytest.raises(ImageURLNotAllowed):
+        asyncio.run(allowlisted.fetch("https://cdn.test/a.jpg"))
+
+
+def test_fetch_connects_to_the_checked_address(tmp_path):
+    """Test that the request goes to the validated IP with the original Host and TLS name, resolving once"""
+    data = jpeg_bytes((64, 64))
+    requests = []
+    answers = iter([["93.184.216.34"], ["127.0.0.1"]])
+    
+    async def rebinding_resolver(host, port):
+        return next(answers)
+    
+    def handler(request):
+        requests.append(request)
+        if request.url.path == "/old.jpg":
+            return httpx.Response(301, headers={"location": "/a.jpg"})
+        return httpx.Response(200, content=data)
+    
+    pipeline = make_pipeline(handler, tmp_path, resolver=rebinding_resolver)
+    with pytest.raises(ImageURLNotAllowed):
+        # The redirect hop resolves again and gets the private answer
+        asyncio.run(pipeline.fetch("https://cdn.test:8443/old.jpg"))
+    
+    request = requests[0]
+    assert (request.url.host, request.url.port) == ("93.184.216.34", 8443)
+    assert request.headers["host"] == "cdn.test:8443"
+    assert request.extensions["sni_hostname"] == "cdn.test"
+    
+    pipeline = make_pipeline(handler, tmp_path)
+    assert asyncio.run(pipeline.fetch("http://cdn.test/old.jpg")) == data
+    assert [(r.headers["host"], r.url.path) for r in requests[1:]] == [("cdn.test", "/old.jpg"), ("cdn.test", "/a.jpg")]
+    assert "sni_hostname" not in requests[-1].extensions
+
+
+def test_cancelled_caller_does_not_fail_shared_fetch(tmp_path):
+    """Test that cancelling the caller that started a download leaves it running for the others"""
+    data = jpeg_bytes((64, 64))
+    calls = []
+    
+    async def handler(request):
+        calls.append(request.url)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=data)
+    
+    pipeline = make_pipeline(handler, tmp_path)
+    
+    async def run():
+        leader = asyncio.create_task(pipeline.prepare("https://cdn.test/a.jpg"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(pipeline.prepare("https://cdn.test/a.jpg"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        image = await follower
+        await pipeline.close()
+        return leader, image
+    
+    leader, image = asyncio.run(run())
+    assert leader.cancelled()
+    assert (image.width, image.height) == (64, 64)
+    assert len(calls) == 1
@@ -0,0 +1,89 @@
+from result_cache import ResultCache
+
+
+def test_keys_depend_on_kind_version_and_normalized_inputs():
+    """Test that equivalent copy shares a key and any other difference doesn't"""
+    key = ResultCache.make_key("ai_text", "v1", text="Buy  now\n today")
+    
+    assert key == ResultCache.make_key("ai_text", "v1", text=" Buy now today ")
+    assert key == ResultCache.make_key("ai_text", "v1", text="Buy now today", image=None)
+    assert ResultCache.make_key("ai_text", "v1", text="Cafe\u0301") == ResultCache.make_key("ai_text", "v1", text="Caf\u00e9")
+    
+    others = {
+        ResultCache.make_key("ai_text", "v2", text="Buy now today"),
+        ResultCache.make_key("trust", "v1", text="Buy now today"),
+        ResultCache.make_key("ai_text", "v1", text="buy now today"),
+        ResultCache.make_key("ai_text", "v1", text="Buy now today", image="ab12"),
+        # Parts are delimited, so shifting text between them changes the key
+        ResultCache.make_key("ai_text", "v1Buy now today"),
+    }
+    assert key not in others
+    assert len(others) == 5
+
+
+def test_memory_entries_are_evicted_least_recently_used_first():
+    """Test that reads refresh recency and the oldest entry is dropped at capacity"""
+    cache = ResultCache(max_entries=2)
+    cache.set("a", {"score": 1})
+    cache.set("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}
+    
+    cache.set("c", {"score": 3})
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == {"score": 1}
+    assert cache.get("c") == {"score": 3}
+    assert cache.stats()["entries"] == 2
+
+
+def test_results_persist_across_restarts(tmp_path):
+    """Test that a new cache on the same file serves earlier results from disk"""
+    path = str(tmp_path / "results.db")
+    ResultCache(persist_path=path).set("key", {"score": 0.5, "labels": ["a"]})
+    
+    restarted = ResultCache(persist_path=path)
+    
+    assert restarted.get("key") == {"score": 0.5, "labels": ["a"]}
+    assert restarted.get("key") == {"score": 0.5, "labels": ["a"]}  # Now from memory
+    assert restarted.get("missing") is None
+    assert restarted.stats() == {
+        "entries": 1,
+        "max_entries": 10000,
+        "hits": 2,
+        "misses": 1,
+        "disk_hits": 1,
+        "hit_rate": 0.6667,
+        "persistent": True
+    }
+
+
+def test_disk_is_pruned_to_its_limit_by_last_access(tmp_path):
+    """Test that pruning drops the least recently used rows once the file is 10% over its limit"""
+    path = str(tmp_path / "results.db")
+    cache = ResultCache(max_entries=1, persist_path=path, max_disk_entries=10)
+    for i in range(11):
+        cache.set(f"k{i}", i)
+    assert cache.get("k0") == 0  # Refreshes k0's last access
+    
+    cache.set("k11", 11)
+    
+    restarted = ResultCache(persist_path=path)
+    assert restarted.get("k0") == 0
+    assert restarted.get("k1") is None
+    assert restarted.get("k2") is None
+    assert restarted.get("k11") == 11
+
+
+def test_get_or_compute_only_computes_misses():
+    """Test that a cached result is returned without recomputing it"""
+    cache = ResultCache()
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return {"score": 0.9}
+    
+    assert cache.get_or_compute("k", compute) == {"score": 0.9}
+    assert cache.get_or_compute("k", compute) == {"score": 0.9}
+    assert len(calls) == 1
+    assert cache.stats()["persistent"] is False
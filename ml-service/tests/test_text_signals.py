@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from text_signals import DEFAULT_SIGNALS, Signal, SignalMatcher
+
+SIGNALS = [
+    Signal("i_can", "i can"),
+    Signal("i_cannot", "i cannot"),
+    Signal("cannot", "cannot"),
+    Signal("as_an_ai", "as an ai"),
+    Signal("an_ai_model", "an AI model"),
+    Signal("ai", "ai"),
+]
+
+
+def naive_scan(text, signals):
+    """Names of the signals whose phrase occurs anywhere in the lowercased text"""
+    text_lower = text.lower()
+    return {signal.name for signal in signals if signal.pattern.lower() in text_lower}
+
+
+@pytest.fixture(params=["scan", "compiled"])
+def matcher(request):
+    return SignalMatcher(SIGNALS, scan_max_phrases=len(SIGNALS) if request.param == "scan" else 0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Longest phrase wins where several start at the same offset
+    ("Sorry, I cannot help", [("i_cannot", 7, 15)]),
+    ("I can help", [("i_can", 0, 5)]),
+    ("As an AI model, I can't", [("as_an_ai", 0, 8), ("i_can", 16, 21)]),
+    # Phrases are matched as substrings, without word boundaries
+    ("the brain cannotated", [("ai", 6, 8), ("cannot", 10, 16)]),
+    ("trained", [("ai", 2, 4)]),
+    ("nothing to see", []),
+])
+def test_find_reports_leftmost_longest_matches(matcher, text, expected):
+    """Test offsets, case-insensitivity and overlap resolution on both matching paths"""
+    matches = matcher.find(text)
+    
+    assert [(m.name, m.start, m.end) for m in matches] == expected
+    for m in matches:
+        assert text[m.start:m.end].lower() == next(s.pattern.lower() for s in SIGNALS if s.name == m.name)
+
+
+def test_matching_paths_agree_with_a_naive_scan():
+    """Test the per-phrase scan and the compiled pattern against each other and against substring checks"""
+    rng = random.Random(7)
+    words = ["i", "I", "can", "CANNOT", "not", "as", "an", "AI", "ai", "model", "a", "n", "ca", "nnot", "x"]
+    signals = SIGNALS + DEFAULT_SIGNALS
+    scan = SignalMatcher(signals, scan_max_phrases=len(signals))
+    compiled = SignalMatcher(signals, scan_max_phrases=0)
+    
+    for _ in range(500):
+        text = rng.choice(["", " "]).join(rng.choices(words, k=rng.randint(0, 12)))
+        found = scan.find(text)
+        
+        assert found == compiled.find(text)
+        assert scan.any_match(text) == compiled.any_match(text) == bool(naive_scan(text, signals))
+        assert {m.name for m in found} <= naive_scan(text, signals)
+        assert all(a.end <= b.start for a, b in zip(found, found[1:]))
+
+
+def test_regex_signals_always_use_the_compiled_pattern():
+    """Test that a regex signal disables the per-phrase scan"""
+    matcher = SignalMatcher([Signal("as_an_ai", "as an ai"), Signal("digits", r"\d+", regex=True)])
+    
+    assert [(m.name, m.start, m.end) for m in matcher.find("As an AI, 42")] == [("as_an_ai", 0, 8), ("digits", 10, 12)]
+
+
+def test_length_changing_lowercase_keeps_offsets(matcher):
+    """Test texts whose lowercase form has a different length (falls back to an ignore-case pattern)"""
+    text = "İ As an AI"
+    
+    assert [(m.name, m.start, m.end) for m in matcher.find(text)] == [("as_an_ai", 2, 10)]
@@ -0,0 +1,163 @@
+"""Shared AI-text signal detection.
+
+All signals are compiled once into a single regular expression, so a text is
+scanned in one pass no matter how many signals are configured. Literal
+phrases are merged into a character trie before compiling, which keeps the
+pattern cheap to match with hundreds or thousands of phrases; regex signals
+are added as named alternatives next to it.
+
+Matching runs on the lowercased text with a case-sensitive pattern, which is
+several times faster in CPython's regex engine than ``re.IGNORECASE``; regex
+signals should therefore be written in lowercase.
+
+With only a few literal phrases one ``str.find`` pass per phrase is faster
+than the compiled pattern, so small phrase-only sets are scanned that way,
+with the same leftmost-longest results.
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import hashlib
+import os
+import re
+
+# Phrase-only sets up to this size are scanned per phrase instead of compiled
+SIGNAL_SCAN_MAX_PHRASES = int(os.getenv("SIGNAL_SCAN_MAX_PHRASES", "200"))
+
+
+class Signal(NamedTuple):
+    name: str
+    pattern: str
+    weight: float = 1.0
+    regex: bool = False  # Lowercase, and only non-capturing groups
+
+
+class SignalMatch(NamedTuple):
+    name: str
+    start: int
+    end: int
+    weight: float
+
+
+DEFAULT_SIGNALS = [
+    Signal("as_an_ai", "as an ai"),
+    Signal("im_an_ai", "i'm an ai"),
+    Signal("i_cannot", "i cannot"),
+    Signal("i_dont_have", "i don't have"),
+    Signal("im_not_able", "i'm not able"),
+]
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Regex for the phrases below a trie node, preferring the longest match"""
+    alternatives = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ""
+    ]
+    if not alternatives:
+        return ""
+    
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    if "" in node:
+        # A phrase ends here; longer phrases are tried first (greedy optional)
+        pattern = "(?:" + pattern + ")?"
+    return pattern
+
+
+class SignalMatcher:
+    """Matches many phrase and regex signals in a single pass (case-insensitive)"""
+    
+    _LITERAL_GROUP = "lit"
+    
+    def __init__(self, signals: Sequence[Signal], scan_max_phrases: int = SIGNAL_SCAN_MAX_PHRASES):
+        self.signals = list(signals)
+        self._literals: Dict[str, Signal] = {}
+        self._regex_signals: Dict[str, Signal] = {}
+        
+        trie: Dict[str, dict] = {}
+        for signal in self.signals:
+            if signal.regex:
+                self._regex_signals[f"r{len(self._regex_signals)}"] = signal
+                continue
+            phrase = signal.pattern.lower()
+            self._literals[phrase] = signal
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        
+        parts = []
+        if self._literals:
+            parts.append(f"(?P<{self._LITERAL_GROUP}>{_trie_pattern(trie)})")
+        for group, signal in self._regex_signals.items():
+            parts.append(f"(?P<{group}>{signal.pattern})")
+        
+        self._pattern = "|".join(parts)
+        self._regex: Optional[re.Pattern] = re.compile(self._pattern) if parts else None
+        self._regex_ignorecase: Optional[re.Pattern] = None
+        self._phrase_scan = not self._regex_signals and len(self._literals) <= scan_max_phrases
+        self.fingerprint = hashlib.sha256(
+            repr([tuple(signal) for signal in self.signals]).encode("utf-8")
+        ).hexdigest()[:12]
+    
+    def _scan(self, text: str):
+        text_lower = text.lower()
+        if len(text_lower) == len(text):
+            return self._regex.finditer(text_lower)
+        
+        # Lowercasing changed the length (rare Unicode cases); match the
+        # original text so offsets stay correct
+        if self._regex_ignorecase is None:
+            self._regex_ignorecase = re.compile(self._pattern, re.IGNORECASE)
+        return self._regex_ignorecase.finditer(text)
+    
+    def _find_phrases(self, text_lower: str) -> List[SignalMatch]:
+        """Leftmost-longest, non-overlapping phrase matches, as the compiled pattern finds them"""
+        found = []
+        for phrase, signal in self._literals.items():
+            start = text_lower.find(phrase)
+            while start != -1:
+                found.append((start, -len(phrase), signal))
+                start = text_lower.find(phrase, start + 1)
+        found.sort()
+        
+        matches = []
+        end = 0
+        for start, negative_length, signal in found:
+            if start >= end:
+                end = start - negative_length
+                matches.append(SignalMatch(signal.name, start, end, signal.weight))
+        return matches
+    
+    def find(self, text: str) -> List[SignalMatch]:
+        """All (non-overlapping) signal matches with character offsets"""
+        if not text or self._regex is None:
+            return []
+        
+        if self._phrase_scan:
+            text_lower = text.lower()
+            if len(text_lower) == len(text):
+                return self._find_phrases(text_lower)
+        
+        matches = []
+        for m in self._scan(text):
+            if m.lastgroup == self._LITERAL_GROUP:
+                signal = self._literals.get(m.group().lower())
+                if signal is None:
+                    continue
+            else:
+                signal = self._regex_signals[m.lastgroup]
+            matches.append(SignalMatch(signal.name, m.start(), m.end(), signal.weight))
+        return matches
+    
+    def any_match(self, text: str) -> bool:
+        if not text or self._regex is None:
+            return False
+        if self._phrase_scan:
+            text_lower = text.lower()
+            if len(text_lower) == len(text):
+                return any(phrase in text_lower for phrase in self._literals)
+        return next(iter(self._scan(text)), None) is not None
+
+
+# Shared matcher used by all text endpoints
+text_detector = SignalMatcher(DEFAULT_SIGNALS)